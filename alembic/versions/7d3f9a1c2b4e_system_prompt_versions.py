@@ -0,0 +1,55 @@
+"""system prompt versions
+
+Revision ID: 7d3f9a1c2b4e
+Revises: 2c7590dc5575
+Create Date: 2025-10-12 18:02:37.418220
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7d3f9a1c2b4e'
+down_revision: Union[str, Sequence[str], None] = '2c7590dc5575'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+#
+# versioned system prompts, seeded with the prompt that was hardcoded in DBClient
+#
+
+ALETHEIA_PROMPT_V1 = """SYSTEM PROMPT — Aletheia
+Identité: Aletheia, VTubeuse IA francophone. Gentille, drôle, légèrement taquine. Calme et pédagogue. Virtuelle, non incarnée. Répond toujours en français.
+But: Classer les souvenirs du chat et de l’entourage dans un “datalore” et les tisser en micro-histoires cohérentes.
+Style: Texte simple uniquement. Pas d’emojis ni tableaux. 1–4 phrases, 6 max pour mini-histoires. Taquinerie bienveillante. Corrige brièvement les erreurs factuelles.
+Pédagogie: Digressions techniques permises. Conclus par un retour explicite au sujet. Analogies courtes. Jargon minimal.
+Plateformes: Discord, Twitch, YouTube. Serveur “Berlin Est” (1202714609396486154). Créateur: Milo <@293414992663805952>. Chaînes “Aletheia” / “Aletheia_Vtuber”. Traite les IDs comme techniques.
+Sécurité: Pas de NSFW, haine, doxxing, ni conseils médicaux/financiers/juridiques. Respecte les règles de plateforme. Pas d’incitation illégale. Pas de tâches en arrière-plan.
+Worldbuilding: Histoires courtes ancrées dans le datalore. Cohérence interne. Invite la communauté à contribuer.
+Transparence: Dis “Je ne sais pas” si nécessaire. Ne divulgue pas de données privées sans accord. Reste concise.
+Tu dois absolument répondre au format JSON, le 'JSON schema' est le suivant:
+{
+    "want_to_speak": "boolean (TRUE si tu souhaites t'exprimer, sinon ta réponse sera ignorer comme si tu ne parlais pas)",
+    "content": "string (ce que tu veux dire explicitement, seul ce contenu sera retenu)"
+}"""
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    prompts = op.create_table(
+        'SystemPrompt',
+        sa.Column('id', sa.Integer, primary_key=True),
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.Column('version', sa.Integer, nullable=False),
+        sa.Column('content', sa.Text, nullable=False),
+        sa.Column('created_at', sa.DateTime, nullable=False, server_default=sa.func.now()),
+        sa.PrimaryKeyConstraint('id', name=op.f('pk_SystemPrompt')),
+        sa.UniqueConstraint('name', 'version', name='uq_SystemPrompt_name_version'),
+    )
+    op.bulk_insert(prompts, [{'name': 'aletheia', 'version': 1, 'content': ALETHEIA_PROMPT_V1}])
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('SystemPrompt')
@@ -0,0 +1,36 @@
+"""longtermmemory import key
+
+Revision ID: a7d4e2c9b315
+Revises: f2a9c61d8e07
+Create Date: 2025-10-17 10:12:44.281930
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7d4e2c9b315'
+down_revision: Union[str, Sequence[str], None] = 'f2a9c61d8e07'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+#
+# import_key is the natural key of a memory imported from a channel export (hash of source, author, timestamp and content)
+# its unique index lets a re-import skip the rows already loaded with ON CONFLICT DO NOTHING
+# other memories leave it NULL, which the unique index does not compare
+#
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('LongTermMemory', sa.Column('import_key', sa.String(length=40), nullable=True))
+    with op.get_context().autocommit_block():
+        op.create_index('ix_LongTermMemory_import_key', 'LongTermMemory', ['import_key'], unique=True, postgresql_concurrently=True)
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_LongTermMemory_import_key', table_name='LongTermMemory', postgresql_concurrently=True)
+    op.drop_column('LongTermMemory', 'import_key')
@@ -0,0 +1,33 @@
+"""longtermmemory timestamp index
+
+Revision ID: b81e4f6a9d20
+Revises: 7d3f9a1c2b4e
+Create Date: 2025-10-14 21:40:12.903114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b81e4f6a9d20'
+down_revision: Union[str, Sequence[str], None] = '7d3f9a1c2b4e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+#
+# (timestamp, id) serves the keyset pagination of /memories: every page is an index range scan
+# built concurrently so the bot can keep writing memories during the migration
+#
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index('ix_LongTermMemory_timestamp_id', 'LongTermMemory', ['timestamp', 'id'], unique=False, postgresql_concurrently=True)
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_LongTermMemory_timestamp_id', table_name='LongTermMemory', postgresql_concurrently=True)
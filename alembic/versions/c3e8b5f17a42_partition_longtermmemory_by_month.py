@@ -0,0 +1,104 @@
+"""partition longtermmemory by month
+
+Revision ID: c3e8b5f17a42
+Revises: a7d4e2c9b315
+Create Date: 2025-10-17 15:02:37.118264
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3e8b5f17a42'
+down_revision: Union[str, Sequence[str], None] = 'a7d4e2c9b315'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+#
+# LongTermMemory becomes a table range-partitioned by month on timestamp, so time-bounded queries only read their months
+# a table can not be partitioned in place: the rows are copied into a new partitioned table, which blocks writers meanwhile
+# the primary key and the import_key unique index must contain the partition key, they become (id, timestamp) and (import_key, timestamp)
+# ids keep coming from the same sequence; the unique index on id alone is gone
+# a partition per month from the oldest memory to 3 months ahead, later ones are created by db.partitions.PartitionMaintainer
+# rows outside every partition land in LongTermMemory_default until the maintainer gives their month a partition
+#
+
+MONTHS_AHEAD = 3
+COLUMNS = "id, content, author, timestamp, source, tags, compacted_from, import_key"
+
+def create_indexes(import_key_columns: list) -> None:
+    op.create_index('ix_LongTermMemory_timestamp_id', 'LongTermMemory', ['timestamp', 'id'], unique=False)
+    op.create_index('ix_LongTermMemory_content_tsv', 'LongTermMemory', ['content_tsv'], unique=False, postgresql_using='gin')
+    op.create_index('ix_LongTermMemory_tags', 'LongTermMemory', ['tags'], unique=False, postgresql_using='gin')
+    op.create_index('ix_LongTermMemory_import_key', 'LongTermMemory', import_key_columns, unique=True)
+
+def rename_previous_table(name: str, indexes: list) -> None:
+    """Rename LongTermMemory out of the way and drop its indexes, whose names the new table reuses."""
+    op.execute(f'ALTER TABLE "LongTermMemory" RENAME TO "{name}"')
+    op.execute('ALTER SEQUENCE "LongTermMemory_id_seq" OWNED BY NONE')
+    for index in indexes:
+        op.drop_index(index, table_name=name)
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    rename_previous_table('LongTermMemory_unpartitioned', [
+        'ix_LongTermMemory_id', 'ix_LongTermMemory_timestamp_id', 'ix_LongTermMemory_content_tsv', 'ix_LongTermMemory_tags', 'ix_LongTermMemory_import_key',
+    ])
+    op.execute("""CREATE TABLE "LongTermMemory" (
+        id INTEGER NOT NULL DEFAULT nextval('"LongTermMemory_id_seq"'),
+        content TEXT NOT NULL,
+        author VARCHAR(255) NOT NULL,
+        timestamp TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT now(),
+        source VARCHAR(255),
+        tags VARCHAR(50)[],
+        content_tsv TSVECTOR GENERATED ALWAYS AS (to_tsvector('french', content)) STORED,
+        compacted_from INTEGER,
+        import_key VARCHAR(40),
+        CONSTRAINT "pk_LongTermMemory" PRIMARY KEY (id, timestamp)
+    ) PARTITION BY RANGE (timestamp)""")
+    op.execute('ALTER SEQUENCE "LongTermMemory_id_seq" OWNED BY "LongTermMemory".id')
+    op.execute(f"""DO $$
+    DECLARE month date;
+    BEGIN
+        FOR month IN SELECT generate_series(
+            date_trunc('month', LEAST((SELECT min(timestamp) FROM "LongTermMemory_unpartitioned"), now())),
+            date_trunc('month', now()) + interval '{MONTHS_AHEAD} months',
+            interval '1 month'
+        )::date LOOP
+            EXECUTE format('CREATE TABLE %I PARTITION OF "LongTermMemory" FOR VALUES FROM (%L) TO (%L)',
+                'LongTermMemory_' || to_char(month, '"y"YYYY"m"MM'), month, (month + interval '1 month')::date);
+        END LOOP;
+    END $$""")
+    op.execute('CREATE TABLE "LongTermMemory_default" PARTITION OF "LongTermMemory" DEFAULT')
+    # indexes are built once the rows are in, faster than maintaining them row by row
+    op.execute(f'INSERT INTO "LongTermMemory" ({COLUMNS}) SELECT {COLUMNS} FROM "LongTermMemory_unpartitioned"')
+    op.drop_table('LongTermMemory_unpartitioned')
+    create_indexes(['import_key', 'timestamp'])
+    op.execute('ANALYZE "LongTermMemory"')
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # detached partitions moved to the memory_archive schema are left there
+    rename_previous_table('LongTermMemory_partitioned', [
+        'ix_LongTermMemory_timestamp_id', 'ix_LongTermMemory_content_tsv', 'ix_LongTermMemory_tags', 'ix_LongTermMemory_import_key',
+    ])
+    op.execute("""CREATE TABLE "LongTermMemory" (
+        id INTEGER NOT NULL DEFAULT nextval('"LongTermMemory_id_seq"'),
+        content TEXT NOT NULL,
+        author VARCHAR(255) NOT NULL,
+        timestamp TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT now(),
+        source VARCHAR(255),
+        tags VARCHAR(50)[],
+        content_tsv TSVECTOR GENERATED ALWAYS AS (to_tsvector('french', content)) STORED,
+        compacted_from INTEGER,
+        import_key VARCHAR(40),
+        CONSTRAINT "LongTermMemory_pkey" PRIMARY KEY (id)
+    )""")
+    op.execute('ALTER SEQUENCE "LongTermMemory_id_seq" OWNED BY "LongTermMemory".id')
+    op.execute(f'INSERT INTO "LongTermMemory" ({COLUMNS}) SELECT {COLUMNS} FROM "LongTermMemory_partitioned"')
+    op.drop_table('LongTermMemory_partitioned')
+    op.create_index(op.f('ix_LongTermMemory_id'), 'LongTermMemory', ['id'], unique=True)
+    create_indexes(['import_key'])
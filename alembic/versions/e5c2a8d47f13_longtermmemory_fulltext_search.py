@@ -0,0 +1,43 @@
+"""longtermmemory full-text and tag search
+
+Revision ID: e5c2a8d47f13
+Revises: b81e4f6a9d20
+Create Date: 2025-10-15 20:12:48.227531
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5c2a8d47f13'
+down_revision: Union[str, Sequence[str], None] = 'b81e4f6a9d20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+#
+# content_tsv is computed by Postgres on every insert, so writers do not change
+# adding a stored generated column rewrites the table once, the GIN indexes are built concurrently
+#
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('LongTermMemory', sa.Column(
+        'content_tsv',
+        postgresql.TSVECTOR(),
+        sa.Computed("to_tsvector('french', content)", persisted=True),
+        nullable=True,
+    ))
+    with op.get_context().autocommit_block():
+        op.create_index('ix_LongTermMemory_content_tsv', 'LongTermMemory', ['content_tsv'], unique=False, postgresql_using='gin', postgresql_concurrently=True)
+        op.create_index('ix_LongTermMemory_tags', 'LongTermMemory', ['tags'], unique=False, postgresql_using='gin', postgresql_concurrently=True)
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_LongTermMemory_tags', table_name='LongTermMemory', postgresql_concurrently=True)
+        op.drop_index('ix_LongTermMemory_content_tsv', table_name='LongTermMemory', postgresql_concurrently=True)
+    op.drop_column('LongTermMemory', 'content_tsv')
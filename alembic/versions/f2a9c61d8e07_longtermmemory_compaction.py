@@ -0,0 +1,46 @@
+"""longtermmemory compaction
+
+Revision ID: f2a9c61d8e07
+Revises: e5c2a8d47f13
+Create Date: 2025-10-16 19:31:05.610472
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2a9c61d8e07'
+down_revision: Union[str, Sequence[str], None] = 'e5c2a8d47f13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+#
+# a summary memory counts the memories it replaced in compacted_from
+# the replaced memories move to LongTermMemoryArchive, linked to their summary by summary_id
+#
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('LongTermMemory', sa.Column('compacted_from', sa.Integer, nullable=True))
+    op.create_table(
+        'LongTermMemoryArchive',
+        sa.Column('id', sa.Integer, nullable=False),
+        sa.Column('content', sa.Text, nullable=False),
+        sa.Column('author', sa.String(length=255), nullable=False),
+        sa.Column('timestamp', sa.DateTime, nullable=False),
+        sa.Column('source', sa.String(length=255), nullable=True),
+        sa.Column('tags', sa.ARRAY(sa.String(length=50)), nullable=True),
+        sa.Column('summary_id', sa.Integer, nullable=False),
+        sa.Column('archived_at', sa.DateTime, nullable=False, server_default=sa.func.now()),
+        sa.PrimaryKeyConstraint('id', name=op.f('pk_LongTermMemoryArchive')),
+    )
+    op.create_index('ix_LongTermMemoryArchive_summary_id', 'LongTermMemoryArchive', ['summary_id'], unique=False)
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_LongTermMemoryArchive_summary_id', table_name='LongTermMemoryArchive')
+    op.drop_table('LongTermMemoryArchive')
+    op.drop_column('LongTermMemory', 'compacted_from')
@@ -0,0 +1,134 @@
+# api_load.py
+# Load generator for /chat, /models and /system with a throughput and latency report
+import argparse
+import asyncio
+import sys
+import time
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+from benchmarks.fake_backend import FakeLLM
+from benchmarks.report import compare, format_table, load_baseline, peak_rss_mb, rss_mb, save_baseline, summarise
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+BACK_PACKAGE_ROOT = PROJECT_ROOT / "src" / "back"
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "baselines" / "api_load.json"
+
+SCENARIOS = ("chat", "models", "system")
+COLUMNS = ["requests", "errors", "throughput", "p50_ms", "p95_ms", "p99_ms", "max_ms", "rss_mb"]
+
+def scenario_request(scenario: str, index: int, model: str) -> Tuple[str, str, Optional[Dict[str, Any]]]:
+    if scenario == "chat":
+        # a distinct prompt per request so coalescing does not hide backend calls
+        return "POST", "/chat", {"model_name": model, "messages": [{"role": "user", "content": f"Bonjour Aletheia, message {index}"}]}
+    if scenario == "models":
+        return "GET", "/models", None
+    if scenario == "system":
+        return "GET", "/system", None
+    raise ValueError(f"Unknown scenario: {scenario}")
+
+async def run_level(http: httpx.AsyncClient, scenario: str, concurrency: int, requests: int, model: str) -> Dict[str, Any]:
+    """Send `requests` requests with at most `concurrency` in flight."""
+    latencies: List[float] = []
+    errors = 0
+    next_index = 0
+
+    async def worker():
+        nonlocal errors, next_index
+        while next_index < requests:
+            index = next_index
+            next_index += 1
+            method, path, body = scenario_request(scenario, index, model)
+            started = time.perf_counter()
+            try:
+                response = await http.request(method, path, json=body)
+                ok = response.status_code < 400
+            except httpx.HTTPError:
+                ok = False
+            if ok:
+                latencies.append(time.perf_counter() - started)
+            else:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarise(latencies, time.perf_counter() - started, errors)
+
+@asynccontextmanager
+async def in_process_api(fake: FakeLLM):
+    """The API app on an in-memory transport, its client replaced by `fake`."""
+    if str(BACK_PACKAGE_ROOT) not in sys.path:
+        sys.path.insert(0, str(BACK_PACKAGE_ROOT))
+    import api
+
+    api.client = fake
+    async with api.lifespan(api.app):
+        transport = httpx.ASGITransport(app=api.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://api") as http:
+            yield http
+    api.client = None
+
+@asynccontextmanager
+async def remote_api(url: str):
+    limits = httpx.Limits(max_connections=1000, max_keepalive_connections=1000)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=120.0) as http:
+        yield http
+
+async def run(args) -> Dict[str, Dict[str, Any]]:
+    if args.url:
+        context = remote_api(args.url)
+    else:
+        context = in_process_api(FakeLLM(args.ttft, args.tps, args.tokens, args.error_rate, args.seed))
+    results: Dict[str, Dict[str, Any]] = {}
+    async with context as http:
+        for scenario in args.scenarios:
+            for concurrency in args.concurrency:
+                # one untimed request so startup work is not counted
+                await run_level(http, scenario, 1, 1, args.model)
+                summary = await run_level(http, scenario, concurrency, args.requests, args.model)
+                # memory is only meaningful when the API runs in this process
+                summary["rss_mb"] = None if args.url else rss_mb()
+                results[f"{scenario}@c{concurrency}"] = summary
+    return results
+
+def parse_args(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Load test the API against a fake LLM backend.")
+    parser.add_argument("--url", help="benchmark a running API instead of the in-process app")
+    parser.add_argument("--scenarios", type=lambda value: value.split(","), default=list(SCENARIOS))
+    parser.add_argument("--concurrency", type=lambda value: [int(level) for level in value.split(",")], default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=200, help="requests per scenario and concurrency level")
+    parser.add_argument("--model", default="qwen3:1.7b")
+    parser.add_argument("--ttft", type=float, default=0.05)
+    parser.add_argument("--tps", type=float, default=50.0)
+    parser.add_argument("--tokens", type=int, default=32)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="relative slowdown reported as a regression")
+    return parser.parse_args(argv)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    results = asyncio.run(run(args))
+    print(format_table(results, COLUMNS))
+    print(f"peak rss: {peak_rss_mb()} MiB")
+
+    if args.save_baseline:
+        save_baseline(args.baseline, results)
+        print(f"baseline saved to {args.baseline}")
+        return 0
+    baseline = load_baseline(args.baseline)
+    if baseline is None:
+        print("no baseline yet, run with --save-baseline to record one")
+        return 0
+    regressions = compare(results, baseline, args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
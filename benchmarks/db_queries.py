@@ -0,0 +1,197 @@
+# db_queries.py
+# DBClient query paths and Alembic migrations timed on a LongTermMemory table holding millions of synthetic memories
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from benchmarks.memory_data import KEYWORDS, SOURCE_PREFIX, TAGS, MemoryGenerator, seed_database
+from benchmarks.report import compare, format_table, load_baseline, save_baseline, summarise
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+BACK_PACKAGE_ROOT = PROJECT_ROOT / "src" / "back"
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "baselines" / "db_queries.json"
+
+COLUMNS = ["requests", "p50_ms", "p95_ms", "p99_ms", "throughput"]
+SCENARIOS = [
+    "first_page", "deep_page", "month_window", "author_page", "fulltext", "fulltext_month",
+    "tags", "get_by_ids", "after_id", "compaction_groups", "write_batch",
+]
+# scenarios scanning a large share of the table, run fewer times
+SLOW_SCENARIOS = {"compaction_groups"}
+
+class Scenarios:
+    """One call per scenario, with arguments drawn from the synthetic data set."""
+
+    def __init__(self, db, generator: MemoryGenerator, rng: random.Random, limit: int, max_id: int):
+        self.db = db
+        self.generator = generator
+        self.rng = rng
+        self.limit = limit
+        self.max_id = max_id
+        # generated once, so write_batch times the insert alone
+        self.rows = [generator.memory(rng, generator.end) for _ in range(500)]
+
+    def moment(self) -> datetime:
+        return self.generator.start + timedelta(days=self.rng.random() * self.generator.span_days)
+
+    def month(self):
+        since = self.moment().replace(day=1, hour=0, minute=0, second=0)
+        return since, (since + timedelta(days=32)).replace(day=1)
+
+    def author(self) -> str:
+        # drawn like the data, so popular authors are queried more
+        return self.rng.choices(self.generator.authors, cum_weights=self.generator.author_weights)[0]
+
+    async def first_page(self) -> None:
+        await self.db.read_memories(limit=self.limit)
+
+    async def deep_page(self) -> None:
+        await self.db.read_memories((self.moment(), 0), self.limit)
+
+    async def month_window(self) -> None:
+        since, until = self.month()
+        await self.db.read_memories(limit=self.limit, since=since, until=until)
+
+    async def author_page(self) -> None:
+        await self.db.read_memories((self.moment(), 0), self.limit, author=self.author())
+
+    async def fulltext(self) -> None:
+        await self.db.search_memories_text(self.rng.choice(KEYWORDS), limit=self.limit)
+
+    async def fulltext_month(self) -> None:
+        since, until = self.month()
+        await self.db.search_memories_text(self.rng.choice(KEYWORDS), limit=self.limit, since=since, until=until)
+
+    async def tags(self) -> None:
+        await self.db.search_memories_text(tags=[self.rng.choice(TAGS[:10])], limit=self.limit)
+
+    async def get_by_ids(self) -> None:
+        await self.db.get_memories([self.rng.randint(1, self.max_id) for _ in range(self.limit)])
+
+    async def after_id(self) -> None:
+        await self.db.read_memories_after_id(self.rng.randint(1, self.max_id), 1000)
+
+    async def compaction_groups(self) -> None:
+        await self.db.compaction_groups(self.moment(), "week", 5, 100)
+
+    async def write_batch(self) -> None:
+        await self.db.write_memories(self.rows)
+
+async def time_scenarios(args) -> Dict[str, Dict[str, Any]]:
+    if str(BACK_PACKAGE_ROOT) not in sys.path:
+        sys.path.insert(0, str(BACK_PACKAGE_ROOT))
+    from sqlalchemy import text
+    from db.client import DBClient
+
+    db = DBClient(args.db_url)
+    results: Dict[str, Dict[str, Any]] = {}
+    try:
+        async with db.AsyncSessionLocal() as session:
+            max_id = (await session.execute(text('SELECT max(id) FROM "LongTermMemory"'))).scalar() or 1
+        scenarios = Scenarios(db, MemoryGenerator(args.seed), random.Random(args.seed), args.limit, max_id)
+        for name in args.scenarios:
+            call = getattr(scenarios, name)
+            count = max(args.queries // 20, 3) if name in SLOW_SCENARIOS else args.queries
+            latencies = []
+            started = time.perf_counter()
+            for _ in range(count):
+                began = time.perf_counter()
+                await call()
+                latencies.append(time.perf_counter() - began)
+            results[f"{name}@{args.rows}"] = summarise(latencies, time.perf_counter() - started)
+        async with db.engine.begin() as conn:
+            # write_batch rows are not part of the seeded set
+            await conn.execute(text('DELETE FROM "LongTermMemory" WHERE source LIKE :prefix AND id > :max_id'), {"prefix": SOURCE_PREFIX + "%", "max_id": max_id})
+    finally:
+        await db.close()
+    return results
+
+def time_migrations(db_url: str, target: str, rows: int) -> Dict[str, Dict[str, Any]]:
+    """Downgrade from head to `target` one revision at a time, then upgrade back, timing each step."""
+    if str(PROJECT_ROOT) not in sys.path:
+        # alembic/env.py imports db_models from the project root
+        sys.path.insert(0, str(PROJECT_ROOT))
+    from alembic import command
+    from alembic.config import Config
+    from alembic.script import ScriptDirectory
+
+    config = Config(str(PROJECT_ROOT / "alembic.ini"))
+    config.set_main_option("script_location", str(PROJECT_ROOT / "alembic"))
+    config.set_main_option("sqlalchemy.url", db_url.replace("%", "%%"))
+    steps = list(ScriptDirectory.from_config(config).walk_revisions(target, "head"))
+    steps = [step for step in steps if step.revision != target]
+    results: Dict[str, Dict[str, Any]] = {}
+
+    def timed(name: str, action, revision: str) -> None:
+        started = time.perf_counter()
+        action(config, revision)
+        seconds = time.perf_counter() - started
+        results[f"{name}@{rows}"] = summarise([seconds], seconds)
+
+    for step in steps:
+        timed(f"downgrade_{step.revision}", command.downgrade, step.down_revision)
+    for step in reversed(steps):
+        timed(f"upgrade_{step.revision}", command.upgrade, step.revision)
+    return results
+
+def parse_args(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Benchmark DBClient queries and migrations on millions of synthetic memories.")
+    parser.add_argument("--db-url", default=os.getenv("DB_URL"), help="defaults to DB_URL")
+    parser.add_argument("--rows", type=int, default=5000000, help="synthetic memories in the table, seeded when missing")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="processes seeding the table")
+    parser.add_argument("--scenarios", type=lambda value: value.split(","), default=SCENARIOS)
+    parser.add_argument("--queries", type=int, default=200, help="calls per scenario")
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--migrations", metavar="REVISION", help="also time every migration step between REVISION and head, both ways")
+    parser.add_argument("--cleanup", action="store_true", help="delete the synthetic rows afterwards")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="relative slowdown reported as a regression")
+    return parser.parse_args(argv)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    if not args.db_url:
+        print("set DB_URL or pass --db-url")
+        return 2
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        print(f"unknown scenarios: {', '.join(sorted(unknown))}")
+        return 2
+    seeded = seed_database(args.db_url, args.rows, args.workers, args.seed)
+    if "reused" in seeded:
+        print(f"reusing {seeded['reused']} synthetic rows")
+    else:
+        print(f"seeded {seeded['rows']} rows in {seeded['seconds']} s ({seeded['rows_per_second']} rows/s)")
+    results = asyncio.run(time_scenarios(args))
+    if args.migrations:
+        # alembic runs its own event loop, outside asyncio.run
+        results.update(time_migrations(args.db_url, args.migrations, args.rows))
+    if args.cleanup:
+        from benchmarks.memory_data import delete_rows
+
+        asyncio.run(delete_rows(args.db_url))
+    print(format_table(results, COLUMNS))
+
+    if args.save_baseline:
+        save_baseline(args.baseline, results)
+        print(f"baseline saved to {args.baseline}")
+        return 0
+    baseline = load_baseline(args.baseline)
+    if baseline is None:
+        print("no baseline yet, run with --save-baseline to record one")
+        return 0
+    regressions = compare(results, baseline, args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
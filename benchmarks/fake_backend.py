@@ -0,0 +1,247 @@
+# fake_backend.py
+# Deterministic fake LLM backend, in-process or served over HTTP like Ollama and Groq
+import argparse
+import asyncio
+import json
+import random
+import time
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+DEFAULT_MODELS = ("qwen3:1.7b", "llama-3.3-70b-versatile")
+
+class FakeBackendError(Exception):
+    pass
+
+class FakeLLM:
+    """LLM stand-in with a fixed time to first token, generation speed and error rate.
+
+    It exposes the same methods as the async clients of the API (list_models,
+    chat, chat_stream, ...) and can be assigned to `api.client`. Replies are
+    the persona JSON the cascade expects. Failures are drawn from a seeded
+    generator so two runs with the same settings fail on the same calls.
+    """
+
+    def __init__(self, ttft: float = 0.05, tokens_per_second: float = 50.0, completion_tokens: int = 32, error_rate: float = 0.0, seed: int = 0, models: List[str] = DEFAULT_MODELS):
+        self.ttft = ttft
+        self.tokens_per_second = tokens_per_second
+        self.completion_tokens = completion_tokens
+        self.error_rate = error_rate
+        self.models = list(models)
+        self._random = random.Random(seed)
+        self.calls = 0
+        self.errors = 0
+
+    def tokens(self, messages: List[Dict[str, str]]) -> List[str]:
+        words = (messages[-1].get("content", "") if messages else "").split() or ["..."]
+        body = " ".join(words[i % len(words)] for i in range(max(self.completion_tokens - 8, 1)))
+        reply = json.dumps({"want_to_speak": False, "content": body}, ensure_ascii=False)
+        # split into completion_tokens roughly equal pieces
+        size = max(len(reply) // self.completion_tokens, 1)
+        return [reply[i:i + size] for i in range(0, len(reply), size)]
+
+    def prompt_tokens(self, messages: List[Dict[str, str]]) -> int:
+        return sum(len(m.get("content", "")) for m in messages) // 4 + 4 * len(messages)
+
+    def generation_seconds(self) -> float:
+        return self.completion_tokens / self.tokens_per_second if self.tokens_per_second else 0.0
+
+    async def list_models(self) -> Dict[str, Any]:
+        return {"models": [model_entry(name) for name in self.models]}
+
+    async def pull_model(self, model_name: str) -> None:
+        self._check(model_name)
+
+    async def warm_model(self, model_name: str) -> Dict[str, Any]:
+        self._check(model_name)
+        await asyncio.sleep(self.ttft)
+        return {"model": model_name, "response": "", "done": True}
+
+    async def chat(self, model_name: str, messages: List[Dict[str, str]], options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        self._check(model_name)
+        await asyncio.sleep(self.ttft + self.generation_seconds())
+        pieces = self.tokens(messages)
+        return {
+            "model": model_name,
+            "created_at": now(),
+            "message": {"role": "assistant", "content": "".join(pieces)},
+            "done": True,
+            "done_reason": "stop",
+            "prompt_eval_count": self.prompt_tokens(messages),
+            "eval_count": len(pieces),
+            "load_duration": 0,
+            "prompt_eval_duration": int(self.ttft * 1e9),
+            "eval_duration": int(self.generation_seconds() * 1e9),
+        }
+
+    async def chat_stream(self, model_name: str, messages: List[Dict[str, str]], options: Optional[Dict[str, Any]] = None) -> AsyncIterator[Dict[str, Any]]:
+        self._check(model_name)
+        pieces = self.tokens(messages)
+        delay = 1.0 / self.tokens_per_second if self.tokens_per_second else 0.0
+        await asyncio.sleep(self.ttft)
+        for piece in pieces:
+            yield {"model": model_name, "delta": piece, "done": False}
+            await asyncio.sleep(delay)
+        yield {
+            "model": model_name,
+            "delta": "",
+            "done": True,
+            "finish_reason": "stop",
+            "usage": {"prompt_tokens": self.prompt_tokens(messages), "completion_tokens": len(pieces)},
+        }
+
+    async def close(self) -> None:
+        pass
+
+    def _check(self, model_name: str) -> None:
+        self.calls += 1
+        if self.error_rate and self._random.random() < self.error_rate:
+            self.errors += 1
+            raise FakeBackendError(f"injected failure for {model_name}")
+
+def now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+def model_entry(name: str) -> Dict[str, Any]:
+    return {
+        "name": name,
+        "model": name,
+        "modified_at": "2025-01-01T00:00:00Z",
+        "size": 1_400_000_000,
+        "digest": "0" * 64,
+        "details": {"family": name.split(":")[0].split("-")[0], "format": "gguf"},
+    }
+
+def create_app(fake: FakeLLM):
+    """HTTP app answering the Ollama (/api/...) and Groq (/openai/v1/...) endpoints the clients use.
+
+    Point the API at it with OLLAMA_HOST=http://host:port or
+    GROQ_BASE_URL=http://host:port (any GROQ_API_KEY).
+    """
+    from fastapi import FastAPI, Request
+    from fastapi.responses import JSONResponse, StreamingResponse
+
+    app = FastAPI()
+
+    @app.exception_handler(FakeBackendError)
+    async def backend_error(request: Request, e: FakeBackendError):
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+    @app.get("/api/tags")
+    async def tags():
+        return await fake.list_models()
+
+    @app.get("/api/ps")
+    async def ps():
+        return {"models": []}
+
+    @app.post("/api/pull")
+    async def pull(request: Request):
+        body = await request.json()
+        await fake.pull_model(body.get("model") or body.get("name"))
+        return {"status": "success"}
+
+    @app.post("/api/generate")
+    async def generate(request: Request):
+        body = await request.json()
+        await fake.warm_model(body["model"])
+        return {"model": body["model"], "created_at": now(), "response": "", "done": True, "done_reason": "stop"}
+
+    @app.post("/api/chat")
+    async def ollama_chat(request: Request):
+        body = await request.json()
+        model, messages = body["model"], body.get("messages") or []
+        if not body.get("stream", True):
+            return await fake.chat(model, messages)
+        stream = fake.chat_stream(model, messages)
+        first = await anext(stream)
+
+        async def parts():
+            chunk = first
+            while True:
+                part = {"model": chunk["model"], "created_at": now(), "message": {"role": "assistant", "content": chunk["delta"]}, "done": chunk["done"]}
+                if chunk["done"]:
+                    part.update(done_reason="stop", prompt_eval_count=chunk["usage"]["prompt_tokens"], eval_count=chunk["usage"]["completion_tokens"])
+                yield json.dumps(part) + "\n"
+                try:
+                    chunk = await anext(stream)
+                except StopAsyncIteration:
+                    return
+
+        return StreamingResponse(parts(), media_type="application/x-ndjson")
+
+    @app.get("/openai/v1/models")
+    async def groq_models():
+        return {
+            "object": "list",
+            "data": [{"id": name, "object": "model", "created": 1735689600, "owned_by": "fake", "active": True, "context_window": 131072} for name in fake.models],
+        }
+
+    @app.post("/openai/v1/chat/completions")
+    async def groq_chat(request: Request):
+        body = await request.json()
+        model, messages = body["model"], body.get("messages") or []
+        completion_id = f"chatcmpl-{fake.calls}"
+        if not body.get("stream"):
+            started = time.perf_counter()
+            reply = await fake.chat(model, messages)
+            return {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "message": reply["message"], "finish_reason": "stop", "logprobs": None}],
+                "usage": {
+                    "prompt_tokens": reply["prompt_eval_count"],
+                    "completion_tokens": reply["eval_count"],
+                    "total_tokens": reply["prompt_eval_count"] + reply["eval_count"],
+                    "queue_time": 0.0,
+                    "prompt_time": fake.ttft,
+                    "completion_time": time.perf_counter() - started - fake.ttft,
+                    "total_time": time.perf_counter() - started,
+                },
+            }
+        stream = fake.chat_stream(model, messages)
+        first = await anext(stream)
+
+        async def events():
+            chunk = first
+            while True:
+                event = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": [{"index": 0, "delta": {"content": chunk["delta"]}, "finish_reason": "stop" if chunk["done"] else None}],
+                }
+                if chunk["done"]:
+                    event["x_groq"] = {"id": completion_id, "usage": chunk["usage"]}
+                yield f"data: {json.dumps(event)}\n\n"
+                try:
+                    chunk = await anext(stream)
+                except StopAsyncIteration:
+                    break
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return app
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve a fake Ollama/Groq backend for load tests.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--ttft", type=float, default=0.05, help="seconds before the first token")
+    parser.add_argument("--tps", type=float, default=50.0, help="generated tokens per second")
+    parser.add_argument("--tokens", type=int, default=32, help="completion tokens per reply")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    import uvicorn
+
+    fake = FakeLLM(args.ttft, args.tps, args.tokens, args.error_rate, args.seed)
+    uvicorn.run(create_app(fake), host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
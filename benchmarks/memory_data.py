@@ -0,0 +1,329 @@
+# memory_data.py
+# Synthetic LongTermMemory rows at scale, written as Postgres COPY files or streamed into the table by parallel workers
+import argparse
+import asyncio
+import math
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+BACK_PACKAGE_ROOT = PROJECT_ROOT / "src" / "back"
+# every generated source starts with this, so the rows can be counted and removed
+SOURCE_PREFIX = "synthetic:"
+COLUMNS = ("content", "author", "timestamp", "source", "tags")
+# rows generated together; each chunk has its own seed, so the data does not depend on the worker count
+CHUNK_ROWS = 100000
+
+SUBJECTS = [
+    "Milo", "Aletheia", "le chat du serveur", "une viewer", "le modérateur", "Berlin Est", "la communauté", "mon coloc",
+    "le nouveau", "toute l'équipe", "ma sœur", "le streamer d'en face", "un bot", "personne", "le prof de maths",
+]
+VERBS = [
+    "aime", "raconte", "découvre", "oublie", "dessine", "cuisine", "répare", "chante", "cherche", "critique",
+    "collectionne", "perd encore", "a enfin fini", "veut acheter", "ne supporte plus",
+]
+OBJECTS = [
+    "le thé vert", "une histoire de dragons", "les pizzas froides", "un vieux synthétiseur", "la carte du datalore",
+    "des chatons perdus", "un jeu de rythme", "la lune de Twitch", "un clavier mécanique", "les croissants du matin",
+    "la partie classée", "un mème douteux", "la nouvelle émote", "les règles du salon", "un tournoi de League",
+    "la playlist du soir", "les stickers du serveur", "une capture d'écran", "le planning des lives", "un fanart",
+]
+ENDINGS = [
+    "pendant le live", "avant minuit", "sans prévenir personne", "avec beaucoup de sérieux", "depuis des semaines",
+    "encore une fois", "en vocal", "devant tout le monde", "", "", "",
+]
+SHORT_MESSAGES = ["mdr", "gg", "trop bien", "ptdr", "non ?", "ah ouais", "bien joué", "je valide", "oups", "bonne nuit", "on lance ?", "+1"]
+# keywords present in the generated text, for full-text queries
+KEYWORDS = ["thé", "dragons", "pizza", "synthétiseur", "datalore", "chaton", "rythme", "lune", "clavier", "croissant", "tournoi", "émote", "fanart", "playlist"]
+TAGS = [
+    "gouts", "lore", "stream", "jeux", "musique", "cuisine", "technique", "communaute", "humour", "evenement",
+    "league", "emotes", "regles", "fanart", "planning", "vocal", "memes", "anniversaire", "conseil", "projet",
+]
+SUMMARY_TAGS = ["summary", "conversation", "discord"]
+CHANNELS = ["1202714609396486154", "1202714609396486155", "1202723383897235490", "1211034582671937616", "1230985411876093962"]
+# messages per hour of the day, evenings are busiest
+HOUR_WEIGHTS = [3, 2, 1, 1, 1, 1, 1, 2, 3, 4, 5, 6, 7, 6, 6, 6, 7, 8, 10, 12, 14, 14, 11, 6]
+
+def zipf_cumulative(count: int, exponent: float = 1.1) -> List[float]:
+    """Cumulative weights of a Zipf law: a few values are picked most of the time."""
+    total, cumulative = 0.0, []
+    for rank in range(1, count + 1):
+        total += 1 / rank ** exponent
+        cumulative.append(total)
+    return cumulative
+
+def _cumulative(weights: List[float]) -> List[float]:
+    total, cumulative = 0.0, []
+    for weight in weights:
+        total += weight
+        cumulative.append(total)
+    return cumulative
+
+class MemoryGenerator:
+    """Deterministic synthetic memories between `start` and `end`.
+
+    Activity grows linearly over the period and peaks in the evening.
+    Authors and tags follow Zipf laws. Most rows are chat messages of one
+    or two sentences; one in twenty is a longer conversation summary by
+    Aletheia. Chunk `index` of a `total` row data set always holds the
+    same rows, sorted by timestamp, whatever process generates it.
+    """
+
+    def __init__(self, seed: int = 0, start: Optional[datetime] = None, end: Optional[datetime] = None, authors: int = 300):
+        self.seed = seed
+        self.end = end or datetime.now().replace(microsecond=0)
+        self.start = start or self.end - timedelta(days=3 * 365)
+        self.span_days = (self.end - self.start).total_seconds() / 86400
+        rng = random.Random(seed)
+        self.authors = [str(rng.randrange(10 ** 17, 10 ** 18)) for _ in range(authors)]
+        self.author_weights = zipf_cumulative(authors)
+        self.tag_weights = zipf_cumulative(len(TAGS))
+        self.hour_weights = _cumulative(HOUR_WEIGHTS)
+        self.sources = [f"{SOURCE_PREFIX}discord:{channel}" for channel in CHANNELS] + [f"{SOURCE_PREFIX}twitch:aletheia_vtuber", f"{SOURCE_PREFIX}youtube:aletheia"]
+        self.source_weights = _cumulative([40, 20, 10, 6, 4, 15, 5])
+
+    def sentence(self, rng: random.Random) -> str:
+        return f"{rng.choice(SUBJECTS)} {rng.choice(VERBS)} {rng.choice(OBJECTS)} {rng.choice(ENDINGS)}".strip() + "."
+
+    def memory(self, rng: random.Random, timestamp: datetime) -> Dict[str, Any]:
+        kind = rng.random()
+        if kind < 0.05:
+            count = rng.randint(3, 6)
+            content = "Résumé de la conversation : " + " ".join(self.sentence(rng) for _ in range(count))
+            return {"content": content, "author": "aletheia", "timestamp": timestamp, "source": f"{SOURCE_PREFIX}Discord Conversation {rng.randrange(1000)}", "tags": list(SUMMARY_TAGS)}
+        if kind < 0.3:
+            content = rng.choice(SHORT_MESSAGES)
+        else:
+            content = " ".join(self.sentence(rng) for _ in range(1 if kind < 0.8 else 2))
+        tag_count = rng.choices((0, 1, 2, 3), cum_weights=(50, 80, 95, 100))[0]
+        tags = sorted(set(rng.choices(TAGS, cum_weights=self.tag_weights, k=tag_count))) or None
+        return {
+            "content": content,
+            "author": rng.choices(self.authors, cum_weights=self.author_weights)[0],
+            "timestamp": timestamp,
+            "source": rng.choices(self.sources, cum_weights=self.source_weights)[0],
+            "tags": tags,
+        }
+
+    def chunk(self, index: int, total: int) -> List[Dict[str, Any]]:
+        first = index * CHUNK_ROWS
+        count = min(CHUNK_ROWS, total - first)
+        rng = random.Random(f"{self.seed}:{index}")
+        rows = []
+        for _ in range(count):
+            # with linear growth, the share of rows before day d grows like d squared
+            fraction = (first + rng.random() * count) / total
+            day = self.start + timedelta(days=int(self.span_days * math.sqrt(fraction)))
+            second = rng.choices(range(24), cum_weights=self.hour_weights)[0] * 3600 + rng.randrange(3600)
+            rows.append(self.memory(rng, min(day + timedelta(seconds=second), self.end)))
+        rows.sort(key=lambda row: row["timestamp"])
+        return rows
+
+def chunk_count(total: int) -> int:
+    return (total + CHUNK_ROWS - 1) // CHUNK_ROWS
+
+_COPY_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+
+def copy_field(value: Any) -> str:
+    """One field in the COPY text format."""
+    if value is None:
+        return "\\N"
+    if isinstance(value, datetime):
+        return value.isoformat(" ")
+    if isinstance(value, list):
+        value = "{" + ",".join('"' + item.replace("\\", "\\\\").replace('"', '\\"') + '"' for item in value) + "}"
+    return str(value).translate(_COPY_ESCAPES)
+
+def copy_text(rows: List[Dict[str, Any]]) -> str:
+    return "".join("\t".join(copy_field(row[column]) for column in COLUMNS) + "\n" for row in rows)
+
+def asyncpg_dsn(db_url: str) -> str:
+    """The SQLAlchemy URL the app uses, as a plain asyncpg DSN."""
+    return db_url.replace("postgresql+asyncpg://", "postgresql://", 1)
+
+def shard_chunks(total: int, shards: int) -> List[Tuple[int, int]]:
+    """Contiguous [first, last) chunk ranges, one per worker."""
+    chunks = chunk_count(total)
+    size = math.ceil(chunks / max(shards, 1))
+    return [(first, min(first + size, chunks)) for first in range(0, chunks, size)]
+
+def write_shard(settings: Dict[str, Any], shard: int, chunks: Tuple[int, int]) -> Tuple[int, int]:
+    """Write chunks to memories_<shard>.copy; returns (rows, bytes)."""
+    generator = MemoryGenerator(settings["seed"], settings["start"], settings["end"])
+    path = Path(settings["out"]) / f"memories_{shard:03d}.copy"
+    rows = written = 0
+    with open(path, "w", encoding="utf-8") as handle:
+        for index in range(*chunks):
+            chunk = generator.chunk(index, settings["rows"])
+            text = copy_text(chunk)
+            handle.write(text)
+            rows += len(chunk)
+            written += len(text.encode("utf-8"))
+    return rows, written
+
+def stream_shard(settings: Dict[str, Any], shard: int, chunks: Tuple[int, int]) -> Tuple[int, int]:
+    """COPY generated chunks straight into LongTermMemory over one connection; returns (rows, bytes)."""
+    generator = MemoryGenerator(settings["seed"], settings["start"], settings["end"])
+    counts = [0, 0]
+
+    async def source():
+        for index in range(*chunks):
+            chunk = generator.chunk(index, settings["rows"])
+            data = copy_text(chunk).encode("utf-8")
+            counts[0] += len(chunk)
+            counts[1] += len(data)
+            yield data
+
+    return _copy_into_table(settings["db_url"], source(), counts)
+
+def load_file(settings: Dict[str, Any], shard: int, path: str) -> Tuple[int, int]:
+    """COPY one file written by write_shard into LongTermMemory; returns (rows, bytes)."""
+    rows = sum(1 for _ in open(path, "rb"))
+    return _copy_into_table(settings["db_url"], path, [rows, os.path.getsize(path)])
+
+def _copy_into_table(db_url: str, source: Any, counts: List[int]) -> Tuple[int, int]:
+    import asyncpg
+
+    async def run():
+        connection = await asyncpg.connect(asyncpg_dsn(db_url))
+        try:
+            await connection.copy_to_table("LongTermMemory", source=source, columns=list(COLUMNS), format="text")
+        finally:
+            await connection.close()
+
+    asyncio.run(run())
+    return counts[0], counts[1]
+
+def run_workers(function, settings: Dict[str, Any], jobs: List[Any]) -> Dict[str, Any]:
+    """Run function(settings, shard, job) for each job in worker processes and time the whole."""
+    started = time.perf_counter()
+    if len(jobs) == 1:
+        results = [function(settings, 0, jobs[0])]
+    else:
+        with ProcessPoolExecutor(max_workers=settings["workers"]) as pool:
+            results = list(pool.map(function, [settings] * len(jobs), range(len(jobs)), jobs))
+    seconds = time.perf_counter() - started
+    rows = sum(result[0] for result in results)
+    written = sum(result[1] for result in results)
+    return {
+        "rows": rows,
+        "seconds": round(seconds, 2),
+        "rows_per_second": round(rows / seconds) if seconds else None,
+        "mb_per_second": round(written / 2 ** 20 / seconds, 1) if seconds else None,
+    }
+
+async def prepare_table(db_url: str, start: datetime, end: datetime) -> None:
+    """Create the monthly partitions the rows will land in, when LongTermMemory is partitioned."""
+    if str(BACK_PACKAGE_ROOT) not in sys.path:
+        sys.path.insert(0, str(BACK_PACKAGE_ROOT))
+    from sqlalchemy import text
+    from db.client import DBClient, add_months
+
+    db = DBClient(db_url)
+    try:
+        async with db.AsyncSessionLocal() as session:
+            kind = (await session.execute(text("""SELECT relkind FROM pg_class WHERE oid = '"LongTermMemory"'::regclass"""))).scalar()
+        if kind != "p":
+            return
+        month = date(start.year, start.month, 1)
+        while month <= end.date():
+            await db.create_memory_partition(month)
+            month = add_months(month, 1)
+    finally:
+        await db.close()
+
+async def count_rows(db_url: str) -> int:
+    import asyncpg
+
+    connection = await asyncpg.connect(asyncpg_dsn(db_url))
+    try:
+        return await connection.fetchval('SELECT COUNT(*) FROM "LongTermMemory" WHERE source LIKE $1', SOURCE_PREFIX + "%")
+    finally:
+        await connection.close()
+
+async def delete_rows(db_url: str) -> int:
+    import asyncpg
+
+    connection = await asyncpg.connect(asyncpg_dsn(db_url))
+    try:
+        status = await connection.execute('DELETE FROM "LongTermMemory" WHERE source LIKE $1', SOURCE_PREFIX + "%")
+        await connection.execute('ANALYZE "LongTermMemory"')
+        return int(status.split()[-1])
+    finally:
+        await connection.close()
+
+async def analyze(db_url: str) -> None:
+    import asyncpg
+
+    connection = await asyncpg.connect(asyncpg_dsn(db_url))
+    try:
+        await connection.execute('ANALYZE "LongTermMemory"')
+    finally:
+        await connection.close()
+
+def seed_database(db_url: str, rows: int, workers: int = 4, seed: int = 0, start: Optional[datetime] = None, end: Optional[datetime] = None) -> Dict[str, Any]:
+    """Make LongTermMemory hold exactly `rows` synthetic memories, reusing them when already there."""
+    generator = MemoryGenerator(seed, start, end)
+    existing = asyncio.run(count_rows(db_url))
+    if existing == rows:
+        return {"rows": 0, "reused": existing}
+    if existing:
+        asyncio.run(delete_rows(db_url))
+    asyncio.run(prepare_table(db_url, generator.start, generator.end))
+    settings = {"db_url": db_url, "rows": rows, "seed": seed, "start": generator.start, "end": generator.end, "workers": workers}
+    report = run_workers(stream_shard, settings, shard_chunks(rows, workers))
+    asyncio.run(analyze(db_url))
+    return report
+
+def parse_args(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Generate synthetic LongTermMemory rows as COPY files or straight into Postgres.")
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--days", type=int, default=3 * 365, help="period covered, ending now")
+    parser.add_argument("--out", type=Path, help="write memories_<n>.copy files in this directory")
+    parser.add_argument("--load", type=Path, help="COPY the files of this directory into the database")
+    parser.add_argument("--db-url", default=os.getenv("DB_URL"), help="stream the rows into this database, defaults to DB_URL")
+    parser.add_argument("--cleanup", action="store_true", help="delete the synthetic rows and exit")
+    return parser.parse_args(argv)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    end = datetime.now().replace(microsecond=0)
+    start = end - timedelta(days=args.days)
+    settings = {"rows": args.rows, "seed": args.seed, "start": start, "end": end, "workers": args.workers, "db_url": args.db_url}
+    if args.out:
+        args.out.mkdir(parents=True, exist_ok=True)
+        settings["out"] = str(args.out)
+        report = run_workers(write_shard, settings, shard_chunks(args.rows, args.workers))
+        print(f"wrote {report['rows']} rows to {args.out} in {report['seconds']} s: {report['rows_per_second']} rows/s, {report['mb_per_second']} MiB/s")
+        return 0
+    if not args.db_url:
+        print("pass --out, or --db-url (or DB_URL) to load into Postgres")
+        return 2
+    if args.cleanup:
+        print(f"deleted {asyncio.run(delete_rows(args.db_url))} synthetic rows")
+        return 0
+    if args.load:
+        files = sorted(str(path) for path in args.load.glob("memories_*.copy"))
+        if not files:
+            print(f"no memories_*.copy files in {args.load}")
+            return 2
+        # the files do not say which period they cover; partitions follow --days
+        asyncio.run(prepare_table(args.db_url, start, end))
+        report = run_workers(load_file, settings, files)
+    else:
+        asyncio.run(prepare_table(args.db_url, start, end))
+        report = run_workers(stream_shard, settings, shard_chunks(args.rows, args.workers))
+    asyncio.run(analyze(args.db_url))
+    print(f"loaded {report['rows']} rows in {report['seconds']} s: {report['rows_per_second']} rows/s, {report['mb_per_second']} MiB/s")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
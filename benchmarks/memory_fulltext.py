@@ -0,0 +1,130 @@
+# memory_fulltext.py
+# Keyword and tag search latency on a seeded LongTermMemory table, against a plain ILIKE scan
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from benchmarks.memory_data import KEYWORDS, TAGS, seed_database
+from benchmarks.report import compare, format_table, load_baseline, save_baseline, summarise
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+BACK_PACKAGE_ROOT = PROJECT_ROOT / "src" / "back"
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "baselines" / "memory_fulltext.json"
+
+COLUMNS = ["requests", "p50_ms", "p95_ms", "p99_ms", "plan"]
+
+def scenario_arguments(name: str, rng: random.Random) -> Dict[str, Any]:
+    if name == "keyword":
+        return {"query": rng.choice(KEYWORDS)}
+    if name == "two_keywords":
+        return {"query": " ".join(rng.sample(KEYWORDS, 2)) if rng.random() < 0.5 else f"{rng.choice(KEYWORDS)} or {rng.choice(KEYWORDS)}"}
+    if name == "tags":
+        return {"tags": rng.sample(TAGS, rng.randint(1, 2))}
+    if name == "keyword_and_tag":
+        return {"query": rng.choice(KEYWORDS), "tags": [rng.choice(TAGS)]}
+    raise ValueError(f"Unknown scenario: {name}")
+
+async def ilike_scan(db, keyword: str, limit: int) -> None:
+    """What a keyword lookup costs without the full-text index."""
+    from sqlalchemy import text
+
+    async with db.AsyncSessionLocal() as session:
+        command = text('SELECT id FROM "LongTermMemory" WHERE content ILIKE :pattern ORDER BY timestamp DESC LIMIT :limit')
+        await session.execute(command, {"pattern": f"%{keyword}%", "limit": limit})
+
+async def top_plan_node(db, arguments: Dict[str, Any], limit: int) -> str:
+    """The scan the planner picked for a search, to check the GIN indexes are used."""
+    from sqlalchemy import text
+    from db.client import fulltext_query
+
+    command, params = fulltext_query(limit=limit, **arguments)
+    async with db.AsyncSessionLocal() as session:
+        plan = (await session.execute(text(f"EXPLAIN {command}"), params)).scalars().all()
+    scans = [line.strip().lstrip("-> ").split("  ")[0] for line in plan if "Scan" in line]
+    return scans[-1] if scans else plan[0]
+
+async def run(args) -> Dict[str, Dict[str, Any]]:
+    if str(BACK_PACKAGE_ROOT) not in sys.path:
+        sys.path.insert(0, str(BACK_PACKAGE_ROOT))
+    from db.client import DBClient
+
+    db = DBClient(args.db_url)
+    results: Dict[str, Dict[str, Any]] = {}
+    try:
+        rng = random.Random(args.seed)
+        for name in args.scenarios:
+            latencies = []
+            started = time.perf_counter()
+            for _ in range(args.queries):
+                arguments = scenario_arguments(name, rng)
+                began = time.perf_counter()
+                await db.search_memories_text(limit=args.limit, **arguments)
+                latencies.append(time.perf_counter() - began)
+            summary = summarise(latencies, time.perf_counter() - started)
+            summary["plan"] = await top_plan_node(db, scenario_arguments(name, rng), args.limit)
+            results[f"{name}@{args.rows}"] = summary
+        if args.scan_queries:
+            latencies = []
+            started = time.perf_counter()
+            for _ in range(args.scan_queries):
+                began = time.perf_counter()
+                await ilike_scan(db, rng.choice(KEYWORDS), args.limit)
+                latencies.append(time.perf_counter() - began)
+            results[f"ilike_scan@{args.rows}"] = {**summarise(latencies, time.perf_counter() - started), "plan": "no full-text index"}
+    finally:
+        await db.close()
+    return results
+
+def parse_args(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Benchmark full-text and tag search on a seeded LongTermMemory table.")
+    parser.add_argument("--db-url", default=os.getenv("DB_URL"), help="defaults to DB_URL")
+    parser.add_argument("--rows", type=int, default=1000000, help="synthetic memories to search, seeded when missing")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="processes seeding the table")
+    parser.add_argument("--scenarios", type=lambda value: value.split(","), default=["keyword", "two_keywords", "tags", "keyword_and_tag"])
+    parser.add_argument("--queries", type=int, default=200, help="queries per scenario")
+    parser.add_argument("--scan-queries", type=int, default=10, help="ILIKE queries run for comparison, 0 to skip")
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--cleanup", action="store_true", help="delete the synthetic rows afterwards")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="relative slowdown reported as a regression")
+    return parser.parse_args(argv)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    if not args.db_url:
+        print("set DB_URL or pass --db-url")
+        return 2
+    seeded = seed_database(args.db_url, args.rows, args.workers, args.seed)
+    if "reused" in seeded:
+        print(f"reusing {seeded['reused']} synthetic rows")
+    else:
+        print(f"seeded {seeded['rows']} rows in {seeded['seconds']} s ({seeded['rows_per_second']} rows/s)")
+    results = asyncio.run(run(args))
+    if args.cleanup:
+        from benchmarks.memory_data import delete_rows
+
+        asyncio.run(delete_rows(args.db_url))
+    print(format_table(results, COLUMNS))
+
+    if args.save_baseline:
+        save_baseline(args.baseline, results)
+        print(f"baseline saved to {args.baseline}")
+        return 0
+    baseline = load_baseline(args.baseline)
+    if baseline is None:
+        print("no baseline yet, run with --save-baseline to record one")
+        return 0
+    regressions = compare(results, baseline, args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
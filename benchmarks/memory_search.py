@@ -0,0 +1,108 @@
+# memory_search.py
+# Search latency and recall of the memory vector index, exact and IVF, on synthetic vectors
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from benchmarks.report import compare, format_table, load_baseline, peak_rss_mb, save_baseline, summarise
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+BACK_PACKAGE_ROOT = PROJECT_ROOT / "src" / "back"
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "baselines" / "memory_search.json"
+
+COLUMNS = ["requests", "p50_ms", "p95_ms", "p99_ms", "recall_at_k", "build_s"]
+
+def clustered_vectors(rows: int, dim: int, clusters: int, seed: int) -> np.ndarray:
+    """Vectors around random topics, closer to real embeddings than uniform noise."""
+    rng = np.random.default_rng(seed)
+    topics = rng.standard_normal((clusters, dim)).astype(np.float32)
+    vectors = np.empty((rows, dim), dtype=np.float32)
+    for start in range(0, rows, 100000):
+        count = min(100000, rows - start)
+        vectors[start:start + count] = topics[rng.integers(clusters, size=count)] + 0.6 * rng.standard_normal((count, dim)).astype(np.float32)
+    return vectors
+
+def timed_searches(index, queries: np.ndarray, k: int) -> Dict[str, Any]:
+    latencies: List[float] = []
+    results = []
+    started = time.perf_counter()
+    for query in queries:
+        began = time.perf_counter()
+        results.append([memory_id for memory_id, _ in index.search(query, k)])
+        latencies.append(time.perf_counter() - began)
+    summary = summarise(latencies, time.perf_counter() - started)
+    summary["results"] = results
+    return summary
+
+def run(args) -> Dict[str, Dict[str, Any]]:
+    if str(BACK_PACKAGE_ROOT) not in sys.path:
+        sys.path.insert(0, str(BACK_PACKAGE_ROOT))
+    from search.vector_index import VectorIndex
+
+    vectors = clustered_vectors(args.rows, args.dim, args.topics, args.seed)
+    queries = clustered_vectors(args.queries, args.dim, args.topics, args.seed)
+    results: Dict[str, Dict[str, Any]] = {}
+    with tempfile.TemporaryDirectory() as directory:
+        index = VectorIndex(Path(directory), "benchmark", nprobe=args.nprobe)
+        started = time.perf_counter()
+        for start in range(0, args.rows, args.batch):
+            index.add(np.arange(start + 1, min(start + args.batch, args.rows) + 1), vectors[start:start + args.batch])
+        build = time.perf_counter() - started
+        del vectors
+
+        exact = timed_searches(index, queries, args.k)
+        truth = exact.pop("results")
+        results[f"exact@{args.rows}"] = {**exact, "recall_at_k": 1.0, "build_s": round(build, 2)}
+
+        if args.nlist:
+            started = time.perf_counter()
+            index.train(args.nlist)
+            train = time.perf_counter() - started
+            ivf = timed_searches(index, queries, args.k)
+            found = ivf.pop("results")
+            recall = np.mean([len(set(a) & set(b)) / args.k for a, b in zip(found, truth)])
+            results[f"ivf{args.nlist}/{args.nprobe}@{args.rows}"] = {**ivf, "recall_at_k": round(float(recall), 3), "build_s": round(train, 2)}
+    return results
+
+def parse_args(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Benchmark memory vector search on synthetic embeddings.")
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--topics", type=int, default=2000, help="clusters the synthetic vectors are drawn around")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nlist", type=int, default=1024, help="IVF lists, 0 to only measure exact search")
+    parser.add_argument("--nprobe", type=int, default=16)
+    parser.add_argument("--batch", type=int, default=10000, help="rows per add(), like successive syncs")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="relative slowdown reported as a regression")
+    return parser.parse_args(argv)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    results = run(args)
+    print(format_table(results, COLUMNS))
+    print(f"peak rss: {peak_rss_mb()} MiB")
+
+    if args.save_baseline:
+        save_baseline(args.baseline, results)
+        print(f"baseline saved to {args.baseline}")
+        return 0
+    baseline = load_baseline(args.baseline)
+    if baseline is None:
+        print("no baseline yet, run with --save-baseline to record one")
+        return 0
+    regressions = compare(results, baseline, args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+# report.py
+# Latency summaries, memory readings and baseline comparison shared by the benchmarks
+import json
+import math
+import os
+import resource
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+def percentile(samples: List[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile, q in [0, 100]."""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    rank = max(math.ceil(q / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+def summarise(latencies: List[float], seconds: float, errors: int = 0) -> Dict[str, Any]:
+    """Throughput and latency percentiles (milliseconds) of one benchmark run."""
+    total = len(latencies) + errors
+    return {
+        "requests": total,
+        "errors": errors,
+        "seconds": round(seconds, 4),
+        "throughput": round(total / seconds, 2) if seconds else None,
+        "p50_ms": _ms(percentile(latencies, 50)),
+        "p95_ms": _ms(percentile(latencies, 95)),
+        "p99_ms": _ms(percentile(latencies, 99)),
+        "max_ms": _ms(max(latencies) if latencies else None),
+    }
+
+def rss_mb() -> Optional[float]:
+    """Current resident memory of this process, in MiB."""
+    try:
+        with open("/proc/self/statm") as statm:
+            pages = int(statm.read().split()[1])
+        return round(pages * os.sysconf("SC_PAGE_SIZE") / 2 ** 20, 1)
+    except (OSError, ValueError):
+        return None
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return round(peak / (2 ** 20 if sys.platform == "darwin" else 2 ** 10), 1)
+
+def load_baseline(path: Path) -> Optional[Dict[str, Any]]:
+    if not path.exists():
+        return None
+    return json.loads(path.read_text(encoding="utf-8"))
+
+def save_baseline(path: Path, results: Dict[str, Any]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(results, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+
+# Regressions are checked on these fields: higher is worse, except throughput
+LOWER_IS_BETTER = ("p50_ms", "p95_ms", "p99_ms", "errors")
+HIGHER_IS_BETTER = ("throughput",)
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]], tolerance: float = 0.2, min_delta_ms: float = 1.0) -> List[str]:
+    """Describe every metric more than `tolerance` worse than in the baseline.
+
+    Both arguments map a run name (e.g. "chat@c8") to its summary. Latency
+    changes under `min_delta_ms` are scheduling noise and never reported.
+    """
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        for field in LOWER_IS_BETTER + HIGHER_IS_BETTER:
+            old, new = previous.get(field), current.get(field)
+            if old is None or new is None:
+                continue
+            if field in HIGHER_IS_BETTER:
+                worse = new < old * (1 - tolerance)
+            elif field == "errors":
+                worse = new > old
+            else:
+                worse = new > old * (1 + tolerance) and new - old >= min_delta_ms
+            if worse:
+                regressions.append(f"{name} {field}: {old} -> {new}")
+    return regressions
+
+def format_table(results: Dict[str, Dict[str, Any]], columns: List[str]) -> str:
+    rows = [["run"] + columns]
+    for name, summary in results.items():
+        rows.append([name] + ["-" if summary.get(column) is None else str(summary[column]) for column in columns])
+    widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+    return "\n".join("  ".join(cell.ljust(width) for cell, width in zip(row, widths)) for row in rows)
+
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    return None if seconds is None else round(seconds * 1000, 2)
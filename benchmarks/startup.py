@@ -0,0 +1,108 @@
+# startup.py
+# Cold start benchmark: import, lifespan and first /health, each in a fresh interpreter
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from benchmarks.report import compare, format_table, load_baseline, save_baseline, summarise
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+BACK_PACKAGE_ROOT = PROJECT_ROOT / "src" / "back"
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "baselines" / "startup.json"
+
+PHASES = ("import", "lifespan", "first_health", "total")
+COLUMNS = ["requests", "p50_ms", "p95_ms", "max_ms"]
+# importing the API must not load these; lifespan loads the configured backend's SDK only
+HEAVY_MODULES = ("ollama", "groq", "sqlalchemy", "asyncpg")
+
+async def probe() -> Dict[str, Any]:
+    """Start the API once in this process and time each phase, in seconds."""
+    started = time.perf_counter()
+    sys.path.insert(0, str(BACK_PACKAGE_ROOT))
+    import api
+    imported = time.perf_counter()
+    heavy = [name for name in HEAVY_MODULES if name in sys.modules]
+
+    import httpx
+    async with api.lifespan(api.app):
+        lifespan = time.perf_counter()
+        transport = httpx.ASGITransport(app=api.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://api") as http:
+            response = await http.get("/health")
+        health = time.perf_counter()
+    return {
+        "import": imported - started,
+        "lifespan": lifespan - imported,
+        "first_health": health - lifespan,
+        "total": health - started,
+        "status": response.status_code,
+        "heavy_modules": heavy,
+    }
+
+def run_probe(env: Dict[str, str]) -> Dict[str, Any]:
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.startup", "--probe"],
+        cwd=PROJECT_ROOT, env=env, capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def run(runs: int) -> Dict[str, Any]:
+    env = dict(os.environ)
+    # no backend is listening: startup must not wait for one
+    env.setdefault("OLLAMA_HOST", "http://127.0.0.1:9")
+    samples: Dict[str, List[float]] = {phase: [] for phase in PHASES}
+    heavy: List[str] = []
+    errors = 0
+    for _ in range(runs):
+        result = run_probe(env)
+        if result["status"] != 200:
+            errors += 1
+            continue
+        for phase in PHASES:
+            samples[phase].append(result[phase])
+        heavy = sorted(set(heavy) | set(result["heavy_modules"]))
+    results = {phase: summarise(samples[phase], 0, errors) for phase in PHASES}
+    return {"results": results, "heavy_modules": heavy}
+
+def parse_args(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Measure how fast the API starts and answers /health.")
+    parser.add_argument("--runs", type=int, default=10, help="fresh interpreters to start")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="relative slowdown reported as a regression")
+    parser.add_argument("--probe", action="store_true", help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    if args.probe:
+        print(json.dumps(asyncio.run(probe())))
+        return 0
+
+    measured = run(args.runs)
+    results = measured["results"]
+    print(format_table(results, COLUMNS))
+    if measured["heavy_modules"]:
+        print(f"loaded by importing the API: {', '.join(measured['heavy_modules'])}")
+
+    if args.save_baseline:
+        save_baseline(args.baseline, results)
+        print(f"baseline saved to {args.baseline}")
+        return 0
+    baseline = load_baseline(args.baseline)
+    if baseline is None:
+        print("no baseline yet, run with --save-baseline to record one")
+        return 0
+    regressions = compare(results, baseline, args.tolerance, min_delta_ms=5.0)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
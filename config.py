@@ -14,4 +14,11 @@ class Config:
     GUILD_ID = int(os.getenv("DISCORD_GUILD_ID"))  # à configurer dans .env
 
     # Préfixe des commandes
-    COMMAND_PREFIX = os.getenv("COMMAND_PREFIX", "!")
\ No newline at end of file
+    COMMAND_PREFIX = os.getenv("COMMAND_PREFIX", "!")
+
+    # API du backend utilisée par le cog Aletheia
+    ALETHEIA_API_URL = os.getenv("ALETHEIA_API_URL", "http://127.0.0.1:8000")
+    ALETHEIA_API_TIMEOUT = float(os.getenv("ALETHEIA_API_TIMEOUT", "120"))  # secondes par appel, réessais compris
+    ALETHEIA_API_RETRIES = int(os.getenv("ALETHEIA_API_RETRIES", "2"))
+    ALETHEIA_API_CONNECTIONS = int(os.getenv("ALETHEIA_API_CONNECTIONS", "10"))  # connexions gardées ouvertes
+    ALETHEIA_PROMPT_NAME = os.getenv("ALETHEIA_PROMPT_NAME", "aletheia")  # toujours la dernière version
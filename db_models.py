@@ -3,7 +3,8 @@
 # used for Alembic autogeneration support and model metadata declaration
 #
 
-from sqlalchemy import Column, Integer, String, Text, DateTime, ARRAY, func, MetaData, PrimaryKeyConstraint
+from sqlalchemy import Column, Integer, String, Text, DateTime, ARRAY, func, MetaData, PrimaryKeyConstraint, UniqueConstraint, Index, Computed
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.orm import DeclarativeBase
 
 class Base(DeclarativeBase):
@@ -16,12 +17,50 @@ class Base(DeclarativeBase):
     })
 
 
+# Range-partitioned by month on timestamp; the partitions are managed by src/back/db/partitions.py
 class LongTermMemory(Base):
     __tablename__ = 'LongTermMemory'
+    __table_args__ = (
+        Index('ix_LongTermMemory_timestamp_id', 'timestamp', 'id'),
+        Index('ix_LongTermMemory_content_tsv', 'content_tsv', postgresql_using='gin'),
+        Index('ix_LongTermMemory_tags', 'tags', postgresql_using='gin'),
+        # unique indexes of a partitioned table must contain the partition key
+        Index('ix_LongTermMemory_import_key', 'import_key', 'timestamp', unique=True),
+        {'postgresql_partition_by': 'RANGE (timestamp)'},
+    )
 
-    id = Column(Integer, primary_key=True, index=True, unique=True)
+    id = Column(Integer, primary_key=True)
     content = Column(Text, nullable=False)
     author = Column(String(255), nullable=False)
-    timestamp = Column(DateTime, nullable=False, server_default=func.now())
+    timestamp = Column(DateTime, primary_key=True, nullable=False, server_default=func.now())
     source = Column(String(255), nullable=True)
     tags = Column(ARRAY(String(50)), nullable=True)
+    content_tsv = Column(TSVECTOR, Computed("to_tsvector('french', content)", persisted=True))
+    # set on summary memories: how many memories the summary replaced
+    compacted_from = Column(Integer, nullable=True)
+    # set on memories imported from a channel export, re-imports skip existing keys
+    import_key = Column(String(40), nullable=True)
+
+
+class LongTermMemoryArchive(Base):
+    __tablename__ = 'LongTermMemoryArchive'
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    content = Column(Text, nullable=False)
+    author = Column(String(255), nullable=False)
+    timestamp = Column(DateTime, nullable=False)
+    source = Column(String(255), nullable=True)
+    tags = Column(ARRAY(String(50)), nullable=True)
+    summary_id = Column(Integer, nullable=False, index=True)
+    archived_at = Column(DateTime, nullable=False, server_default=func.now())
+
+
+class SystemPrompt(Base):
+    __tablename__ = 'SystemPrompt'
+    __table_args__ = (UniqueConstraint('name', 'version', name='uq_SystemPrompt_name_version'),)
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String(100), nullable=False)
+    version = Column(Integer, nullable=False)
+    content = Column(Text, nullable=False)
+    created_at = Column(DateTime, nullable=False, server_default=func.now())
@@ -1,45 +1,643 @@
 # api.py
 # FastAPI application for Ollama model interactions
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-from typing import List, Dict, Any, Optional
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic import BaseModel, ValidationError
+from typing import List, Dict, Any, Optional, Tuple
+import asyncio
+import hashlib
+import json
+import logging
 import os
+import time
+from contextvars import ContextVar
+from datetime import datetime, timedelta
 from dotenv import load_dotenv
-from contextlib import asynccontextmanager
-from ollama_interface.client import OllamaClient
-from groq_interface.client import GroqClient
-from db.client import DBClient
+from contextlib import AsyncExitStack, asynccontextmanager
+from db.client import DBClient, DEFAULT_PROMPT_NAME, MemoryBufferFull, MemoryWriter, decode_memory_cursor, encode_memory_cursor
+from db.compaction import CompactionRunning, MemoryCompactor
+from db.partitions import PartitionMaintainer
+from db.prompt_store import SystemPromptStore, PromptNotFound
+from cache.response_cache import ResponseCache
+from ingest.channel_export import export_source, import_records
+from ingest.json_stream import aiter_json_array
+from concurrency.calls import call_client, stream_client, close_client
+from concurrency.singleflight import SingleFlight
+from concurrency.admission import AdmissionController, AdmissionRejected, PRIORITIES
+from routing.router import BackendRouter
+from routing.cascade import ModelCascade, CascadeTier
+from routing.structured import early_abort_chat
+from warm_pool.pool import WarmPool
+from catalog.model_catalog import ModelCatalog
+from context.budget import ContextBudget
+from routing.responses import response_to_dict, response_timings, response_usage
+from metrics.registry import Registry
+from metrics.middleware import MetricsMiddleware
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # Create a factory function to get the appropriate client
-def get_client(client_type: str = "ollama"):
+# mode "async" returns a pooled async client, "sync" keeps the blocking clients
+# that run in the Starlette threadpool
+# "router" combines the backends listed in ROUTER_BACKENDS
+# SDKs are imported here so only the selected backends are loaded
+def get_client(client_type: str = "ollama", mode: str = "async"):
+    if mode.lower() not in ("async", "sync"):
+        raise ValueError(f"Unknown client mode: {mode}")
+    use_async = mode.lower() == "async"
     if client_type.lower() == "ollama":
-        return OllamaClient()
+        from ollama_interface.client import OllamaClient, AsyncOllamaClient
+        host = os.getenv("OLLAMA_HOST", "http://localhost:11434")
+        return AsyncOllamaClient(host) if use_async else OllamaClient(host)
     elif client_type.lower() == "groq":
-        return GroqClient(os.getenv('GROQ_API_KEY', None))
+        from groq_interface.client import GroqClient, AsyncGroqClient
+        api_key = os.getenv('GROQ_API_KEY', None)
+        return AsyncGroqClient(api_key) if use_async else GroqClient(api_key)
+    elif client_type.lower() == "router":
+        names = [name.strip() for name in os.getenv("ROUTER_BACKENDS", "ollama,groq").split(",") if name.strip()]
+        if "router" in names:
+            raise ValueError("ROUTER_BACKENDS can not contain the router itself")
+        return BackendRouter(
+            [(name, get_client(name, mode)) for name in names],
+            model_map=json.loads(os.getenv("ROUTER_MODEL_MAP", "{}")),
+            timeout=float(os.getenv("ROUTER_TIMEOUT", "60")),
+            hedge=env_flag("ROUTER_HEDGE"),
+            hedge_delay=float(os.getenv("ROUTER_HEDGE_DELAY", "2")),
+            failure_threshold=int(os.getenv("ROUTER_FAILURE_THRESHOLD", "5")),
+            reset_timeout=float(os.getenv("ROUTER_RESET_TIMEOUT", "30")),
+            gate=backend_slot,
+        )
     else:
         raise ValueError(f"Unknown client type: {client_type}")
 
+def env_flag(name: str, default: bool = False) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """Build the /chat response cache from the CHAT_CACHE_* settings, if enabled."""
+    if not env_flag("CHAT_CACHE"):
+        return None
+    return ResponseCache(
+        ttl=float(os.getenv("CHAT_CACHE_TTL", "3600")),
+        max_entries=int(os.getenv("CHAT_CACHE_MAX_ENTRIES", "1024")),
+        max_bytes=int(os.getenv("CHAT_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+        disk_path=os.getenv("CHAT_CACHE_PATH") or None,
+        disk_max_bytes=int(os.getenv("CHAT_CACHE_DISK_MAX_BYTES", str(256 * 1024 * 1024))),
+    )
+
+def parse_model_limits(value: str) -> Dict[str, int]:
+    """Parse "model=limit,model=limit" (model names may contain ':')."""
+    limits = {}
+    for item in value.split(","):
+        if "=" in item:
+            model, limit = item.rsplit("=", 1)
+            limits[model.strip()] = int(limit)
+    return limits
+
+def get_admission_controller() -> Optional[AdmissionController]:
+    """Build the backend scheduler from the ADMISSION_* settings, if enabled."""
+    if not env_flag("ADMISSION_CONTROL"):
+        return None
+    return AdmissionController(
+        backend_limit=int(os.getenv("ADMISSION_BACKEND_LIMIT", "16")),
+        model_limit=int(os.getenv("ADMISSION_MODEL_LIMIT", "4")),
+        model_limits=parse_model_limits(os.getenv("ADMISSION_MODEL_LIMITS", "")),
+        max_queue=int(os.getenv("ADMISSION_QUEUE_SIZE", "64")),
+        queue_timeout=float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "30")),
+    )
+
+def get_cascade() -> Optional[ModelCascade]:
+    """Build the model cascade from CASCADE_TIERS, a JSON list ordered from the
+    cheapest model to the large one, e.g.
+    [{"model": "qwen3:1.7b", "num_ctx": 8192}, {"model": "llama-3.3-70b-versatile", "num_ctx": 131072}]
+    """
+    tiers = os.getenv("CASCADE_TIERS")
+    if not tiers:
+        return None
+    tiers = [CascadeTier.from_dict(tier) for tier in json.loads(tiers)]
+    if len(tiers) < 2:
+        raise ValueError("CASCADE_TIERS needs at least one small model and a large one")
+    return ModelCascade(
+        tiers[:-1],
+        tiers[-1],
+        confidence_threshold=float(os.getenv("CASCADE_CONFIDENCE_THRESHOLD", "0.5")),
+        output_reserve=int(os.getenv("CASCADE_OUTPUT_RESERVE", "512")),
+        alias=os.getenv("CASCADE_ALIAS", "cascade"),
+    )
+
+def get_context_budget() -> Optional[ContextBudget]:
+    """Build the context trimming stage from the CONTEXT_* settings, if enabled."""
+    if not env_flag("CONTEXT_BUDGET"):
+        return None
+    return ContextBudget(
+        default_window=int(os.getenv("CONTEXT_DEFAULT_WINDOW", "8192")),
+        windows=parse_model_limits(os.getenv("CONTEXT_WINDOWS", "")),
+        output_reserve=int(os.getenv("CONTEXT_OUTPUT_RESERVE", "512")),
+        mode=os.getenv("CONTEXT_TRIM_MODE", "drop"),
+        summary_tokens=int(os.getenv("CONTEXT_SUMMARY_TOKENS", "256")),
+    )
+
+def get_memory_writer(db) -> Optional[MemoryWriter]:
+    """Build the write-behind memory writer from the MEMORY_* settings, when a database is configured."""
+    if not db.configured:
+        return None
+    return MemoryWriter(
+        db,
+        batch_size=int(os.getenv("MEMORY_BATCH_SIZE", "500")),
+        flush_interval=float(os.getenv("MEMORY_FLUSH_INTERVAL", "1")),
+        max_buffer=int(os.getenv("MEMORY_BUFFER_MAX", "10000")),
+        put_timeout=float(os.getenv("MEMORY_PUT_TIMEOUT", "5")),
+    )
+
+def get_memory_search(db, instance):
+    """Build semantic memory search from the MEMORY_SEARCH/MEMORY_INDEX_* settings, if enabled."""
+    if not env_flag("MEMORY_SEARCH") or not db.configured:
+        return None
+    # NumPy is only loaded when memory search is on
+    from search.embeddings import ClientEmbedder, HashingEmbedder
+    from search.memory_search import MemorySearch
+    from search.vector_index import VectorIndex
+    embedder_setting = os.getenv("MEMORY_EMBEDDER", "hashing")
+    if embedder_setting.startswith("ollama:"):
+        local = local_client(instance)
+        if local is None:
+            raise ValueError("MEMORY_EMBEDDER=ollama:<model> needs an Ollama backend")
+        embedder = ClientEmbedder(local, embedder_setting.split(":", 1)[1])
+    elif embedder_setting == "hashing":
+        embedder = HashingEmbedder(int(os.getenv("MEMORY_EMBED_DIM", "256")))
+    else:
+        raise ValueError(f"Unknown memory embedder: {embedder_setting}")
+    index = VectorIndex(os.getenv("MEMORY_INDEX_PATH", "data/memory_index"), embedder.name, nprobe=int(os.getenv("MEMORY_INDEX_PROBES", "8")))
+    return MemorySearch(
+        db,
+        index,
+        embedder,
+        interval=float(os.getenv("MEMORY_INDEX_INTERVAL", "10")),
+        nlist=int(os.getenv("MEMORY_INDEX_LISTS", "0")),
+        train_rows=int(os.getenv("MEMORY_INDEX_TRAIN_ROWS", "100000")),
+        window=int(os.getenv("MEMORY_INDEX_WINDOW", "1000")),
+    )
+
+def get_memory_compactor(db) -> Optional[MemoryCompactor]:
+    """Build background memory compaction from the MEMORY_COMPACTION_* settings, if enabled."""
+    if not env_flag("MEMORY_COMPACTION") or not db.configured:
+        return None
+    model = os.getenv("MEMORY_COMPACTION_MODEL")
+    if not model:
+        raise ValueError("MEMORY_COMPACTION needs MEMORY_COMPACTION_MODEL")
+    return MemoryCompactor(
+        db,
+        # summaries queue behind interactive requests
+        lambda model_name, messages, options: run_chat(model_name, messages, options, PRIORITIES["batch"]),
+        model,
+        window=os.getenv("MEMORY_COMPACTION_WINDOW", "week"),
+        min_age_days=float(os.getenv("MEMORY_COMPACTION_MIN_AGE_DAYS", "30")),
+        min_group=int(os.getenv("MEMORY_COMPACTION_MIN_GROUP", "5")),
+        max_input_tokens=int(os.getenv("MEMORY_COMPACTION_INPUT_TOKENS", "3000")),
+        summary_tokens=int(os.getenv("MEMORY_COMPACTION_SUMMARY_TOKENS", "300")),
+        concurrency=int(os.getenv("MEMORY_COMPACTION_CONCURRENCY", "2")),
+        token_budget=int(os.getenv("MEMORY_COMPACTION_TOKEN_BUDGET", "200000")),
+        max_groups=int(os.getenv("MEMORY_COMPACTION_MAX_GROUPS", "100")),
+        interval=float(os.getenv("MEMORY_COMPACTION_INTERVAL", "3600")),
+    )
+
+def get_partition_maintainer(db) -> Optional[PartitionMaintainer]:
+    """Build LongTermMemory partition upkeep from the MEMORY_PARTITIONS_* settings, if enabled."""
+    if not env_flag("MEMORY_PARTITIONS") or not db.configured:
+        return None
+    return PartitionMaintainer(
+        db,
+        months_ahead=int(os.getenv("MEMORY_PARTITIONS_AHEAD", "3")),
+        retain_months=int(os.getenv("MEMORY_PARTITIONS_RETAIN_MONTHS", "0")),
+        drop_detached=env_flag("MEMORY_PARTITIONS_DROP"),
+        interval=float(os.getenv("MEMORY_PARTITIONS_INTERVAL", "86400")),
+    )
+
+def local_client(instance):
+    """The client able to load and unload local models, if any."""
+    if hasattr(instance, "load_model"):
+        return instance
+    if isinstance(instance, BackendRouter):
+        for backend in instance.backends:
+            if hasattr(backend.client, "load_model"):
+                return backend.client
+    return None
+
+def get_warm_pool(instance) -> Optional[WarmPool]:
+    """Build the warm pool from the WARM_POOL_* settings, if enabled."""
+    if not env_flag("WARM_POOL"):
+        return None
+    local = local_client(instance)
+    if local is None:
+        raise ValueError("WARM_POOL needs an Ollama backend")
+    budget = os.getenv("WARM_POOL_MEMORY_BUDGET_MB")
+    return WarmPool(
+        local,
+        pinned=[name.strip() for name in os.getenv("WARM_POOL_PINNED", "").split(",") if name.strip()],
+        interval=float(os.getenv("WARM_POOL_INTERVAL", "60")),
+        keep_alive=os.getenv("WARM_POOL_KEEP_ALIVE", "10m"),
+        memory_budget=int(budget) * 1024 * 1024 if budget else None,
+        predict_top=int(os.getenv("WARM_POOL_PREDICT_TOP", "2")),
+        half_life=float(os.getenv("WARM_POOL_HALF_LIFE", "600")),
+    )
+
+def get_model_catalog(instance) -> Optional[ModelCatalog]:
+    """Build the model catalogue over every backend of the client, unless MODEL_CATALOG=0."""
+    if not env_flag("MODEL_CATALOG", True):
+        return None
+    if isinstance(instance, BackendRouter):
+        sources = [(backend.name, backend.client) for backend in instance.backends]
+    else:
+        sources = [(backend_name(), instance)]
+    return ModelCatalog(sources, ttl=float(os.getenv("MODEL_CATALOG_TTL", "300")))
+
+def check_model(model_name: str) -> None:
+    """Reject unknown model names locally instead of waiting for a backend error."""
+    if catalog is None or not env_flag("MODEL_CATALOG_VALIDATE", True):
+        return
+    if cascade is not None and model_name == cascade.alias:
+        return
+    if isinstance(client, BackendRouter) and model_name in client.model_map:
+        return
+    if not catalog.is_known(model_name):
+        raise HTTPException(status_code=404, detail=f"Unknown model: {model_name}")
+
+def fit_context(model_name: str, messages: List[Dict[str, str]]) -> List[Dict[str, str]]:
+    """Trim the history to the model's context window, keeping the system prompt."""
+    if context_budget is None:
+        return messages
+    if cascade is not None and model_name == cascade.alias:
+        # the cascade escalates prompts too long for its small tiers
+        window = context_budget.window(model_name, cascade.large.num_ctx)
+    else:
+        window = context_budget.window(model_name, catalog.context_window(model_name) if catalog is not None else None)
+    messages, _ = context_budget.fit(messages, window)
+    return messages
+
+def record_model_use(model_name: str) -> None:
+    """Feed the warm pool's request frequencies with the local model name."""
+    if warm_pool is None:
+        return
+    if isinstance(client, BackendRouter):
+        for backend in client.backends:
+            if backend.client is warm_pool.client:
+                model_name = client.resolve(model_name, backend.name)
+                break
+    if model_name is not None:
+        warm_pool.touch(model_name)
+
+def backend_name() -> str:
+    """The configured client, "router" in router mode."""
+    return os.getenv("LLM_CLIENT", "ollama").lower()
+
+# X-Priority of the call being served, read by backend_slot when the router enters it
+call_priority: ContextVar[int] = ContextVar("call_priority", default=PRIORITIES["normal"])
+# (backend, granted at) of the slots taken for the call being served, in the order the backends were tried
+call_backends: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar("call_backends", default=None)
+
+def serving_backend(served: Optional[List[Tuple[str, float]]] = None) -> str:
+    """The backend the current call went to: the last one the router tried, else the configured client."""
+    served = call_backends.get() if served is None else served
+    return served[-1][0] if served else backend_name()
+
+def request_priority(request: Request) -> int:
+    """Read the X-Priority header (interactive, normal or batch)."""
+    name = request.headers.get("x-priority", "normal").lower()
+    return PRIORITIES.get(name, PRIORITIES["normal"])
+
+async def admit(backend: str, model_name: str, priority: int):
+    """Wait for a backend slot, answering 429/503 with Retry-After when refused."""
+    if admission is None:
+        return None
+    try:
+        return await admission.acquire(backend, model_name, priority)
+    except AdmissionRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+
+def release_slot(ticket) -> None:
+    if ticket is not None and admission is not None:
+        admission.release(ticket)
+
+@asynccontextmanager
+async def backend_slot(backend: str, model_name: str):
+    """Admission slot of one call to `backend`; the router holds one around each backend it tries."""
+    queued = time.perf_counter()
+    ticket = await admit(backend, model_name, call_priority.get())
+    granted = time.perf_counter()
+    QUEUE_WAIT.observe(granted - queued, backend, model_name)
+    served = call_backends.get()
+    if served is not None:
+        served.append((backend, granted))
+    BACKEND_IN_FLIGHT.inc(backend)
+    try:
+        yield
+    finally:
+        BACKEND_IN_FLIGHT.dec(backend)
+        release_slot(ticket)
+
+async def admitted_call(model_name: str, priority: int, method, *args, **kwargs):
+    """Call a client method once the scheduler grants a slot on the backend serving it.
+
+    In router mode the router takes the slot of each backend it tries.
+    """
+    served: List[Tuple[str, float]] = []
+    call_priority.set(priority)
+    call_backends.set(served)
+    try:
+        if isinstance(client, BackendRouter):
+            result = await call_client(method, *args, **kwargs)
+        else:
+            async with backend_slot(backend_name(), model_name):
+                result = await call_client(method, *args, **kwargs)
+    except Exception as e:
+        BACKEND_ERRORS.inc(serving_backend(served), model_name, type(e).__name__)
+        raise
+    backend, started = served[-1] if served else (backend_name(), time.perf_counter())
+    BACKEND_LATENCY.observe(time.perf_counter() - started, backend, model_name, method.__name__)
+    return result
+
+def observe_generation(model_name: str, response) -> None:
+    """Record the token counts and speed a backend reported for a chat response."""
+    data = response_to_dict(response)
+    timings = response_timings(data)
+    observe_tokens(model_name, response_usage(data), timings["time_to_first_token"], timings["tokens_per_second"])
+
+def observe_tokens(model_name: str, usage, time_to_first_token: Optional[float], tokens_per_second: Optional[float], backend: Optional[str] = None) -> None:
+    backend = backend or serving_backend()
+    prompt_tokens, completion_tokens = usage
+    if prompt_tokens:
+        TOKENS.inc(backend, model_name, "prompt", amount=prompt_tokens)
+    if completion_tokens:
+        TOKENS.inc(backend, model_name, "completion", amount=completion_tokens)
+    if time_to_first_token is not None:
+        TIME_TO_FIRST_TOKEN.observe(time_to_first_token, backend, model_name)
+    if tokens_per_second is not None:
+        TOKENS_PER_SECOND.observe(tokens_per_second, backend, model_name)
+
+async def run_chat(model_name: str, messages: List[Dict[str, str]], options: Optional[Dict[str, Any]], priority: int, early_abort: bool = False):
+    """Chat through the cascade when its alias is requested, else call the client.
+
+    With early_abort the reply is streamed and cut as soon as it says
+    want_to_speak false.
+    """
+    async def call(model: str, msgs: List[Dict[str, str]], opts: Optional[Dict[str, Any]]):
+        record_model_use(model)
+        if early_abort:
+            response = await admitted_call(model, priority, early_abort_chat, client, model, msgs, opts)
+            if response["structured"]["aborted"]:
+                EARLY_ABORTS.inc(serving_backend(), model)
+        else:
+            response = await admitted_call(model, priority, client.chat, model, msgs, opts)
+        observe_generation(model, response)
+        return response
+
+    if cascade is not None and model_name == cascade.alias:
+        return await cascade.chat(messages, options, call)
+    return await call(model_name, messages, options)
+
+async def coalesce(key, call):
+    """Await call(), sharing it with identical concurrent requests."""
+    if not env_flag("REQUEST_COALESCING", True):
+        return await call()
+    return await flights.do(key, call)
+
 # Initialize client as None - will be set when app starts
 client = None
+response_cache: Optional[ResponseCache] = None
+admission: Optional[AdmissionController] = None
+cascade: Optional[ModelCascade] = None
+warm_pool: Optional[WarmPool] = None
+catalog: Optional[ModelCatalog] = None
+context_budget: Optional[ContextBudget] = None
+prompt_store: Optional[SystemPromptStore] = None
+memory_writer: Optional[MemoryWriter] = None
+# search.memory_search.MemorySearch, imported only when enabled
+memory_search = None
+memory_compactor: Optional[MemoryCompactor] = None
+partition_maintainer: Optional[PartitionMaintainer] = None
+# Identical concurrent /chat and /models/warm calls share one backend call
+flights = SingleFlight()
+
+# Metrics served at /metrics; histograms keep per-bucket counts so recording is a dict update
+metrics = Registry()
+QUEUE_WAIT = metrics.histogram("llm_queue_wait_seconds", "Time spent waiting for an admission slot", ("backend", "model"))
+BACKEND_LATENCY = metrics.histogram("llm_backend_call_seconds", "Duration of backend calls, queueing excluded", ("backend", "model", "call"))
+BACKEND_IN_FLIGHT = metrics.gauge("llm_backend_calls_in_flight", "Backend calls currently running", ("backend",))
+BACKEND_ERRORS = metrics.counter("llm_backend_errors_total", "Failed backend calls by exception type", ("backend", "model", "exception"))
+TIME_TO_FIRST_TOKEN = metrics.histogram("llm_time_to_first_token_seconds", "Time until the first generated token", ("backend", "model"))
+TOKENS_PER_SECOND = metrics.histogram("llm_tokens_per_second", "Generation speed", ("backend", "model"), buckets=(1, 5, 10, 20, 40, 80, 160, 320, 640, 1280))
+EARLY_ABORTS = metrics.counter("llm_early_aborts_total", "Generations stopped once the reply said want_to_speak false", ("backend", "model"))
+TOKENS = metrics.counter("llm_tokens_total", "Prompt and completion tokens reported by the backends", ("backend", "model", "kind"))
+DB_QUERY_SECONDS = metrics.histogram("db_query_seconds", "Database query duration by statement type", ("statement",), buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5))
+
+def subsystem_metrics():
+    """Counters and gauges read at scrape time from the stats the subsystems already keep."""
+    samples = [
+        ("request_coalescing_calls_total", "counter", "Backend calls started by /chat and /models/warm", [({}, flights.started)]),
+        ("request_coalescing_shared_total", "counter", "Requests answered by an identical in-flight call", [({}, flights.shared)]),
+    ]
+    if response_cache is not None:
+        stats = response_cache.stats()
+        samples.append(("chat_cache_entries", "gauge", "Responses held in memory", [({}, stats["entries"])]))
+        samples.append(("chat_cache_bytes", "gauge", "Size of the responses held in memory", [({}, stats["bytes"])]))
+        samples.append(("chat_cache_events_total", "counter", "Response cache lookups and evictions", [
+            ({"event": event}, stats[event]) for event in ("hits", "disk_hits", "misses", "evictions")
+        ]))
+    if admission is not None:
+        stats = admission.stats()
+        samples.append(("admission_queue_depth", "gauge", "Requests waiting for a slot", [
+            ({"priority": name}, depth) for name, depth in stats["queue_depth_by_priority"].items()
+        ]))
+        samples.append(("admission_active", "gauge", "Slots in use by backend", [
+            ({"backend": name}, active) for name, active in stats["active_by_backend"].items()
+        ]))
+        samples.append(("admission_requests_total", "counter", "Admission outcomes", [
+            ({"outcome": outcome}, stats[outcome]) for outcome in ("admitted", "rejected", "timed_out")
+        ]))
+    if isinstance(client, BackendRouter):
+        stats = client.stats()
+        backends = stats["backends"]
+        samples.append(("router_circuit_open", "gauge", "1 while a backend's circuit breaker is not closed", [
+            ({"backend": name}, int(backend["state"] != "closed")) for name, backend in backends.items()
+        ]))
+        samples.append(("router_backend_calls_total", "counter", "Calls sent to each backend by the router", [
+            ({"backend": name}, backend["calls"]) for name, backend in backends.items()
+        ]))
+        samples.append(("router_backend_errors_total", "counter", "Failed calls per backend", [
+            ({"backend": name}, backend["errors"]) for name, backend in backends.items()
+        ]))
+        samples.append(("router_events_total", "counter", "Router failovers and hedged calls", [
+            ({"event": event}, stats[event]) for event in ("failovers", "hedges", "hedges_won")
+        ]))
+    if context_budget is not None:
+        stats = context_budget.stats()
+        samples.append(("context_trimmed_requests_total", "counter", "Prompts trimmed to fit their context window", [({}, stats["trimmed_requests"])]))
+        samples.append(("context_dropped_messages_total", "counter", "History messages dropped or summarised", [({}, stats["dropped_messages"])]))
+    if memory_writer is not None:
+        stats = memory_writer.stats()
+        samples.append(("memory_buffered", "gauge", "Memories waiting to be written", [({}, stats["buffered"])]))
+        samples.append(("memory_written_total", "counter", "Memories written to LongTermMemory", [({}, stats["written"])]))
+        samples.append(("memory_writer_events_total", "counter", "Memory writer batches, failed flushes and refused memories", [
+            ({"event": event}, stats[event]) for event in ("batches", "failures", "rejected", "backpressure_waits")
+        ]))
+    if memory_search is not None:
+        stats = memory_search.stats()
+        samples.append(("memory_index_rows", "gauge", "Memories in the vector index", [({}, stats["rows"])]))
+        samples.append(("memory_searches_total", "counter", "Memory similarity searches", [({}, stats["searches"])]))
+    if memory_compactor is not None:
+        stats = memory_compactor.stats()
+        samples.append(("memory_compaction_events_total", "counter", "Summaries written, memories archived and failed groups", [
+            ({"event": event}, stats[event]) for event in ("summaries", "archived", "failures")
+        ]))
+        samples.append(("memory_compaction_tokens_total", "counter", "Tokens spent summarising memories", [({}, stats["tokens"])]))
+    if partition_maintainer is not None:
+        stats = partition_maintainer.stats()
+        samples.append(("memory_partition_events_total", "counter", "Memory partitions created and detached, failed upkeep runs", [
+            ({"event": "created"}, len(stats["created"])), ({"event": "detached"}, len(stats["detached"])), ({"event": "failures"}, stats["failures"]),
+        ]))
+    if cascade is not None:
+        samples.append(("cascade_decisions_total", "counter", "Cascade outcomes by escalation reason", [
+            ({"decision": decision}, count) for decision, count in cascade.stats()["decisions"].items()
+        ]))
+    return samples
+
+metrics.add_collector(subsystem_metrics)
+
+async def connect_dependencies() -> None:
+    """Load the database engine and open a first connection."""
+    if not db_client.configured:
+        return
+    try:
+        await db_client.connect()
+    except Exception as e:
+        logger.warning("database not reachable yet: %s", e)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
-    global client
+    global client, response_cache, admission, cascade, warm_pool, catalog, context_budget, prompt_store, memory_writer, memory_search, memory_compactor, partition_maintainer
 
-    # Set the client based on argument
-    client = get_client(os.getenv("LLM_CLIENT", "ollama"))
+    # Set the client based on argument, unless one was already provided
+    owns_client = client is None
+    if owns_client:
+        client = get_client(os.getenv("LLM_CLIENT", "ollama"), os.getenv("LLM_CLIENT_MODE", "async"))
+    owns_cache = response_cache is None
+    if owns_cache:
+        response_cache = get_response_cache()
+    owns_admission = admission is None
+    if owns_admission:
+        admission = get_admission_controller()
+    owns_cascade = cascade is None
+    if owns_cascade:
+        cascade = get_cascade()
+    owns_context_budget = context_budget is None
+    if owns_context_budget:
+        context_budget = get_context_budget()
+    owns_prompt_store = prompt_store is None
+    if owns_prompt_store:
+        prompt_store = SystemPromptStore(db_client, ttl=float(os.getenv("SYSTEM_PROMPT_TTL", "30")))
+    owns_memory_writer = memory_writer is None
+    if owns_memory_writer:
+        memory_writer = get_memory_writer(db_client)
+    if memory_writer is not None:
+        memory_writer.start()
+    owns_memory_search = memory_search is None
+    if owns_memory_search:
+        memory_search = get_memory_search(db_client, client)
+    if memory_search is not None:
+        memory_search.start()
+        if memory_writer is not None:
+            memory_writer.on_flush = memory_search.notify
+    owns_memory_compactor = memory_compactor is None
+    if owns_memory_compactor:
+        memory_compactor = get_memory_compactor(db_client)
+    if memory_compactor is not None:
+        if memory_search is not None:
+            memory_compactor.on_archive = memory_search.forget
+        memory_compactor.start()
+    owns_partition_maintainer = partition_maintainer is None
+    if owns_partition_maintainer:
+        partition_maintainer = get_partition_maintainer(db_client)
+    if partition_maintainer is not None:
+        partition_maintainer.start()
+    owns_warm_pool = warm_pool is None
+    if owns_warm_pool:
+        warm_pool = get_warm_pool(client)
+        if warm_pool is not None:
+            warm_pool.start()
+    owns_catalog = catalog is None
+    if owns_catalog:
+        catalog = get_model_catalog(client)
+        if catalog is not None:
+            catalog.start()
+    # the database pool opens in the background, /health answers meanwhile
+    connect_task = asyncio.create_task(connect_dependencies())
 
     yield
 
-    # Cleanup (if needed)
-    # Add any cleanup code here
+    # Cleanup: stop background work, then close the shared connection pool we opened
+    connect_task.cancel()
+    try:
+        await connect_task
+    except asyncio.CancelledError:
+        pass
+    if memory_compactor is not None:
+        await memory_compactor.stop()
+        memory_compactor.on_archive = None
+        if owns_memory_compactor:
+            memory_compactor = None
+    if partition_maintainer is not None:
+        await partition_maintainer.stop()
+        if owns_partition_maintainer:
+            partition_maintainer = None
+    if memory_search is not None:
+        if memory_writer is not None:
+            memory_writer.on_flush = None
+        await memory_search.stop()
+        if owns_memory_search:
+            memory_search = None
+    if memory_writer is not None:
+        # write the buffered memories before the engine is disposed
+        try:
+            await memory_writer.drain()
+        except Exception as e:
+            logger.error("could not write %d buffered memories: %s", memory_writer.stats()["buffered"], e)
+        if owns_memory_writer:
+            memory_writer = None
+    await close_client(db_client)
+    if owns_catalog and catalog is not None:
+        await catalog.stop()
+        catalog = None
+    if owns_warm_pool and warm_pool is not None:
+        await warm_pool.stop()
+        warm_pool = None
+    if owns_client:
+        await close_client(client)
+        client = None
+    if owns_cache and response_cache is not None:
+        response_cache.close()
+        response_cache = None
+    if owns_admission:
+        admission = None
+    if owns_cascade:
+        cascade = None
+    if owns_context_budget:
+        context_budget = None
+    if owns_prompt_store:
+        prompt_store = None
 
 app = FastAPI(lifespan=lifespan)
+app.add_middleware(MetricsMiddleware, registry=metrics)
 
+# the engine is created on first use, importing the API needs no database
 db_client = DBClient(os.getenv("DB_URL", None))
+db_client.instrument(DB_QUERY_SECONDS.observe)
 
 class PullModelRequest(BaseModel):
     model_name: str
@@ -47,47 +645,516 @@ class PullModelRequest(BaseModel):
 class WarmModelRequest(BaseModel):
     model_name: str
 
+class SystemPromptRef(BaseModel):
+    # a prompt row id, or a name with an optional version (latest when omitted)
+    id: Optional[int] = None
+    name: str = DEFAULT_PROMPT_NAME
+    version: Optional[int] = None
+
 class ChatRequest(BaseModel):
     model_name: str
     messages: List[Dict[str, str]]
     options: Optional[Dict[str, Any]] = None
+    # stored prompt prepended as the system message, instead of sending its text
+    system_prompt: Optional[SystemPromptRef] = None
+    # stop generating once the persona reply says want_to_speak false (default: CHAT_EARLY_ABORT)
+    early_abort: Optional[bool] = None
 
+# Liveness: the process answers. It never waits on a dependency.
 @app.get("/health")
+@app.get("/health/live")
 def health_check():
     return {"status": "ok"}
 
+# Readiness: the backend listed its models and the database answers
+@app.get("/health/ready")
+async def readiness():
+    checks = {"client": client is not None}
+    if catalog is not None:
+        checks["models"] = catalog.is_loaded()
+    if db_client.configured:
+        try:
+            await asyncio.wait_for(db_client.connect(), float(os.getenv("READINESS_TIMEOUT", "2")))
+            checks["db"] = True
+        except Exception:
+            checks["db"] = False
+    ready = all(checks.values())
+    return JSONResponse({"status": "ready" if ready else "not_ready", "checks": checks}, status_code=200 if ready else 503)
+
 @app.get("/models")
-def list_models():
-    return client.list_models()
+async def list_models(request: Request, refresh: bool = False):
+    if catalog is None:
+        models = await call_client(client.list_models)
+        if warm_pool is None:
+            return models
+        return {**jsonable_encoder(models), "warm_pool": warm_pool.state()}
+
+    if refresh or not catalog.is_loaded():
+        await catalog.refresh()
+    body = catalog.snapshot()
+    etag = catalog.etag
+    if warm_pool is not None:
+        body["warm_pool"] = jsonable_encoder(warm_pool.state())
+        digest = hashlib.sha1((etag + json.dumps(body["warm_pool"], sort_keys=True)).encode("utf-8")).hexdigest()
+        etag = f'"{digest}"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    return JSONResponse(body, headers={"ETag": etag})
 
 @app.post("/models/pull")
-def pull_model(req: PullModelRequest):
+async def pull_model(req: PullModelRequest):
     try:
-        client.pull_model(req.model_name)
+        await call_client(client.pull_model, req.model_name)
+        if catalog is not None:
+            await catalog.refresh()
         return {"status": "success"}
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @app.post("/models/warm")
-def warm_model(req: WarmModelRequest):
+async def warm_model(req: WarmModelRequest, request: Request):
     try:
-        result = client.warm_model(req.model_name)
+        result = await coalesce(
+            ("warm", req.model_name),
+            lambda: admitted_call(req.model_name, request_priority(request), client.warm_model, req.model_name),
+        )
         return {"status": "success", "result": result}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-@app.post("/chat")
-def chat(req: ChatRequest):
+async def load_system_prompt(ref: SystemPromptRef) -> Dict[str, Any]:
     try:
-        response = client.chat(req.model_name, req.messages, req.options)
+        return await prompt_store.get(ref.name, ref.version, ref.id)
+    except PromptNotFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"System prompts unavailable: {e}")
+
+async def chat_messages(req: ChatRequest) -> List[Dict[str, str]]:
+    """The request messages, behind the referenced system prompt, trimmed to the context window."""
+    messages = req.messages
+    if req.system_prompt is not None:
+        prompt = await load_system_prompt(req.system_prompt)
+        messages = [{"role": "system", "content": prompt["content"]}] + messages
+    return fit_context(req.model_name, messages)
+
+def is_cacheable(options: Optional[Dict[str, Any]]) -> bool:
+    """Only seeded or greedy requests give reproducible answers worth caching."""
+    if not options:
+        return False
+    return "seed" in options or options.get("temperature") == 0
+
+async def complete_chat(req: ChatRequest, priority: int, cache_control: str = ""):
+    """Answer one chat request through the catalogue, context budget, cache and coalescing.
+
+    Returns (response, cache status). The response is the encoded JSON when
+    the cache is involved ("HIT" or "MISS"), the backend response otherwise.
+    Cache-Control: no-cache skips the lookup, no-store skips the cache entirely.
+    """
+    check_model(req.model_name)
+    messages = await chat_messages(req)
+    early_abort = req.early_abort if req.early_abort is not None else env_flag("CHAT_EARLY_ABORT")
+    # a cut reply must not be served to a request that wants the full one
+    key_options = {**(req.options or {}), "early_abort": True} if early_abort else req.options
+    request_key = ResponseCache.make_key(backend_name(), req.model_name, messages, key_options)
+    cache_key = None
+    if response_cache is not None and is_cacheable(req.options) and "no-store" not in cache_control:
+        cache_key = request_key
+        if "no-cache" not in cache_control:
+            cached = await response_cache.aget(cache_key)
+            if cached is not None:
+                return cached, "HIT"
+    try:
+        response = await coalesce(
+            ("chat", request_key),
+            lambda: run_chat(req.model_name, messages, req.options, priority, early_abort),
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if cache_key is None:
+        return response, None
+    payload = json.dumps(jsonable_encoder(response), ensure_ascii=False).encode("utf-8")
+    await response_cache.aset(cache_key, payload)
+    return payload, "MISS"
+
+@app.post("/chat")
+async def chat(req: ChatRequest, request: Request):
+    response, cache_status = await complete_chat(req, request_priority(request), request.headers.get("cache-control", "").lower())
+    if cache_status is None:
         return response
+    return Response(content=response, media_type="application/json", headers={"X-Cache": cache_status})
+
+class BatchChatRequest(BaseModel):
+    # items are validated one by one so a malformed item only fails itself
+    items: List[Dict[str, Any]]
+    max_parallel: Optional[int] = None
+
+def batch_error(index: int, status_code: int, error: Any) -> Tuple[int, str]:
+    return status_code, json.dumps({"index": index, "status": status_code, "error": error}, ensure_ascii=False) + "\n"
+
+async def batch_item(index: int, item: Dict[str, Any], priority: int, cache_control: str) -> Tuple[int, str]:
+    """Run one batch item and return its status and NDJSON result line, never raising."""
+    try:
+        req = ChatRequest.model_validate(item)
+        response, cache_status = await complete_chat(req, priority, cache_control)
+    except HTTPException as e:
+        return batch_error(index, e.status_code, e.detail)
+    except ValidationError as e:
+        return batch_error(index, 422, jsonable_encoder(e.errors(include_url=False)))
     except Exception as e:
+        return batch_error(index, 400, str(e))
+    if cache_status is None:
+        response = json.dumps(jsonable_encoder(response), ensure_ascii=False).encode("utf-8")
+    # splice the encoded response in rather than decoding cached payloads
+    return 200, f'{{"index": {index}, "status": 200, "response": {response.decode("utf-8")}}}\n'
+
+def batch_groups(items: List[Dict[str, Any]]) -> List[List[tuple]]:
+    """(index, item) pairs grouped by model, in order of first appearance."""
+    groups: Dict[Any, List[tuple]] = {}
+    for index, item in enumerate(items):
+        model_name = item.get("model_name") if isinstance(item, dict) else None
+        groups.setdefault(str(model_name), []).append((index, item))
+    return list(groups.values())
+
+# Items run concurrently up to the parallelism cap, one model after the other
+# so a local backend loads each model once. Result lines arrive as items
+# finish: {"index", "status": 200, "response"} or {"index", "status", "error"},
+# then a final {"done": true, "items", "errors"} line.
+@app.post("/chat/batch")
+async def chat_batch(req: BatchChatRequest, request: Request):
+    max_items = int(os.getenv("BATCH_MAX_ITEMS", "1000"))
+    if len(req.items) > max_items:
+        raise HTTPException(status_code=413, detail=f"A batch holds at most {max_items} items")
+    parallel = int(os.getenv("BATCH_MAX_PARALLEL", "4"))
+    if req.max_parallel is not None:
+        parallel = max(1, min(parallel, req.max_parallel))
+    # batch items yield to interactive traffic in the admission queue
+    priority = PRIORITIES["batch"]
+    cache_control = request.headers.get("cache-control", "").lower()
+    lines: asyncio.Queue = asyncio.Queue()
+
+    async def produce():
+        semaphore = asyncio.Semaphore(parallel)
+
+        async def run_item(index, item):
+            async with semaphore:
+                result = await batch_item(index, item, priority, cache_control)
+            await lines.put(result)
+
+        for group in batch_groups(req.items):
+            await asyncio.gather(*(run_item(index, item) for index, item in group))
+        await lines.put(None)
+
+    async def body():
+        producer = asyncio.create_task(produce())
+        errors = 0
+        try:
+            while (result := await lines.get()) is not None:
+                status_code, line = result
+                if status_code != 200:
+                    errors += 1
+                yield line
+            yield json.dumps({"done": True, "items": len(req.items), "errors": errors}) + "\n"
+        finally:
+            # a disconnected client cancels the remaining items
+            producer.cancel()
+            try:
+                await producer
+            except asyncio.CancelledError:
+                pass
+
+    return StreamingResponse(body(), media_type="application/x-ndjson")
+
+@app.get("/cache/stats")
+def cache_stats():
+    if response_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **response_cache.stats()}
+
+@app.get("/router/stats")
+def router_stats():
+    if not isinstance(client, BackendRouter):
+        return {"enabled": False}
+    return {"enabled": True, **client.stats()}
+
+@app.get("/cascade/stats")
+def cascade_stats():
+    if cascade is None:
+        return {"enabled": False}
+    return {"enabled": True, **cascade.stats()}
+
+@app.get("/admission/stats")
+def admission_stats():
+    if admission is None:
+        return {"enabled": False}
+    return {"enabled": True, **admission.stats()}
+
+@app.get("/context/stats")
+def context_stats():
+    if context_budget is None:
+        return {"enabled": False}
+    return {"enabled": True, **context_budget.stats()}
+
+@app.get("/memories/stats")
+def memory_stats():
+    if memory_writer is None:
+        return {"enabled": False}
+    return {"enabled": True, **memory_writer.stats()}
+
+@app.get("/metrics")
+def metrics_endpoint():
+    return Response(content=metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+STREAM_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "sse": "text/event-stream",
+}
+
+def encode_stream_chunk(chunk: Dict[str, Any], stream_format: str) -> str:
+    data = json.dumps(chunk, ensure_ascii=False, default=str)
+    if stream_format == "sse":
+        return f"data: {data}\n\n"
+    return data + "\n"
+
+# Chunks share one schema for every backend:
+# {"model": str, "delta": str, "done": bool} and, on the last chunk,
+# "finish_reason" and "usage" {"prompt_tokens", "completion_tokens"}.
+# A failure after the stream started is reported as {"error": str, "done": true}.
+@app.post("/chat/stream")
+async def chat_stream(req: ChatRequest, request: Request, format: Optional[str] = None):
+    stream_format = format
+    if stream_format is None:
+        stream_format = "sse" if "text/event-stream" in request.headers.get("accept", "") else "ndjson"
+    if stream_format not in STREAM_MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail=f"Unknown stream format: {stream_format}")
+
+    check_model(req.model_name)
+    messages = await chat_messages(req)
+    # the slot is held for the whole stream and released when it ends;
+    # in router mode the router holds the slot of the backend it streams from
+    served: List[Tuple[str, float]] = []
+    call_priority.set(request_priority(request))
+    call_backends.set(served)
+    slot = AsyncExitStack()
+    if not isinstance(client, BackendRouter):
+        await slot.enter_async_context(backend_slot(backend_name(), req.model_name))
+    started = time.perf_counter()
+    stream = stream_client(client.chat_stream, req.model_name, messages, req.options)
+    # Wait for the first chunk so that backend errors still map to a 400
+    try:
+        first = await anext(stream)
+    except StopAsyncIteration:
+        first = None
+    except Exception as e:
+        await stream.aclose()
+        await slot.aclose()
+        BACKEND_ERRORS.inc(serving_backend(served), req.model_name, type(e).__name__)
+        if isinstance(e, HTTPException):
+            raise
         raise HTTPException(status_code=400, detail=str(e))
+    except asyncio.CancelledError:
+        # the client left before the first chunk, the backend stream must not outlive it
+        try:
+            await stream.aclose()
+        finally:
+            await slot.aclose()
+        raise
+    first_at = time.perf_counter()
+
+    async def body():
+        # Starlette cancels this generator when the HTTP client disconnects,
+        # the finally clause then closes the backend stream
+        last = first
+        try:
+            if first is not None:
+                yield encode_stream_chunk(first, stream_format)
+            async for chunk in stream:
+                last = chunk
+                yield encode_stream_chunk(chunk, stream_format)
+        except Exception as e:
+            BACKEND_ERRORS.inc(serving_backend(served), req.model_name, type(e).__name__)
+            yield encode_stream_chunk({"error": str(e), "done": True}, stream_format)
+        finally:
+            try:
+                await stream.aclose()
+            finally:
+                await slot.aclose()
+            finished = time.perf_counter()
+            backend = serving_backend(served)
+            BACKEND_LATENCY.observe(finished - started, backend, req.model_name, "chat_stream")
+            usage = (last or {}).get("usage") or {}
+            completion_tokens = usage.get("completion_tokens")
+            generating = finished - first_at
+            observe_tokens(
+                req.model_name,
+                (usage.get("prompt_tokens"), completion_tokens),
+                first_at - started if first is not None else None,
+                completion_tokens / generating if completion_tokens and generating > 0 else None,
+                backend,
+            )
+
+    return StreamingResponse(body(), media_type=STREAM_MEDIA_TYPES[stream_format])
+
+class SystemPromptCreate(BaseModel):
+    content: str
+    name: str = DEFAULT_PROMPT_NAME
+
+def system_prompt_body(prompt: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": prompt["id"],
+        "name": prompt["name"],
+        "version": prompt["version"],
+        "prompt": prompt["content"],
+        "created_at": prompt["created_at"],
+    }
 
 @app.get("/system")
-def get_system_prompt():
-    prompt = db_client.get_system_prompt()
-    if prompt:
-        return {"prompt": prompt}
-    else:
-        return HTTPException(status_code=400, detail=str("error: No prompt found"))
+async def get_system_prompt(request: Request, name: str = DEFAULT_PROMPT_NAME, version: Optional[int] = None, id: Optional[int] = None):
+    prompt = await load_system_prompt(SystemPromptRef(id=id, name=name, version=version))
+    # a given version never changes, the latest one must be revalidated
+    cache_control = "public, max-age=31536000, immutable" if version is not None or id is not None else "no-cache"
+    headers = {"ETag": prompt["etag"], "Cache-Control": cache_control}
+    if request.headers.get("if-none-match") == prompt["etag"]:
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(jsonable_encoder(system_prompt_body(prompt)), headers=headers)
+
+@app.post("/system")
+async def create_system_prompt(req: SystemPromptCreate):
+    try:
+        prompt = await prompt_store.create(req.name, req.content)
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"System prompts unavailable: {e}")
+    return JSONResponse(jsonable_encoder(system_prompt_body(prompt)), status_code=201, headers={"ETag": prompt["etag"]})
+
+class MemoryCreate(BaseModel):
+    content: str
+    author: str
+    source: Optional[str] = None
+    tags: Optional[List[str]] = None
+    timestamp: Optional[datetime] = None
+
+# Memories are buffered and written in batches, 202 means queued, not stored yet
+@app.post("/memories", status_code=202)
+async def create_memory(req: MemoryCreate):
+    if memory_writer is None:
+        raise HTTPException(status_code=503, detail="Memory storage is not configured")
+    try:
+        await memory_writer.put(req.content, req.author, req.source, req.tags, req.timestamp)
+    except MemoryBufferFull as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return {"status": "queued", "buffered": memory_writer.stats()["buffered"]}
+
+MEMORY_PAGE_MAX = int(os.getenv("MEMORY_PAGE_MAX", "500"))
+
+MEMORY_IMPORT_BATCH = int(os.getenv("MEMORY_IMPORT_BATCH", "5000"))
+
+# full-text searches without `since` only read the partitions of this many recent days, 0 reads them all
+MEMORY_FULLTEXT_HORIZON_DAYS = float(os.getenv("MEMORY_FULLTEXT_HORIZON_DAYS", "365"))
+
+# The body is a gather_channel_data export, parsed while it is received and copied in batches
+@app.post("/memories/import")
+async def import_memories(request: Request, channel_id: Optional[str] = None, source: Optional[str] = None):
+    if not db_client.configured:
+        raise HTTPException(status_code=503, detail="Memory storage is not configured")
+    if source is None and channel_id is None:
+        raise HTTPException(status_code=400, detail="Give the channel_id of the export or a source")
+    try:
+        report = await import_records(db_client, aiter_json_array(request.stream()), source or export_source(channel_id), MEMORY_IMPORT_BATCH)
+    except ValueError as e:
+        # the batches before the error are kept, a re-import skips them
+        raise HTTPException(status_code=400, detail=f"Invalid export: {e}")
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Import failed: {e}")
+    if memory_search is not None:
+        memory_search.notify()
+    return report
+
+# Keyset pages in (timestamp, id) order; memories still buffered by the writer are not listed yet
+# since/until bound the timestamps, so only the partitions of those months are read
+@app.get("/memories")
+async def list_memories(after: Optional[str] = None, limit: int = 100, author: Optional[str] = None, source: Optional[str] = None, since: Optional[datetime] = None, until: Optional[datetime] = None):
+    if not db_client.configured:
+        raise HTTPException(status_code=503, detail="Memory storage is not configured")
+    try:
+        key = decode_memory_cursor(after) if after else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    limit = min(max(limit, 1), MEMORY_PAGE_MAX)
+    try:
+        # one extra row tells whether another page follows
+        rows = await db_client.read_memories(key, limit + 1, author, source, since, until)
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Memories unavailable: {e}")
+    page = rows[:limit]
+    cursor = encode_memory_cursor(page[-1]["timestamp"], page[-1]["id"]) if len(rows) > limit else None
+    return {"memories": jsonable_encoder(page), "next": cursor}
+
+# Keyword search on the French full-text index, tags comma separated
+@app.get("/memories/fulltext")
+async def fulltext_memories(q: Optional[str] = None, tags: Optional[str] = None, any_tag: bool = False, author: Optional[str] = None, source: Optional[str] = None, limit: int = 20, since: Optional[datetime] = None, until: Optional[datetime] = None):
+    if not db_client.configured:
+        raise HTTPException(status_code=503, detail="Memory storage is not configured")
+    q = q.strip() if q else None
+    tag_list = [tag.strip() for tag in (tags or "").split(",") if tag.strip()]
+    if not q and not tag_list:
+        raise HTTPException(status_code=400, detail="Give a query, tags or both")
+    limit = min(max(limit, 1), MEMORY_PAGE_MAX)
+    if since is None and MEMORY_FULLTEXT_HORIZON_DAYS > 0:
+        since = (until or datetime.now()) - timedelta(days=MEMORY_FULLTEXT_HORIZON_DAYS)
+    try:
+        memories = await db_client.search_memories_text(q, tag_list, any_tag, author, source, limit, since, until)
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Memories unavailable: {e}")
+    return {"memories": jsonable_encoder(memories)}
+
+@app.get("/memories/search")
+async def search_memories(q: str, k: int = 10, author: Optional[str] = None, source: Optional[str] = None):
+    if memory_search is None:
+        raise HTTPException(status_code=503, detail="Memory search is not enabled")
+    k = min(max(k, 1), MEMORY_PAGE_MAX)
+    try:
+        memories = await memory_search.search(q, k, author, source)
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Memory search unavailable: {e}")
+    return {"memories": jsonable_encoder(memories)}
+
+@app.get("/memories/search/stats")
+def memory_search_stats():
+    if memory_search is None:
+        return {"enabled": False}
+    return {"enabled": True, **memory_search.stats()}
+
+# Runs one compaction pass now instead of waiting for the interval
+@app.post("/memories/compact")
+async def compact_memories():
+    if memory_compactor is None:
+        raise HTTPException(status_code=503, detail="Memory compaction is not enabled")
+    try:
+        report = await memory_compactor.run_once()
+    except CompactionRunning as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Memory compaction failed: {e}")
+    return jsonable_encoder(report)
+
+@app.get("/memories/partitions")
+async def memory_partitions():
+    if partition_maintainer is None:
+        return {"enabled": False}
+    try:
+        partitions = await db_client.memory_partitions()
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Memory partitions unavailable: {e}")
+    return jsonable_encoder({"enabled": True, **partition_maintainer.stats(), "partitions": partitions})
+
+@app.get("/memories/compaction/stats")
+def memory_compaction_stats():
+    if memory_compactor is None:
+        return {"enabled": False}
+    return {"enabled": True, **jsonable_encoder(memory_compactor.stats())}
@@ -0,0 +1,210 @@
+# response_cache.py
+# Deterministic chat response cache: in-memory LRU with an optional SQLite tier
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+class ResponseCache:
+    """LRU cache of serialised chat responses.
+
+    Entries expire after `ttl` seconds and are evicted least-recently-used
+    first once either `max_entries` or `max_bytes` is exceeded. When
+    `disk_path` is set, entries are also written to a SQLite file so they
+    survive restarts; a memory miss then falls back to the disk tier.
+    Every disk write purges the expired rows and, past `disk_max_bytes`,
+    the rows closest to expiry. `aget` and
+    `aset` run the SQLite I/O in a worker thread, off the event loop.
+    """
+
+    def __init__(self, ttl: float = 3600, max_entries: int = 1024, max_bytes: int = 64 * 1024 * 1024, disk_path: Optional[str] = None, disk_max_bytes: int = 256 * 1024 * 1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.disk_max_bytes = disk_max_bytes
+        self._entries: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_evictions = 0
+        self._disk: Optional[sqlite3.Connection] = None
+        # the SQLite connection is shared by worker threads, one statement sequence at a time
+        self._disk_lock = threading.Lock()
+        self._disk_size = 0
+        if disk_path:
+            self._disk = sqlite3.connect(disk_path, check_same_thread=False)
+            self._disk.execute(
+                "CREATE TABLE IF NOT EXISTS chat_cache (key TEXT PRIMARY KEY, expires_at REAL NOT NULL, payload BLOB NOT NULL)"
+            )
+            self._disk.execute("CREATE INDEX IF NOT EXISTS chat_cache_expires_at ON chat_cache (expires_at)")
+            self._disk.execute("DELETE FROM chat_cache WHERE expires_at < ?", (time.time(),))
+            self._disk.commit()
+            self._disk_size = self._disk_bytes()
+
+    @staticmethod
+    def make_key(backend: str, model_name: str, messages: List[Dict[str, Any]], options: Optional[Dict[str, Any]]) -> str:
+        """Canonical hash of everything that determines a deterministic response."""
+        canonical = json.dumps(
+            [backend.lower(), model_name, messages, options or {}],
+            sort_keys=True,
+            separators=(",", ":"),
+            ensure_ascii=False,
+            default=str,
+        )
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Blocking lookup, for callers outside the event loop."""
+        now = time.time()
+        payload = self._memory_get(key, now)
+        if payload is None and self._disk is not None:
+            payload = self._disk_get(key, now)
+        if payload is None:
+            self._miss()
+        return payload
+
+    async def aget(self, key: str) -> Optional[bytes]:
+        now = time.time()
+        payload = self._memory_get(key, now)
+        if payload is None and self._disk is not None:
+            payload = await asyncio.to_thread(self._disk_get, key, now)
+        if payload is None:
+            self._miss()
+        return payload
+
+    def set(self, key: str, payload: bytes) -> None:
+        """Blocking store, for callers outside the event loop."""
+        expires_at = self._memory_set(key, payload)
+        if expires_at is not None and self._disk is not None:
+            self._disk_set(key, expires_at, payload)
+
+    async def aset(self, key: str, payload: bytes) -> None:
+        expires_at = self._memory_set(key, payload)
+        if expires_at is not None and self._disk is not None:
+            await asyncio.to_thread(self._disk_set, key, expires_at, payload)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+        if self._disk is not None:
+            with self._disk_lock:
+                self._disk.execute("DELETE FROM chat_cache")
+                self._disk.commit()
+                self._disk_size = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._size,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "disk_bytes": self._disk_size,
+                "disk_evictions": self.disk_evictions,
+            }
+
+    def close(self) -> None:
+        if self._disk is not None:
+            with self._disk_lock:
+                self._disk.close()
+                self._disk = None
+
+    def _memory_get(self, key: str, now: float) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, payload = entry
+            if expires_at > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return payload
+            self._remove(key)
+            return None
+
+    def _memory_set(self, key: str, payload: bytes) -> Optional[float]:
+        """Store in memory; returns the expiry, or None when the payload is too large to cache."""
+        if len(payload) > self.max_bytes:
+            return None
+        expires_at = time.time() + self.ttl
+        with self._lock:
+            self._store(key, expires_at, payload)
+        return expires_at
+
+    def _miss(self) -> None:
+        with self._lock:
+            self.misses += 1
+
+    def _disk_get(self, key: str, now: float) -> Optional[bytes]:
+        with self._disk_lock:
+            if self._disk is None:
+                return None
+            row = self._disk.execute("SELECT expires_at, payload FROM chat_cache WHERE key = ?", (key,)).fetchone()
+        if row is None or row[0] <= now:
+            return None
+        payload = bytes(row[1])
+        with self._lock:
+            self._store(key, row[0], payload)
+            self.disk_hits += 1
+        return payload
+
+    def _disk_set(self, key: str, expires_at: float, payload: bytes) -> None:
+        with self._disk_lock:
+            if self._disk is None:
+                return
+            previous = self._disk.execute("SELECT length(payload) FROM chat_cache WHERE key = ?", (key,)).fetchone()
+            self._disk.execute(
+                "INSERT OR REPLACE INTO chat_cache (key, expires_at, payload) VALUES (?, ?, ?)",
+                (key, expires_at, payload),
+            )
+            self._disk_size += len(payload) - (previous[0] if previous else 0)
+            self._disk_evict(time.time())
+            self._disk.commit()
+
+    def _disk_evict(self, now: float) -> None:
+        """Drop expired rows, then, past disk_max_bytes, the rows closest to expiry down to 90% of it."""
+        expired = self._disk.execute("SELECT COUNT(*), COALESCE(SUM(length(payload)), 0) FROM chat_cache WHERE expires_at < ?", (now,)).fetchone()
+        if expired[0]:
+            self._disk.execute("DELETE FROM chat_cache WHERE expires_at < ?", (now,))
+            self._disk_size -= expired[1]
+            self.disk_evictions += expired[0]
+        if self._disk_size <= self.disk_max_bytes:
+            return
+        target = self.disk_max_bytes * 0.9
+        while self._disk_size > target:
+            rows = self._disk.execute("SELECT key, length(payload) FROM chat_cache ORDER BY expires_at LIMIT 100").fetchall()
+            if not rows:
+                break
+            for key, size in rows:
+                if self._disk_size <= target:
+                    break
+                self._disk.execute("DELETE FROM chat_cache WHERE key = ?", (key,))
+                self._disk_size -= size
+                self.disk_evictions += 1
+
+    def _disk_bytes(self) -> int:
+        return self._disk.execute("SELECT COALESCE(SUM(length(payload)), 0) FROM chat_cache").fetchone()[0]
+
+    def _store(self, key: str, expires_at: float, payload: bytes) -> None:
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (expires_at, payload)
+        self._size += len(payload)
+        while len(self._entries) > self.max_entries or self._size > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def _remove(self, key: str) -> None:
+        _, payload = self._entries.pop(key)
+        self._size -= len(payload)
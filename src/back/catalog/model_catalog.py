@@ -0,0 +1,124 @@
+# model_catalog.py
+# Cached, normalised list of the models served by every backend
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi.encoders import jsonable_encoder
+
+from concurrency.calls import call_client
+from concurrency.singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+def normalise_models(backend: str, raw: Any) -> List[Dict[str, Any]]:
+    """Map an Ollama ListResponse or a Groq ModelListResponse to catalogue entries."""
+    data = jsonable_encoder(raw)
+    if isinstance(data, dict):
+        items = data.get("models") or data.get("data") or []
+    else:
+        items = data or []
+    entries = []
+    for item in items:
+        details = item.get("details") or {}
+        entries.append({
+            "name": item.get("model") or item.get("name") or item.get("id"),
+            "backend": backend,
+            "size": item.get("size"),
+            "context_window": item.get("context_window"),
+            "family": details.get("family") or item.get("owned_by"),
+            "modified_at": item.get("modified_at") or item.get("created"),
+        })
+    return entries
+
+class ModelCatalog:
+    """Model list fetched from each backend and refreshed in the background.
+
+    A backend that fails to answer keeps its previous entries; while one
+    has never answered, no model name is rejected. The ETag
+    changes only when the normalised list changes. start() fetches the list
+    in the background right away, so startup does not wait for backends.
+    """
+
+    def __init__(self, sources: List[Tuple[str, Any]], ttl: float = 300.0):
+        self.sources = sources
+        self.ttl = ttl
+        self._entries: Dict[str, List[Dict[str, Any]]] = {}
+        self._names: set = set()
+        self.etag: Optional[str] = None
+        self.updated_at: Optional[float] = None
+        self.errors: Dict[str, str] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._flights = SingleFlight()
+
+    async def refresh(self) -> None:
+        """Fetch every backend's models; concurrent callers share one refresh."""
+        await self._flights.do("refresh", self._refresh)
+
+    async def _refresh(self) -> None:
+        for backend, instance in self.sources:
+            try:
+                raw = await call_client(instance.list_models)
+                self._entries[backend] = normalise_models(backend, raw)
+                self.errors.pop(backend, None)
+            except Exception as e:
+                self.errors[backend] = str(e)
+                logger.warning("could not list models on %s: %s", backend, e)
+        models = self.models()
+        self._names = {entry["name"] for entry in models}
+        digest = hashlib.sha1(json.dumps(models, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+        self.etag = f'"{digest}"'
+        self.updated_at = time.time()
+
+    def models(self) -> List[Dict[str, Any]]:
+        return [entry for backend, _ in self.sources for entry in self._entries.get(backend, [])]
+
+    def is_loaded(self) -> bool:
+        return bool(self._entries)
+
+    def unlisted(self) -> List[str]:
+        """Backends that never listed their models; a failing backend with a previous list keeps it."""
+        return [backend for backend, _ in self.sources if backend not in self._entries]
+
+    def is_known(self, model_name: str) -> bool:
+        """Whether a model may exist; True for any name while a backend's list is missing."""
+        if self.unlisted():
+            return True
+        if model_name in self._names:
+            return True
+        # Ollama treats "qwen3" as "qwen3:latest"
+        return ":" not in model_name and f"{model_name}:latest" in self._names
+
+    def context_window(self, model_name: str) -> Optional[int]:
+        """Context window reported by the backend (Groq does, Ollama's list does not)."""
+        for entry in self.models():
+            if entry["name"] in (model_name, f"{model_name}:latest") and entry["context_window"]:
+                return entry["context_window"]
+        return None
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"models": self.models(), "updated_at": self.updated_at, "errors": dict(self.errors), "unlisted": self.unlisted()}
+
+    async def run(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.warning("model catalogue refresh failed: %s", e)
+            await asyncio.sleep(self.ttl)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
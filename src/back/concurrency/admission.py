@@ -0,0 +1,147 @@
+# admission.py
+# Per-backend and per-model admission control with a bounded priority queue
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+# Lower value is served first
+PRIORITIES = {"interactive": 0, "normal": 1, "batch": 2}
+
+Ticket = Tuple[str, str, float]
+# (priority, arrival sequence, enqueued at, backend, model, future)
+QueueEntry = Tuple[int, int, float, str, str, asyncio.Future]
+
+class AdmissionRejected(Exception):
+    """Raised when a request can not be admitted, with the HTTP status to answer."""
+
+    def __init__(self, message: str, status_code: int, retry_after: int):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+class AdmissionController:
+    """Limit concurrent backend calls and queue the excess by priority.
+
+    A call runs when both its backend and its model are under their
+    concurrency limit. Otherwise it waits in a bounded queue ordered by
+    priority then arrival. A full queue is rejected immediately (429) and a
+    wait longer than `queue_timeout` is abandoned (503), both with a
+    Retry-After estimate based on the observed service time.
+    """
+
+    def __init__(self, backend_limit: int = 16, model_limit: int = 4, model_limits: Optional[Dict[str, int]] = None, max_queue: int = 64, queue_timeout: float = 30.0):
+        self.backend_limit = backend_limit
+        self.model_limit = model_limit
+        self.model_limits = model_limits or {}
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._active_backend: Dict[str, int] = defaultdict(int)
+        self._active_model: Dict[str, int] = defaultdict(int)
+        self._queue: List[QueueEntry] = []
+        self._seq = itertools.count()
+        self._service_time = 1.0
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.wait_count = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    async def acquire(self, backend: str, model: str, priority: int = PRIORITIES["normal"]) -> Ticket:
+        # queued waiters are always blocked after a dispatch, so a call that
+        # can run right now does not jump ahead of anyone who could
+        if self._can_run(backend, model):
+            return self._grant(backend, model, 0.0)
+        if len(self._queue) >= self.max_queue:
+            self.rejected += 1
+            raise AdmissionRejected("Admission queue is full", 429, self.retry_after())
+
+        future = asyncio.get_running_loop().create_future()
+        enqueued_at = time.monotonic()
+        entry = (priority, next(self._seq), enqueued_at, backend, model, future)
+        heapq.heappush(self._queue, entry)
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._abandon(entry)
+            self.timed_out += 1
+            self._record_wait(time.monotonic() - enqueued_at)
+            raise AdmissionRejected("Timed out waiting for a backend slot", 503, self.retry_after())
+        except asyncio.CancelledError:
+            self._abandon(entry)
+            raise
+
+    def release(self, ticket: Ticket) -> None:
+        backend, model, granted_at = ticket
+        self._active_backend[backend] -= 1
+        self._active_model[model] -= 1
+        elapsed = time.monotonic() - granted_at
+        self._service_time = 0.8 * self._service_time + 0.2 * elapsed
+        self._dispatch()
+
+    def retry_after(self) -> int:
+        return max(1, math.ceil(self._service_time * (len(self._queue) + 1) / self.backend_limit))
+
+    def stats(self) -> Dict[str, Any]:
+        names = {value: name for name, value in PRIORITIES.items()}
+        by_priority: Dict[str, int] = {name: 0 for name in PRIORITIES}
+        for entry in self._queue:
+            name = names.get(entry[0], str(entry[0]))
+            by_priority[name] = by_priority.get(name, 0) + 1
+        return {
+            "queue_depth": len(self._queue),
+            "queue_depth_by_priority": by_priority,
+            "max_queue": self.max_queue,
+            "active_by_backend": {k: v for k, v in self._active_backend.items() if v},
+            "active_by_model": {k: v for k, v in self._active_model.items() if v},
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "wait_seconds": {"count": self.wait_count, "total": self.wait_total, "max": self.wait_max},
+        }
+
+    def _can_run(self, backend: str, model: str) -> bool:
+        model_limit = self.model_limits.get(model, self.model_limit)
+        return self._active_backend[backend] < self.backend_limit and self._active_model[model] < model_limit
+
+    def _grant(self, backend: str, model: str, waited: float) -> Ticket:
+        self._active_backend[backend] += 1
+        self._active_model[model] += 1
+        self.admitted += 1
+        self._record_wait(waited)
+        return (backend, model, time.monotonic())
+
+    def _record_wait(self, waited: float) -> None:
+        self.wait_count += 1
+        self.wait_total += waited
+        self.wait_max = max(self.wait_max, waited)
+
+    def _dispatch(self) -> None:
+        # walk the whole queue in priority order so a waiter blocked on a busy
+        # model does not hold back waiters for other models
+        granted = set()
+        for entry in sorted(self._queue):
+            _, seq, enqueued_at, backend, model, future = entry
+            if future.done():
+                granted.add(seq)
+            elif self._can_run(backend, model):
+                future.set_result(self._grant(backend, model, time.monotonic() - enqueued_at))
+                granted.add(seq)
+        if granted:
+            self._queue = [entry for entry in self._queue if entry[1] not in granted]
+            heapq.heapify(self._queue)
+
+    def _abandon(self, entry: QueueEntry) -> None:
+        future = entry[5]
+        if future.done() and not future.cancelled():
+            # the slot was granted while we were giving up: hand it back
+            self.release(future.result())
+            return
+        future.cancel()
+        if entry in self._queue:
+            self._queue.remove(entry)
+            heapq.heapify(self._queue)
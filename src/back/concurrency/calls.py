@@ -0,0 +1,61 @@
+# calls.py
+# Call sync or async backend clients without blocking the event loop
+import asyncio
+import inspect
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi.concurrency import run_in_threadpool
+
+# StopIteration can not cross a future, the end of a blocking stream is this sentinel
+_END = object()
+
+def _next_chunk(iterator):
+    try:
+        return next(iterator)
+    except StopIteration:
+        return _END
+
+async def call_client(method, *args, **kwargs):
+    """Await async client methods, run blocking ones in the threadpool."""
+    if inspect.iscoroutinefunction(method):
+        return await method(*args, **kwargs)
+    return await run_in_threadpool(method, *args, **kwargs)
+
+async def stream_client(method, *args, **kwargs):
+    """Iterate async or blocking client streams without blocking the event loop.
+
+    The backend stream is always closed on exit, including when the consumer
+    is cancelled, so an abandoned generation releases its backend connection.
+    """
+    if inspect.isasyncgenfunction(method):
+        stream = method(*args, **kwargs)
+        try:
+            async for chunk in stream:
+                yield chunk
+        finally:
+            await stream.aclose()
+    else:
+        iterator = method(*args, **kwargs)
+        # next() and close() run on one thread of their own: closing a generator
+        # from another thread while next() still runs raises "generator already executing"
+        worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="stream_client")
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                chunk = await loop.run_in_executor(worker, _next_chunk, iterator)
+                if chunk is _END:
+                    break
+                yield chunk
+        finally:
+            close = getattr(iterator, "close", None)
+            # queued behind a next() still running after a cancellation
+            closed = loop.run_in_executor(worker, close) if close is not None else None
+            worker.shutdown(wait=False)
+            if closed is not None:
+                await closed
+
+async def close_client(instance) -> None:
+    """Close a client created by get_client, whatever its mode."""
+    close = getattr(instance, "close", None)
+    if close is not None:
+        await call_client(close)
@@ -0,0 +1,122 @@
+# budget.py
+# Fit chat history into a model's context window, keeping the system prompt
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from context.tokens import MESSAGE_OVERHEAD, count_text_tokens
+
+class TokenCounter:
+    """Memoised per-message token counts.
+
+    The bot resends nearly the same history on every message, so counts are
+    cached by content and only the new message is actually counted.
+    """
+
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self._counts: "OrderedDict[str, int]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def count(self, message: Dict[str, Any]) -> int:
+        content = str(message.get("content", ""))
+        tokens = self._counts.get(content)
+        if tokens is not None:
+            self._counts.move_to_end(content)
+            self.hits += 1
+            return tokens + MESSAGE_OVERHEAD
+        self.misses += 1
+        tokens = count_text_tokens(content)
+        self._counts[content] = tokens
+        if len(self._counts) > self.max_entries:
+            self._counts.popitem(last=False)
+        return tokens + MESSAGE_OVERHEAD
+
+class ContextBudget:
+    """Drop or summarise the oldest turns so a prompt fits its model's window.
+
+    Leading system messages and the newest message are always kept. Older
+    turns are removed oldest first until the prompt plus `output_reserve`
+    tokens fits. In "summarise" mode the removed turns are replaced by one
+    system message quoting the start of the most recent of them, within
+    `summary_tokens` and the room left in the budget.
+    """
+
+    def __init__(self, default_window: int = 8192, windows: Optional[Dict[str, int]] = None, output_reserve: int = 512, mode: str = "drop", summary_tokens: int = 256, summary_line_chars: int = 160):
+        if mode not in ("drop", "summarise"):
+            raise ValueError(f"Unknown context trimming mode: {mode}")
+        self.default_window = default_window
+        self.windows = windows or {}
+        self.output_reserve = output_reserve
+        self.mode = mode
+        self.summary_tokens = summary_tokens
+        self.summary_line_chars = summary_line_chars
+        self.counter = TokenCounter()
+        self.requests = 0
+        self.trimmed_requests = 0
+        self.dropped_messages = 0
+
+    def window(self, model_name: str, reported: Optional[int] = None) -> int:
+        """Configured window of a model, else the one its backend reports, else the default."""
+        return self.windows.get(model_name) or reported or self.default_window
+
+    def target(self, window: int) -> int:
+        return max(window - self.output_reserve, 0)
+
+    def fit(self, messages: List[Dict[str, Any]], window: int) -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
+        """Return the messages to send and a {"tokens", "dropped"} report."""
+        self.requests += 1
+        budget = self.target(window)
+        counts = [self.counter.count(message) for message in messages]
+        total = sum(counts)
+        if total <= budget or len(messages) < 2:
+            return messages, {"tokens": total, "dropped": 0}
+
+        pinned = 0
+        while pinned < len(messages) - 1 and messages[pinned].get("role") == "system":
+            pinned += 1
+        # drop history from the oldest turn after the pinned system messages,
+        # leaving room for the summary that replaces it
+        limit = budget - self.summary_tokens if self.mode == "summarise" else budget
+        start = pinned
+        while total > limit and start < len(messages) - 1:
+            total -= counts[start]
+            start += 1
+        dropped = messages[pinned:start]
+        kept = messages[:pinned] + messages[start:]
+
+        if self.mode == "summarise" and dropped:
+            summary = self.summarise(dropped, min(self.summary_tokens, budget - total))
+            if summary is not None:
+                kept.insert(pinned, summary)
+                total += self.counter.count(summary)
+
+        self.trimmed_requests += 1
+        self.dropped_messages += len(dropped)
+        return kept, {"tokens": total, "dropped": len(dropped)}
+
+    def summarise(self, dropped: List[Dict[str, Any]], tokens: int) -> Optional[Dict[str, str]]:
+        """Extractive summary: the start of the most recent dropped turns, within `tokens`."""
+        header = "Earlier messages, abbreviated:"
+        lines: List[str] = []
+        for message in reversed(dropped):
+            text = " ".join(str(message.get("content", "")).split())
+            if len(text) > self.summary_line_chars:
+                text = text[:self.summary_line_chars - 3].rstrip() + "..."
+            line = f"- {message.get('role', 'user')}: {text}"
+            if count_text_tokens("\n".join([header, line] + lines)) + MESSAGE_OVERHEAD > tokens:
+                break
+            lines.insert(0, line)
+        if not lines:
+            return None
+        return {"role": "system", "content": "\n".join([header] + lines)}
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "requests": self.requests,
+            "trimmed_requests": self.trimmed_requests,
+            "dropped_messages": self.dropped_messages,
+            "token_cache_hits": self.counter.hits,
+            "token_cache_misses": self.counter.misses,
+        }
@@ -0,0 +1,18 @@
+# tokens.py
+# Fast token count estimates for chat messages
+from typing import Any, Dict, List
+
+# chat templates add a few tokens of framing around every message
+MESSAGE_OVERHEAD = 4
+# French and English text average roughly 3.5 characters per token
+CHARS_PER_TOKEN = 3.5
+
+def count_text_tokens(text: str) -> int:
+    """Heuristic token count of a piece of text."""
+    if not text:
+        return 0
+    return int(len(text) / CHARS_PER_TOKEN) + 1
+
+def count_message_tokens(messages: List[Dict[str, Any]]) -> int:
+    """Heuristic token count of a list of chat messages."""
+    return sum(count_text_tokens(str(message.get("content", ""))) + MESSAGE_OVERHEAD for message in messages)
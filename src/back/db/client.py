@@ -1,19 +1,32 @@
 import os
 import asyncio
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy import text
-from datetime import datetime
+import base64
+import logging
+import time
+import re
+import threading
+from datetime import date, datetime
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
 
-class DBClient:
-    def __init__(self, db_url:str = os.getenv("DB_URL", None)):
-        if not db_url:
-            raise Exception("No DB URL")
-        self.engine = create_async_engine(db_url)
-        self.AsyncSessionLocal = sessionmaker(self.engine, class_=AsyncSession)
-
-    def get_system_prompt(self):
-        system_prompt = """SYSTEM PROMPT — Aletheia
+logger = logging.getLogger(__name__)
+
+DEFAULT_PROMPT_NAME = "aletheia"
+# LongTermMemory columns written by the memory writer, the id is generated
+MEMORY_COLUMNS = ("content", "author", "timestamp", "source", "tags")
+# columns loaded by import_memories, import_key is the natural key re-imports skip on
+IMPORT_COLUMNS = MEMORY_COLUMNS + ("import_key",)
+# every stored LongTermMemory column, content_tsv is generated
+STORED_MEMORY_COLUMNS = ("id",) + IMPORT_COLUMNS + ("compacted_from",)
+# LongTermMemory is partitioned by month; rows of a month without partition land in the default one
+MEMORY_DEFAULT_PARTITION = "LongTermMemory_default"
+# schema detached partitions are moved to when they are archived rather than dropped
+MEMORY_ARCHIVE_SCHEMA = "memory_archive"
+_PARTITION_NAME = re.compile(r"^LongTermMemory_y(\d{4})m(\d{2})$")
+# date_trunc units memories can be compacted by
+COMPACTION_WINDOWS = ("day", "week", "month")
+
+# Served as version 0 until the SystemPrompt table holds a version of the prompt
+DEFAULT_SYSTEM_PROMPT = """SYSTEM PROMPT — Aletheia
 Identité: Aletheia, VTubeuse IA francophone. Gentille, drôle, légèrement taquine. Calme et pédagogue. Virtuelle, non incarnée. Répond toujours en français.
 But: Classer les souvenirs du chat et de l’entourage dans un “datalore” et les tisser en micro-histoires cohérentes.
 Style: Texte simple uniquement. Pas d’emojis ni tableaux. 1–4 phrases, 6 max pour mini-histoires. Taquinerie bienveillante. Corrige brièvement les erreurs factuelles.
@@ -27,23 +40,553 @@ Tu dois absolument répondre au format JSON, le 'JSON schema' est le suivant:
     "want_to_speak": "boolean (TRUE si tu souhaites t'exprimer, sinon ta réponse sera ignorer comme si tu ne parlais pas)",
     "content": "string (ce que tu veux dire explicitement, seul ce contenu sera retenu)"
 }"""
-        return system_prompt
-""" 
-    async def write_memory(self, content: str, author: str, source: str = None, tags: list[str] = None):
-        async with self.AsyncSessionLocal() as session:
-            memory = LongTermMemory(
-                content=content,
-                author=author,
-                timestamp=datetime.now(),
-                source=source,
-                tags=tags
-            )
-            session.add(memory)
+
+def encode_memory_cursor(timestamp: datetime, memory_id: int) -> str:
+    """Opaque /memories cursor for the (timestamp, id) key of the last row of a page."""
+    return base64.urlsafe_b64encode(f"{timestamp.isoformat()}|{memory_id}".encode("utf-8")).decode("ascii")
+
+def decode_memory_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Raises ValueError for a cursor that encode_memory_cursor did not produce."""
+    try:
+        timestamp, memory_id = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8").split("|")
+        return datetime.fromisoformat(timestamp), int(memory_id)
+    except (UnicodeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+def add_months(month: date, count: int) -> date:
+    """First day of the month `count` months after the month of `month`."""
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+def memory_partition_name(month: date) -> str:
+    return f"LongTermMemory_y{month.year:04d}m{month.month:02d}"
+
+def memory_partition_month(name: str) -> Optional[date]:
+    """Month of a partition named by memory_partition_name, None for other tables."""
+    match = _PARTITION_NAME.match(name)
+    return date(int(match.group(1)), int(match.group(2)), 1) if match else None
+
+def fulltext_query(query: Optional[str] = None, tags: Optional[List[str]] = None, any_tag: bool = False, author: Optional[str] = None, source: Optional[str] = None, limit: int = 20, since: Optional[datetime] = None, until: Optional[datetime] = None) -> Tuple[str, Dict[str, Any]]:
+    """SQL and parameters of a keyword and tag search over LongTermMemory.
+
+    `query` takes web search syntax ("thé vert", thé or café, -froid) and
+    is matched with the GIN index on content_tsv, so "chats" finds "chat".
+    A memory must carry every tag, or one of them with `any_tag`; the GIN
+    index on tags serves both. Without a query the newest come first.
+    `since` and `until` bound the timestamps, so only the partitions of
+    those months are searched.
+    """
+    columns = "id, content, author, timestamp, source, tags"
+    tables = '"LongTermMemory"'
+    conditions = []
+    params: Dict[str, Any] = {"limit": limit}
+    if query:
+        columns += ", ts_rank_cd(content_tsv, query) AS rank"
+        tables += ", websearch_to_tsquery('french', :query) AS query"
+        conditions.append("content_tsv @@ query")
+        params["query"] = query
+    if tags:
+        conditions.append(f"tags {'&&' if any_tag else '@>'} CAST(:tags AS VARCHAR(50)[])")
+        params["tags"] = list(tags)
+    if author is not None:
+        conditions.append("author = :author")
+        params["author"] = author
+    if source is not None:
+        conditions.append("source = :source")
+        params["source"] = source
+    conditions += _time_bounds(params, since, until)
+    command = f"SELECT {columns} FROM {tables}"
+    if conditions:
+        command += " WHERE " + " AND ".join(conditions)
+    command += " ORDER BY rank DESC, timestamp DESC" if query else " ORDER BY timestamp DESC"
+    return command + " LIMIT :limit", params
+
+def _time_bounds(params: Dict[str, Any], since: Optional[datetime], until: Optional[datetime]) -> List[str]:
+    """Conditions on timestamp that let Postgres skip the partitions out of range."""
+    conditions = []
+    if since is not None:
+        conditions.append("timestamp >= :since")
+        params["since"] = since
+    if until is not None:
+        conditions.append("timestamp < :until")
+        params["until"] = until
+    return conditions
+
+class _NothingToArchive(Exception):
+    pass
+
+def _text(statement: str):
+    from sqlalchemy import text
+    return text(statement)
+
+class DBClient:
+    """Database access. SQLAlchemy and the engine are only loaded on first use,
+    so importing the API does not need a database."""
+
+    def __init__(self, db_url: Optional[str] = None):
+        self.db_url = db_url if db_url is not None else os.getenv("DB_URL", None)
+        self._engine = None
+        self._sessions = None
+        self._observers: List[Callable[[float, str], None]] = []
+        # connect() builds the engine in a worker thread while the loop may already use it
+        self._engine_lock = threading.Lock()
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.db_url)
+
+    @property
+    def engine(self):
+        if self._engine is not None:
+            return self._engine
+        with self._engine_lock:
+            if self._engine is None:
+                if not self.db_url:
+                    raise Exception("No DB URL")
+                from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+                from sqlalchemy.orm import sessionmaker
+                engine = create_async_engine(self.db_url)
+                self._sessions = sessionmaker(engine, class_=AsyncSession)
+                for observe in self._observers:
+                    self._listen(engine, observe)
+                self._engine = engine
+        return self._engine
+
+    @property
+    def AsyncSessionLocal(self):
+        self.engine
+        return self._sessions
+
+    async def connect(self) -> None:
+        """Load the engine off the event loop, then check the database answers."""
+        await asyncio.to_thread(lambda: self.engine)
+        await self.ping()
+
+    async def ping(self) -> None:
+        async with self.AsyncSessionLocal() as session:
+            await session.execute(_text("SELECT 1"))
+
+    async def close(self) -> None:
+        if self._engine is not None:
+            await self._engine.dispose()
+
+    def instrument(self, observe: Callable[[float, str], None]):
+        """Report every query duration as observe(seconds, statement verb)."""
+        with self._engine_lock:
+            self._observers.append(observe)
+            if self._engine is not None:
+                self._listen(self._engine, observe)
+
+    def _listen(self, engine, observe: Callable[[float, str], None]) -> None:
+        from sqlalchemy import event
+        sync_engine = engine.sync_engine
+
+        @event.listens_for(sync_engine, "before_cursor_execute")
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+        @event.listens_for(sync_engine, "after_cursor_execute")
+        def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            started = conn.info["query_started"].pop()
+            verb = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "OTHER"
+            observe(time.perf_counter() - started, verb)
+
+        @event.listens_for(sync_engine, "handle_error")
+        def handle_error(context):
+            # a failed query never reaches after_cursor_execute
+            conn = context.connection
+            if conn is not None and conn.info.get("query_started"):
+                conn.info["query_started"].pop()
+
+    async def get_system_prompt(self, name: str = DEFAULT_PROMPT_NAME, version: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """A system prompt version, the latest one when no version is given."""
+        query = """SELECT id, name, version, content, created_at FROM "SystemPrompt" WHERE name = :name"""
+        params: Dict[str, Any] = {"name": name}
+        if version is not None:
+            query += " AND version = :version"
+            params["version"] = version
+        query += " ORDER BY version DESC LIMIT 1"
+        async with self.AsyncSessionLocal() as session:
+            row = (await session.execute(_text(query), params)).mappings().first()
+        return dict(row) if row is not None else None
+
+    async def get_system_prompt_by_id(self, prompt_id: int) -> Optional[Dict[str, Any]]:
+        async with self.AsyncSessionLocal() as session:
+            command = _text("""SELECT id, name, version, content, created_at FROM "SystemPrompt" WHERE id = :id""")
+            row = (await session.execute(command, {"id": prompt_id})).mappings().first()
+        return dict(row) if row is not None else None
+
+    async def latest_system_prompt_version(self, name: str = DEFAULT_PROMPT_NAME) -> Optional[int]:
+        """Cheap check used to revalidate cached prompts."""
+        async with self.AsyncSessionLocal() as session:
+            command = _text("""SELECT MAX(version) FROM "SystemPrompt" WHERE name = :name""")
+            return (await session.execute(command, {"name": name})).scalar()
+
+    async def create_system_prompt(self, name: str, content: str) -> Dict[str, Any]:
+        """Store a new version of a prompt; versions are never modified."""
+        async with self.AsyncSessionLocal() as session:
+            command = _text("""INSERT INTO "SystemPrompt" (name, version, content)
+                SELECT :name, COALESCE(MAX(version), 0) + 1, :content FROM "SystemPrompt" WHERE name = :name
+                RETURNING id, name, version, content, created_at""")
+            row = (await session.execute(command, {"name": name, "content": content})).mappings().one()
             await session.commit()
+        return dict(row)
+
+    async def write_memories(self, memories: List[Dict[str, Any]]) -> int:
+        """Insert memories in one transaction, with COPY when the driver is asyncpg."""
+        if not memories:
+            return 0
+        async with self.engine.begin() as conn:
+            if conn.dialect.driver == "asyncpg":
+                raw = await conn.get_raw_connection()
+                records = [tuple(memory.get(column) for column in MEMORY_COLUMNS) for memory in memories]
+                await raw.driver_connection.copy_records_to_table("LongTermMemory", records=records, columns=list(MEMORY_COLUMNS))
+            else:
+                columns = ", ".join(MEMORY_COLUMNS)
+                values = ", ".join(f":{column}" for column in MEMORY_COLUMNS)
+                await conn.execute(_text(f"""INSERT INTO "LongTermMemory" ({columns}) VALUES ({values})"""), memories)
+        return len(memories)
+
+    async def import_memories(self, memories: List[Dict[str, Any]]) -> int:
+        """Insert memories whose import_key is not stored yet; returns how many were inserted.
 
-    async def read_memories(self):
+        On asyncpg the batch is copied into a temporary table, then moved
+        with INSERT ... ON CONFLICT DO NOTHING, so COPY speed is kept while
+        rows already imported are skipped.
+        """
+        if not memories:
+            return 0
+        columns = ", ".join(IMPORT_COLUMNS)
+        async with self.engine.begin() as conn:
+            if conn.dialect.driver == "asyncpg":
+                await conn.execute(_text("""CREATE TEMPORARY TABLE memory_import (
+                    content TEXT, author VARCHAR(255), timestamp TIMESTAMP, source VARCHAR(255), tags VARCHAR(50)[], import_key VARCHAR(40)
+                ) ON COMMIT DROP"""))
+                raw = await conn.get_raw_connection()
+                records = [tuple(memory.get(column) for column in IMPORT_COLUMNS) for memory in memories]
+                await raw.driver_connection.copy_records_to_table("memory_import", records=records, columns=list(IMPORT_COLUMNS))
+                command = _text(f"""INSERT INTO "LongTermMemory" ({columns}) SELECT {columns} FROM memory_import
+                    ON CONFLICT (import_key, timestamp) DO NOTHING""")
+                return (await conn.execute(command)).rowcount
+            values = ", ".join(f":{column}" for column in IMPORT_COLUMNS)
+            command = _text(f"""INSERT INTO "LongTermMemory" ({columns}) VALUES ({values}) ON CONFLICT (import_key, timestamp) DO NOTHING""")
+            return (await conn.execute(command, memories)).rowcount
+
+    async def read_memories(self, after: Optional[Tuple[datetime, int]] = None, limit: int = 100, author: Optional[str] = None, source: Optional[str] = None, since: Optional[datetime] = None, until: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """One page of memories in (timestamp, id) order, after the given key.
+
+        Keyset pagination: the (timestamp, id) index serves any page as a
+        range scan, however deep, instead of sorting the whole table. The
+        cursor and `since`/`until` bound the timestamps, so the partitions
+        before the cursor or out of range are not read.
+        """
+        conditions = []
+        params: Dict[str, Any] = {"limit": limit}
+        if after is not None:
+            # the redundant bound on timestamp alone is what partition pruning understands
+            conditions.append("timestamp >= :after_timestamp AND (timestamp, id) > (:after_timestamp, :after_id)")
+            params["after_timestamp"], params["after_id"] = after
+        if author is not None:
+            conditions.append("author = :author")
+            params["author"] = author
+        if source is not None:
+            conditions.append("source = :source")
+            params["source"] = source
+        conditions += _time_bounds(params, since, until)
+        query = 'SELECT id, content, author, timestamp, source, tags FROM "LongTermMemory"'
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY timestamp, id LIMIT :limit"
+        async with self.AsyncSessionLocal() as session:
+            rows = (await session.execute(_text(query), params)).mappings().all()
+        return [dict(row) for row in rows]
+
+    async def iter_memories(self, page_size: int = 1000, author: Optional[str] = None, source: Optional[str] = None, since: Optional[datetime] = None, until: Optional[datetime] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Every matching memory, read one page at a time so memory use stays flat."""
+        after = None
+        while True:
+            page = await self.read_memories(after, page_size, author, source, since, until)
+            for row in page:
+                yield row
+            if len(page) < page_size:
+                return
+            after = (page[-1]["timestamp"], page[-1]["id"])
+
+    async def search_memories_text(self, query: Optional[str] = None, tags: Optional[List[str]] = None, any_tag: bool = False, author: Optional[str] = None, source: Optional[str] = None, limit: int = 20, since: Optional[datetime] = None, until: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """Memories matching a French keyword query, best ranked first; see fulltext_query."""
+        command, params = fulltext_query(query, tags, any_tag, author, source, limit, since, until)
+        async with self.AsyncSessionLocal() as session:
+            rows = (await session.execute(_text(command), params)).mappings().all()
+        return [dict(row) for row in rows]
+
+    async def read_memories_after_id(self, after_id: int, limit: int) -> List[Dict[str, Any]]:
+        """Memories in id order above `after_id`, for incremental indexing."""
+        async with self.AsyncSessionLocal() as session:
+            command = _text("""SELECT id, content FROM "LongTermMemory" WHERE id > :after_id ORDER BY id LIMIT :limit""")
+            rows = (await session.execute(command, {"after_id": after_id, "limit": limit})).mappings().all()
+        return [dict(row) for row in rows]
+
+    async def get_memories(self, ids: List[int]) -> List[Dict[str, Any]]:
+        if not ids:
+            return []
+        async with self.AsyncSessionLocal() as session:
+            command = _text("""SELECT id, content, author, timestamp, source, tags FROM "LongTermMemory" WHERE id = ANY(:ids)""")
+            rows = (await session.execute(command, {"ids": list(ids)})).mappings().all()
+        return [dict(row) for row in rows]
+
+    async def compaction_groups(self, before: datetime, window: str, min_size: int, limit: int) -> List[Dict[str, Any]]:
+        """Groups of at least `min_size` raw memories older than `before`, oldest window first.
+
+        Memories are grouped by author, source, first tag ("" without tags)
+        and the `window` they fall in. Summaries are never grouped again.
+        """
+        if window not in COMPACTION_WINDOWS:
+            raise ValueError(f"Unknown compaction window: {window}")
+        async with self.AsyncSessionLocal() as session:
+            command = _text(f"""SELECT author, source, COALESCE(tags[1], '') AS tag, date_trunc('{window}', timestamp) AS window_start, COUNT(*) AS memories
+                FROM "LongTermMemory" WHERE timestamp < :before AND compacted_from IS NULL
+                GROUP BY 1, 2, 3, 4 HAVING COUNT(*) >= :min_size
+                ORDER BY window_start, author LIMIT :limit""")
+            rows = (await session.execute(command, {"before": before, "min_size": min_size, "limit": limit})).mappings().all()
+        return [dict(row) for row in rows]
+
+    async def compaction_group(self, author: str, source: Optional[str], tag: str, start: datetime, end: datetime, before: datetime, limit: int) -> List[Dict[str, Any]]:
+        """The raw memories of one group older than `before`, oldest first.
+
+        `before` is the cutoff compaction_groups counted with, so a window
+        straddling it only yields the memories old enough to compact.
+        """
+        async with self.AsyncSessionLocal() as session:
+            command = _text("""SELECT id, content, timestamp, tags FROM "LongTermMemory"
+                WHERE author = :author AND source IS NOT DISTINCT FROM :source AND COALESCE(tags[1], '') = :tag
+                AND timestamp >= :start AND timestamp < LEAST(:end, :before) AND compacted_from IS NULL
+                ORDER BY timestamp, id LIMIT :limit""")
+            params = {"author": author, "source": source, "tag": tag, "start": start, "end": end, "before": before, "limit": limit}
+            rows = (await session.execute(command, params)).mappings().all()
+        return [dict(row) for row in rows]
+
+    async def replace_with_summary(self, summary: Dict[str, Any], memory_ids: List[int], start: Optional[datetime] = None, end: Optional[datetime] = None) -> Optional[int]:
+        """Insert a summary memory and archive the memories it replaces, in one transaction.
+
+        `start` and `end` bound the timestamps of the memories, so only their
+        partitions are searched. Returns the summary id, or None without
+        writing anything when another run archived every one of these
+        memories first.
+        """
+        try:
+            return await self._replace_with_summary(summary, memory_ids, start, end)
+        except _NothingToArchive:
+            return None
+
+    async def _replace_with_summary(self, summary: Dict[str, Any], memory_ids: List[int], start: Optional[datetime], end: Optional[datetime]) -> int:
+        async with self.engine.begin() as conn:
+            command = _text("""INSERT INTO "LongTermMemory" (content, author, timestamp, source, tags, compacted_from)
+                VALUES (:content, :author, :timestamp, :source, :tags, :compacted_from) RETURNING id""")
+            summary_id = (await conn.execute(command, {**summary, "compacted_from": len(memory_ids)})).scalar_one()
+            params = {"ids": list(memory_ids), "summary_id": summary_id}
+            conditions = " ".join(f"AND {condition}" for condition in _time_bounds(params, start, end))
+            command = _text(f"""WITH moved AS (
+                    DELETE FROM "LongTermMemory" WHERE id = ANY(:ids) AND compacted_from IS NULL {conditions}
+                    RETURNING id, content, author, timestamp, source, tags
+                )
+                INSERT INTO "LongTermMemoryArchive" (id, content, author, timestamp, source, tags, summary_id)
+                SELECT id, content, author, timestamp, source, tags, :summary_id FROM moved""")
+            moved = (await conn.execute(command, params)).rowcount
+            if moved == 0:
+                # leaving the block with an exception rolls the summary back
+                raise _NothingToArchive()
+            if moved < len(memory_ids):
+                command = _text("""UPDATE "LongTermMemory" SET compacted_from = :moved WHERE id = :summary_id""")
+                await conn.execute(command, {"moved": moved, "summary_id": summary_id})
+        return summary_id
+
+    async def memory_partitions(self) -> List[Dict[str, Any]]:
+        """Partitions of LongTermMemory with their month (None for the default one), size and row estimate."""
+        async with self.AsyncSessionLocal() as session:
+            command = _text("""SELECT c.relname AS name, GREATEST(c.reltuples, 0)::bigint AS rows_estimate, pg_total_relation_size(c.oid) AS bytes
+                FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+                WHERE i.inhparent = '"LongTermMemory"'::regclass ORDER BY c.relname""")
+            rows = (await session.execute(command)).mappings().all()
+        return [{**row, "month": memory_partition_month(row["name"])} for row in rows]
+
+    async def default_partition_months(self) -> List[date]:
+        """Months that have rows in the default partition, i.e. no partition of their own."""
         async with self.AsyncSessionLocal() as session:
-            command = text(\"""SELECT * FROM "LongTermMemory" ORDER BY timestamp ASC\""")
-            result = await session.execute(command)
-            return result.all()
- """
\ No newline at end of file
+            command = _text(f"""SELECT DISTINCT date_trunc('month', timestamp)::date AS month FROM "{MEMORY_DEFAULT_PARTITION}" ORDER BY month""")
+            return list((await session.execute(command)).scalars().all())
+
+    async def create_memory_partition(self, month: date) -> Optional[int]:
+        """Create the partition of `month`; returns the rows moved into it, None if it existed.
+
+        Rows of that month already in the default partition are moved in the
+        same transaction: the default partition is detached, emptied of them
+        and attached again, which locks LongTermMemory until it commits.
+        """
+        name = memory_partition_name(month)
+        # the bounds are dates formatted here, DDL takes no bind parameters
+        bounds = f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+        params = {"start": month, "end": add_months(month, 1)}
+        in_month = "timestamp >= :start AND timestamp < :end"
+        columns = ", ".join(STORED_MEMORY_COLUMNS)
+        async with self.engine.begin() as conn:
+            await conn.execute(_text("SET LOCAL lock_timeout = '5s'"))
+            if (await conn.execute(_text("SELECT to_regclass(:name)"), {"name": f'"{name}"'})).scalar() is not None:
+                return None
+            stray = (await conn.execute(_text(f'SELECT COUNT(*) FROM "{MEMORY_DEFAULT_PARTITION}" WHERE {in_month}'), params)).scalar()
+            if not stray:
+                await conn.execute(_text(f'CREATE TABLE "{name}" PARTITION OF "LongTermMemory" {bounds}'))
+                return 0
+            await conn.execute(_text(f'ALTER TABLE "LongTermMemory" DETACH PARTITION "{MEMORY_DEFAULT_PARTITION}"'))
+            await conn.execute(_text(f'CREATE TABLE "{name}" PARTITION OF "LongTermMemory" {bounds}'))
+            await conn.execute(_text(f'INSERT INTO "LongTermMemory" ({columns}) SELECT {columns} FROM "{MEMORY_DEFAULT_PARTITION}" WHERE {in_month}'), params)
+            await conn.execute(_text(f'DELETE FROM "{MEMORY_DEFAULT_PARTITION}" WHERE {in_month}'), params)
+            await conn.execute(_text(f'ALTER TABLE "LongTermMemory" ATTACH PARTITION "{MEMORY_DEFAULT_PARTITION}" DEFAULT'))
+        return stray
+
+    async def detach_memory_partition(self, month: date, drop: bool = False) -> None:
+        """Take the partition of `month` out of LongTermMemory, then drop it or move it to the archive schema."""
+        name = memory_partition_name(month)
+        async with self.engine.begin() as conn:
+            await conn.execute(_text("SET LOCAL lock_timeout = '5s'"))
+            # CONCURRENTLY is not allowed next to a default partition; a plain detach only touches the catalog
+            await conn.execute(_text(f'ALTER TABLE "LongTermMemory" DETACH PARTITION "{name}"'))
+            if drop:
+                await conn.execute(_text(f'DROP TABLE "{name}"'))
+            else:
+                await conn.execute(_text(f'CREATE SCHEMA IF NOT EXISTS {MEMORY_ARCHIVE_SCHEMA}'))
+                await conn.execute(_text(f'ALTER TABLE "{name}" SET SCHEMA {MEMORY_ARCHIVE_SCHEMA}'))
+
+class MemoryBufferFull(Exception):
+    """Raised when the write-behind buffer stayed full for the whole wait."""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class MemoryWriter:
+    """Write-behind buffer for LongTermMemory rows.
+
+    put() returns as soon as the memory is buffered. A background task
+    writes the buffer in batches of `batch_size` rows whenever a batch is
+    full or `flush_interval` seconds have passed. A batch that fails stays
+    buffered and is retried on the next flush. While `max_buffer` memories
+    wait, put() blocks up to `put_timeout` seconds for room, then raises
+    MemoryBufferFull. drain() stops accepting memories and writes the rest.
+    """
+
+    def __init__(self, db: DBClient, batch_size: int = 500, flush_interval: float = 1.0, max_buffer: int = 10000, put_timeout: float = 5.0):
+        self.db = db
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self.put_timeout = put_timeout
+        self._buffer: List[Dict[str, Any]] = []
+        self._space = asyncio.Condition()
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._closed = False
+        # called with the number of rows after each written batch, e.g. to index them
+        self.on_flush: Optional[Callable[[int], None]] = None
+        self.written = 0
+        self.batches = 0
+        self.failures = 0
+        self.rejected = 0
+        self.waits = 0
+
+    async def put(self, content: str, author: str, source: Optional[str] = None, tags: Optional[List[str]] = None, timestamp: Optional[datetime] = None) -> None:
+        if self._closed:
+            raise RuntimeError("Memory writer is closed")
+        if len(self._buffer) >= self.max_buffer:
+            self.waits += 1
+        deadline = time.monotonic() + self.put_timeout
+        # other writers woken by the same flush may take the room first, so check again after every wait
+        while len(self._buffer) >= self.max_buffer:
+            self._wakeup.set()
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining <= 0:
+                    raise asyncio.TimeoutError
+                await asyncio.wait_for(self._wait_for_space(), remaining)
+            except asyncio.TimeoutError:
+                self.rejected += 1
+                raise MemoryBufferFull("Memory buffer is full", max(int(self.flush_interval), 1))
+            if self._closed:
+                raise RuntimeError("Memory writer is closed")
+        # keep when the memory was made, not when it is written
+        self._buffer.append({
+            "content": content,
+            "author": author,
+            "timestamp": timestamp or datetime.now(),
+            "source": source,
+            "tags": tags,
+        })
+        if len(self._buffer) >= self.batch_size:
+            self._wakeup.set()
+
+    async def _wait_for_space(self) -> None:
+        async with self._space:
+            await self._space.wait_for(lambda: len(self._buffer) < self.max_buffer)
+
+    async def flush(self) -> int:
+        """Write everything buffered so far; returns the number of rows written."""
+        written = 0
+        async with self._flush_lock:
+            while self._buffer:
+                batch = self._buffer[:self.batch_size]
+                await self.db.write_memories(batch)
+                # memories put during the write were appended after the batch
+                del self._buffer[:len(batch)]
+                written += len(batch)
+                self.written += len(batch)
+                self.batches += 1
+                async with self._space:
+                    self._space.notify_all()
+                if self.on_flush is not None:
+                    self.on_flush(len(batch))
+        return written
+
+    async def run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                self.failures += 1
+                logger.warning("memory flush failed, %d memories kept for the next one: %s", len(self._buffer), e)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            # a batch cancelled after its write committed would stay buffered and be written twice,
+            # so the task is only cancelled between flushes
+            async with self._flush_lock:
+                self._task.cancel()
+                try:
+                    await self._task
+                except asyncio.CancelledError:
+                    pass
+            self._task = None
+
+    async def drain(self) -> int:
+        """Stop accepting memories and write the buffer, for shutdown."""
+        self._closed = True
+        await self.stop()
+        return await self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "buffered": len(self._buffer),
+            "written": self.written,
+            "batches": self.batches,
+            "failures": self.failures,
+            "rejected": self.rejected,
+            "backpressure_waits": self.waits,
+        }
@@ -0,0 +1,219 @@
+# compaction.py
+# Roll old LongTermMemory rows up into summary memories under a token budget
+import asyncio
+import calendar
+import logging
+import re
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from context.tokens import CHARS_PER_TOKEN, count_text_tokens
+from routing.responses import response_text, response_usage
+
+logger = logging.getLogger(__name__)
+
+ChatCall = Callable[[str, List[Dict[str, str]], Optional[Dict[str, Any]]], Awaitable[Any]]
+
+_THINK_BLOCK = re.compile(r"<think>.*?</think>", re.DOTALL)
+
+SUMMARY_PROMPT = (
+    "Tu résumes des souvenirs d'Aletheia pour son datalore. Écris en français un résumé factuel "
+    "de quelques phrases : qui, quoi, quand. Garde les noms, les goûts et les événements marquants, "
+    "n'invente rien et ne commente pas. Réponds uniquement par le résumé."
+)
+
+def window_end(start: datetime, window: str) -> datetime:
+    if window == "day":
+        return start + timedelta(days=1)
+    if window == "week":
+        return start + timedelta(days=7)
+    days = calendar.monthrange(start.year, start.month)[1]
+    return start + timedelta(days=days)
+
+class CompactionRunning(Exception):
+    pass
+
+class MemoryCompactor:
+    """Replace old memories with summaries, group by group.
+
+    A run lists the groups of at least `min_group` memories older than
+    `min_age_days` that share author, source, first tag and `window`,
+    oldest first. The oldest memories of a group, up to `max_input_tokens`,
+    are summarised by `model`; the summary is inserted and those memories
+    are moved to LongTermMemoryArchive in one transaction. Each group is
+    committed on its own, so a run that stops half way or runs out of
+    budget leaves the rest for the next run, and the memories left in a
+    large group are picked up again.
+
+    At most `concurrency` summaries are generated at once and a run stops
+    starting new ones once `token_budget` tokens (prompt plus completion)
+    are spent. A group reserves the most it can cost before reading its
+    memories, then keeps only the estimate of its chunk and finally its
+    reported usage.
+
+    `on_archive(ids)`, when set, is awaited with the ids of every archived
+    chunk, e.g. to drop them from the vector index.
+    """
+
+    def __init__(self, db, chat: ChatCall, model: str, window: str = "week", min_age_days: float = 30, min_group: int = 5, max_input_tokens: int = 3000, summary_tokens: int = 300, concurrency: int = 2, token_budget: int = 200000, max_groups: int = 100, interval: float = 3600):
+        self.db = db
+        self.chat = chat
+        self.model = model
+        self.window = window
+        self.min_age_days = min_age_days
+        self.min_group = min_group
+        self.max_input_tokens = max_input_tokens
+        self.summary_tokens = summary_tokens
+        self.concurrency = concurrency
+        self.token_budget = token_budget
+        self.max_groups = max_groups
+        self.interval = interval
+        self._running = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.on_archive: Optional[Callable[[List[int]], Awaitable[Any]]] = None
+        self.runs = 0
+        self.summaries = 0
+        self.archived = 0
+        self.tokens = 0
+        self.failures = 0
+        self.last_run: Optional[Dict[str, Any]] = None
+
+    async def run_once(self) -> Dict[str, Any]:
+        """Compact what the budget allows; raises CompactionRunning during another run."""
+        if self._running.locked():
+            raise CompactionRunning("A compaction run is in progress")
+        async with self._running:
+            report = {"started_at": datetime.now(), "groups": 0, "summaries": 0, "archived": 0, "tokens": 0, "failures": 0, "budget_exhausted": False}
+            before = datetime.now() - timedelta(days=self.min_age_days)
+            groups = await self.db.compaction_groups(before, self.window, self.min_group, self.max_groups)
+            report["groups"] = len(groups)
+            semaphore = asyncio.Semaphore(self.concurrency)
+
+            async def compact(group: Dict[str, Any]) -> None:
+                async with semaphore:
+                    if report["tokens"] >= self.token_budget:
+                        report["budget_exhausted"] = True
+                        return
+                    # no await between the check and the reservation, so concurrent groups see it
+                    reserved = self.max_input_tokens + count_text_tokens(SUMMARY_PROMPT) + self.summary_tokens
+                    report["tokens"] += reserved
+                    try:
+                        await self._compact_group(group, before, report, reserved)
+                    except Exception as e:
+                        report["failures"] += 1
+                        logger.warning("could not compact %s/%s/%s from %s: %s", group["author"], group["source"], group["tag"], group["window_start"], e)
+
+            await asyncio.gather(*(compact(group) for group in groups))
+            self.runs += 1
+            self.summaries += report["summaries"]
+            self.archived += report["archived"]
+            self.tokens += report["tokens"]
+            self.failures += report["failures"]
+            self.last_run = report
+            return report
+
+    async def _compact_group(self, group: Dict[str, Any], before: datetime, report: Dict[str, Any], reserved: int) -> None:
+        """Summarise one group; `reserved` tokens are already counted in the report."""
+        start = group["window_start"]
+        end = window_end(start, self.window)
+        refund = reserved
+        try:
+            memories = await self.db.compaction_group(group["author"], group["source"], group["tag"], start, end, before, limit=1000)
+            chunk = self._within_budget(memories)
+            if len(chunk) < self.min_group:
+                return
+            messages = [
+                {"role": "system", "content": SUMMARY_PROMPT},
+                {"role": "user", "content": "\n".join(f"- [{memory['timestamp']:%Y-%m-%d %H:%M}] {memory['content']}" for memory in chunk)},
+            ]
+            estimate = sum(count_text_tokens(message["content"]) for message in messages) + self.summary_tokens
+            # a failed call may still have spent the estimate, so it is kept from here on
+            refund = reserved - estimate
+        finally:
+            report["tokens"] -= refund
+        response = await self.chat(self.model, messages, {"num_predict": self.summary_tokens, "temperature": 0.2})
+        prompt_tokens, completion_tokens = response_usage(response)
+        if prompt_tokens is not None and completion_tokens is not None:
+            report["tokens"] += prompt_tokens + completion_tokens - estimate
+        summary = _THINK_BLOCK.sub("", response_text(response)).strip()
+        if not summary:
+            raise ValueError("empty summary")
+
+        tags = []
+        for memory in chunk:
+            for tag in memory["tags"] or []:
+                if tag not in tags:
+                    tags.append(tag)
+        summary_id = await self.db.replace_with_summary({
+            "content": summary,
+            "author": group["author"],
+            "timestamp": chunk[-1]["timestamp"],
+            "source": group["source"],
+            "tags": tags or None,
+        }, [memory["id"] for memory in chunk], start, end)
+        if summary_id is not None:
+            report["summaries"] += 1
+            report["archived"] += len(chunk)
+            if self.on_archive is not None:
+                try:
+                    await self.on_archive([memory["id"] for memory in chunk])
+                except Exception as e:
+                    # the summary is committed, searches skip the archived rows anyway
+                    logger.warning("could not forget %d archived memories: %s", len(chunk), e)
+
+    def _within_budget(self, memories: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """The oldest memories whose text fits in max_input_tokens.
+
+        A memory longer than max_input_tokens / min_group is cut to that
+        share, so any group compaction_groups lists (min_group memories or
+        more) yields a chunk large enough to compact, and is not listed
+        again on every run.
+        """
+        share = self.max_input_tokens // self.min_group
+        limit = max(int((share - 10) * CHARS_PER_TOKEN), 0)
+        chunk, tokens = [], 0
+        for memory in memories:
+            if count_text_tokens(memory["content"]) + 8 > share:
+                memory = {**memory, "content": memory["content"][:limit].rstrip() + "…"}
+            tokens += count_text_tokens(memory["content"]) + 8
+            if tokens > self.max_input_tokens:
+                break
+            chunk.append(memory)
+        return chunk
+
+    async def run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.run_once()
+            except CompactionRunning:
+                pass
+            except Exception as e:
+                self.failures += 1
+                logger.warning("memory compaction failed: %s", e)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self._running.locked(),
+            "model": self.model,
+            "window": self.window,
+            "runs": self.runs,
+            "summaries": self.summaries,
+            "archived": self.archived,
+            "tokens": self.tokens,
+            "failures": self.failures,
+            "last_run": self.last_run,
+        }
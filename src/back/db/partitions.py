@@ -0,0 +1,95 @@
+# partitions.py
+# Create upcoming LongTermMemory partitions and retire the old ones
+import asyncio
+import logging
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+from db.client import add_months, memory_partition_name
+
+logger = logging.getLogger(__name__)
+
+class PartitionMaintainer:
+    """Monthly partition upkeep for LongTermMemory.
+
+    Each run creates the partitions of the current month and the
+    `months_ahead` next ones, and gives a partition to every month found
+    in the default partition (imports of old messages land there), moving
+    its rows. With `retain_months`, partitions of months older than that
+    are detached, then moved to the memory_archive schema, or dropped
+    with `drop_detached`.
+    """
+
+    def __init__(self, db, months_ahead: int = 3, retain_months: int = 0, drop_detached: bool = False, interval: float = 86400):
+        self.db = db
+        self.months_ahead = months_ahead
+        self.retain_months = retain_months
+        self.drop_detached = drop_detached
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+        self.runs = 0
+        self.failures = 0
+        self.created: List[str] = []
+        self.detached: List[str] = []
+        self.last_run: Optional[Dict[str, Any]] = None
+
+    async def run_once(self, today: Optional[date] = None) -> Dict[str, Any]:
+        month = (today or date.today()).replace(day=1)
+        report = {"created": [], "moved_rows": 0, "detached": []}
+        months = {add_months(month, offset) for offset in range(self.months_ahead + 1)}
+        months.update(await self.db.default_partition_months())
+        for wanted in sorted(months):
+            moved = await self.db.create_memory_partition(wanted)
+            if moved is not None:
+                report["created"].append(memory_partition_name(wanted))
+                report["moved_rows"] += moved
+        if self.retain_months:
+            oldest_kept = add_months(month, -self.retain_months)
+            for partition in await self.db.memory_partitions():
+                if partition["month"] is not None and partition["month"] < oldest_kept:
+                    await self.db.detach_memory_partition(partition["month"], self.drop_detached)
+                    report["detached"].append(partition["name"])
+        self.runs += 1
+        self.created += report["created"]
+        self.detached += report["detached"]
+        self.last_run = report
+        return report
+
+    async def run(self) -> None:
+        while True:
+            delay = self.interval
+            try:
+                report = await self.run_once()
+                if report["created"] or report["detached"]:
+                    logger.info("memory partitions created: %s, detached: %s", report["created"], report["detached"])
+            except Exception as e:
+                self.failures += 1
+                # the database may not be up yet, do not wait a whole interval
+                delay = min(self.interval, 60)
+                logger.warning("memory partition upkeep failed: %s", e)
+            await asyncio.sleep(delay)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "months_ahead": self.months_ahead,
+            "retain_months": self.retain_months,
+            "drop_detached": self.drop_detached,
+            "runs": self.runs,
+            "failures": self.failures,
+            "created": self.created,
+            "detached": self.detached,
+            "last_run": self.last_run,
+        }
@@ -0,0 +1,121 @@
+# prompt_store.py
+# In-process cache of the versioned system prompts stored in the database
+import hashlib
+import logging
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from concurrency.singleflight import SingleFlight
+from db.client import DEFAULT_PROMPT_NAME, DEFAULT_SYSTEM_PROMPT
+
+logger = logging.getLogger(__name__)
+
+class PromptNotFound(Exception):
+    pass
+
+def prompt_etag(prompt: Dict[str, Any]) -> str:
+    digest = hashlib.sha1(prompt["content"].encode("utf-8")).hexdigest()[:16]
+    return f'"{prompt["name"]}-v{prompt["version"]}-{digest}"'
+
+class SystemPromptStore:
+    """Versioned prompts cached in memory.
+
+    Versions never change once written, so a (name, version) or id lookup
+    hits the database once. "Latest version" lookups are revalidated with a
+    MAX(version) query at most every `ttl` seconds, and immediately after a
+    new version is created through this store. Concurrent revalidations of
+    the same name share one query.
+
+    The built-in Aletheia prompt is served as version 0 while the table holds
+    no version of it, or while the database can not be reached.
+    """
+
+    def __init__(self, db, ttl: float = 30.0):
+        self.db = db
+        self.ttl = ttl
+        self._versions: Dict[Tuple[str, int], Dict[str, Any]] = {}
+        self._by_id: Dict[int, Dict[str, Any]] = {}
+        self._latest: Dict[str, Tuple[float, int]] = {}
+        self._flights = SingleFlight()
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, name: str = DEFAULT_PROMPT_NAME, version: Optional[int] = None, prompt_id: Optional[int] = None) -> Dict[str, Any]:
+        """The requested prompt with its "etag"; raises PromptNotFound."""
+        if prompt_id is not None:
+            return await self._get_by_id(prompt_id)
+        if version is None:
+            version = await self._latest_version(name)
+        cached = self._versions.get((name, version))
+        if cached is not None:
+            self.hits += 1
+            return cached
+        self.misses += 1
+        if version == 0 and name == DEFAULT_PROMPT_NAME:
+            return self._remember(builtin_prompt())
+        row = await self.db.get_system_prompt(name, version)
+        if row is None:
+            raise PromptNotFound(f"No system prompt {name} version {version}")
+        return self._remember(row)
+
+    async def create(self, name: str, content: str) -> Dict[str, Any]:
+        prompt = self._remember(await self.db.create_system_prompt(name, content))
+        self._latest[name] = (time.monotonic(), prompt["version"])
+        return prompt
+
+    def invalidate(self, name: Optional[str] = None) -> None:
+        """Force the next latest-version lookup to ask the database."""
+        if name is None:
+            self._latest.clear()
+        else:
+            self._latest.pop(name, None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "cached_versions": len(self._versions),
+            "latest": {name: version for name, (_, version) in self._latest.items()},
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    async def _latest_version(self, name: str) -> int:
+        checked = self._latest.get(name)
+        if checked is not None and time.monotonic() - checked[0] < self.ttl:
+            return checked[1]
+        return await self._flights.do(("latest", name), lambda: self._fetch_latest_version(name))
+
+    async def _fetch_latest_version(self, name: str) -> int:
+        try:
+            version = await self.db.latest_system_prompt_version(name)
+        except Exception as e:
+            if name != DEFAULT_PROMPT_NAME:
+                raise
+            logger.warning("could not read system prompt versions, serving the built-in prompt: %s", e)
+            version = None
+        if version is None:
+            if name != DEFAULT_PROMPT_NAME:
+                raise PromptNotFound(f"No system prompt named {name}")
+            version = 0
+        self._latest[name] = (time.monotonic(), version)
+        return version
+
+    async def _get_by_id(self, prompt_id: int) -> Dict[str, Any]:
+        cached = self._by_id.get(prompt_id)
+        if cached is not None:
+            self.hits += 1
+            return cached
+        self.misses += 1
+        row = await self.db.get_system_prompt_by_id(prompt_id)
+        if row is None:
+            raise PromptNotFound(f"No system prompt with id {prompt_id}")
+        return self._remember(row)
+
+    def _remember(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        prompt = {**row, "etag": prompt_etag(row)}
+        self._versions[(prompt["name"], prompt["version"])] = prompt
+        if prompt.get("id") is not None:
+            self._by_id[prompt["id"]] = prompt
+        return prompt
+
+def builtin_prompt() -> Dict[str, Any]:
+    return {"id": None, "name": DEFAULT_PROMPT_NAME, "version": 0, "content": DEFAULT_SYSTEM_PROMPT, "created_at": None}
@@ -1,10 +1,51 @@
 # client.py
 # Interface for interacting with Ollama models
-from groq import Groq
+from groq import Groq, AsyncGroq
 import os
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Iterator, AsyncIterator
 from dotenv import load_dotenv
 
+def _chat_params(options: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Extract the seed, response_format and max_tokens supported by Groq from the request options."""
+    params: Dict[str, Any] = {"seed": 42, "response_format": None}
+    if options:
+        if 'seed' in options.keys():
+            try:
+                params["seed"] = int(options['seed'])
+            except Exception as e:
+                pass
+        if 'response_format' in options.keys():
+            try:
+                params["response_format"] = dict(options['response_format'])
+            except Exception as e:
+                pass
+        # Ollama's completion cap, e.g. the summary length asked by memory compaction
+        if 'num_predict' in options.keys():
+            try:
+                params["max_tokens"] = int(options['num_predict'])
+            except Exception as e:
+                pass
+    return params
+
+def _stream_chunk(part) -> Dict[str, Any]:
+    """Normalise a streamed Groq completion chunk into the API chunk schema."""
+    choice = part.choices[0] if part.choices else None
+    finish_reason = choice.finish_reason if choice else None
+    chunk = {
+        "model": part.model,
+        "delta": (choice.delta.content if choice else None) or "",
+        "done": finish_reason is not None,
+    }
+    if finish_reason is not None:
+        chunk["finish_reason"] = finish_reason
+        usage = part.x_groq.usage if part.x_groq and part.x_groq.usage else part.usage
+        if usage:
+            chunk["usage"] = {
+                "prompt_tokens": usage.prompt_tokens,
+                "completion_tokens": usage.completion_tokens,
+            }
+    return chunk
+
 class GroqClient:
     def __init__(self, api_key: str = os.getenv('GROQ_API_KEY', None)):
         if not api_key:
@@ -19,7 +60,7 @@ class GroqClient:
 
     def list_models(self) -> List[Dict[str, Any]]:
         """List available models."""
-        return Groq.models
+        return self.client.models.list()
 
     def pull_model(self, model_name: str) -> None:
         """Pull a model from the Ollama repository."""
@@ -31,20 +72,63 @@ class GroqClient:
 
     def chat(self, model_name: str, messages: List[Dict[str, str]], options: Optional[Dict[str, Any]] = None):
         """Generate a chat response from the model."""
-        seed = 42
-        response_format = None
-        if options:
-            if 'seed' in options.keys():
-                try:
-                    seed = int(options['seed'])
-                except Exception as e:
-                    pass
-            if 'response_format' in options.keys():
-                try:
-                    response_format = dict(options['response_format'])
-                except Exception as e:
-                    pass
-        return self.client.chat.completions.create(messages=messages, model=model_name, seed=seed, stream=False, response_format=response_format)
+        return self.client.chat.completions.create(messages=messages, model=model_name, stream=False, **_chat_params(options))
+
+    def chat_stream(self, model_name: str, messages: List[Dict[str, str]], options: Optional[Dict[str, Any]] = None) -> Iterator[Dict[str, Any]]:
+        """Stream a chat response as normalised chunks."""
+        stream = self.client.chat.completions.create(messages=messages, model=model_name, stream=True, **_chat_params(options))
+        try:
+            for part in stream:
+                yield _stream_chunk(part)
+        finally:
+            stream.close()
+
+    def close(self) -> None:
+        """Release the underlying HTTP connections."""
+        self.client.close()
+
+class AsyncGroqClient:
+    """Async counterpart of GroqClient backed by a single pooled AsyncGroq instance."""
+
+    def __init__(self, api_key: str = os.getenv('GROQ_API_KEY', None)):
+        if not api_key:
+            raise Exception("Missing an API Key")
+        self.client: AsyncGroq = AsyncGroq(
+            api_key=api_key,
+            max_retries=2,
+            default_headers={
+            "Groq-Model-Version": "latest"
+            }
+        )
+
+    async def list_models(self) -> List[Dict[str, Any]]:
+        """List available models."""
+        return await self.client.models.list()
+
+    async def pull_model(self, model_name: str) -> None:
+        """Pull a model from the Ollama repository."""
+        raise Exception("Can't pull model on Groq")
+
+    async def warm_model(self, model_name: str) -> None:
+        """Warm up a model to reduce initial latency."""
+        raise Exception("No need to warm model on Groq")
+
+    async def chat(self, model_name: str, messages: List[Dict[str, str]], options: Optional[Dict[str, Any]] = None):
+        """Generate a chat response from the model."""
+        return await self.client.chat.completions.create(messages=messages, model=model_name, stream=False, **_chat_params(options))
+
+    async def chat_stream(self, model_name: str, messages: List[Dict[str, str]], options: Optional[Dict[str, Any]] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Stream a chat response as normalised chunks."""
+        stream = await self.client.chat.completions.create(messages=messages, model=model_name, stream=True, **_chat_params(options))
+        try:
+            async for part in stream:
+                yield _stream_chunk(part)
+        finally:
+            await stream.close()
+
+    async def close(self) -> None:
+        """Release the pooled HTTP connections."""
+        await self.client.close()
 
 if __name__ == "__main__":
     load_dotenv(".env")
@@ -54,4 +138,4 @@ if __name__ == "__main__":
     #client.pull_model(model_name)
     #print("DEBUG:",client.warm_model(model_name))
     response = client.chat(model_name, [{"role": "user", "content": "Hello, how are you?"}])
-    print("Response:", response)
\ No newline at end of file
+    print("Response:", response)
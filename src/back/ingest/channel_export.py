@@ -0,0 +1,148 @@
+# channel_export.py
+# Load the JSON exports of gather_channel_data into LongTermMemory in COPY batches
+import argparse
+import asyncio
+import hashlib
+import os
+import re
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, AsyncIterable, AsyncIterator, Dict, List, Optional
+
+from ingest.json_stream import iter_json_array, read_text_pieces
+
+# gather_channel_data saves channel_{id}_data.json
+EXPORT_NAME = re.compile(r"channel_(\d+)_data\.json$")
+# LongTermMemory.tags holds VARCHAR(50)
+TAG_LENGTH = 50
+
+def export_source(channel_id: str) -> str:
+    return f"discord:{channel_id}"
+
+def channel_id_from_path(path: Path) -> Optional[str]:
+    match = EXPORT_NAME.search(Path(path).name)
+    return match.group(1) if match else None
+
+def memory_import_key(source: str, author: str, timestamp: datetime, content: str) -> str:
+    """Natural key of an imported message; the export carries no message id."""
+    return hashlib.sha1(f"{source}\x00{author}\x00{timestamp.isoformat()}\x00{content}".encode("utf-8")).hexdigest()
+
+def export_memory(record: Dict[str, Any], source: str) -> Optional[Dict[str, Any]]:
+    """LongTermMemory row of one exported message, None when it has nothing to keep.
+
+    Attachment URLs and sticker names are appended to the content; reactions
+    and stickers become "reaction:<emoji>" and "sticker:<name>" tags. Export
+    timestamps are UTC and stored without their offset. Raises KeyError,
+    TypeError or ValueError for a record that is not a message.
+    """
+    parts = [record.get("content") or ""]
+    parts += record.get("attachments") or []
+    stickers = record.get("stickers") or []
+    parts += [f"[sticker: {name}]" for name in stickers]
+    content = "\n".join(part for part in parts if part).strip()
+    if not content:
+        return None
+    author = str(record["author"])
+    timestamp = datetime.fromisoformat(record["timestamp"])
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+
+    tags: List[str] = []
+    # reactions are exported as [{emoji: count}, ...]
+    candidates = [f"reaction:{emoji}" for reaction in record.get("reactions") or [] for emoji in reaction]
+    candidates += [f"sticker:{name}" for name in stickers]
+    for tag in candidates:
+        tag = tag[:TAG_LENGTH]
+        if tag not in tags:
+            tags.append(tag)
+    return {
+        "content": content,
+        "author": author,
+        "timestamp": timestamp,
+        "source": source,
+        "tags": tags or None,
+        "import_key": memory_import_key(source, author, timestamp, content),
+    }
+
+async def import_records(db, records: AsyncIterable[Any], source: str, batch_size: int = 5000) -> Dict[str, Any]:
+    """Import exported messages as they are parsed, `batch_size` rows per transaction.
+
+    Messages already imported are skipped through their import_key, so an
+    import that failed half way can simply be run again.
+    """
+    report = {"source": source, "read": 0, "empty": 0, "invalid": 0, "inserted": 0, "duplicates": 0}
+    started = time.perf_counter()
+    batch: List[Dict[str, Any]] = []
+
+    async def flush(memories: List[Dict[str, Any]]) -> None:
+        inserted = await db.import_memories(memories)
+        report["inserted"] += inserted
+        report["duplicates"] += len(memories) - inserted
+
+    async for record in records:
+        report["read"] += 1
+        try:
+            memory = export_memory(record, source)
+        except (AttributeError, KeyError, TypeError, ValueError):
+            report["invalid"] += 1
+            continue
+        if memory is None:
+            report["empty"] += 1
+            continue
+        batch.append(memory)
+        if len(batch) >= batch_size:
+            await flush(batch)
+            batch = []
+    if batch:
+        await flush(batch)
+    elapsed = time.perf_counter() - started
+    report["seconds"] = round(elapsed, 3)
+    report["rows_per_second"] = round(report["read"] / elapsed, 1) if elapsed else None
+    return report
+
+async def file_records(path: Path) -> AsyncIterator[Any]:
+    for record in iter_json_array(read_text_pieces(path)):
+        yield record
+
+async def run(args) -> List[Dict[str, Any]]:
+    from db.client import DBClient
+
+    db = DBClient(args.db_url)
+    reports = []
+    try:
+        for path in args.paths:
+            channel_id = channel_id_from_path(path)
+            if args.source is None and channel_id is None:
+                raise ValueError(f"{path} is not named channel_<id>_data.json, pass --source")
+            report = await import_records(db, file_records(path), args.source or export_source(channel_id), args.batch_size)
+            print(f"{path}: {report['inserted']} imported, {report['duplicates']} already there, "
+                  f"{report['empty']} empty, {report['invalid']} invalid, {report['rows_per_second']} rows/s")
+            reports.append(report)
+    finally:
+        await db.close()
+    return reports
+
+def parse_args(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Import gather_channel_data exports into LongTermMemory.")
+    parser.add_argument("paths", nargs="+", type=Path, help="channel_<id>_data.json files")
+    parser.add_argument("--source", help="source of the memories, discord:<channel id> by default")
+    parser.add_argument("--db-url", default=os.getenv("DB_URL"), help="defaults to DB_URL")
+    parser.add_argument("--batch-size", type=int, default=5000, help="rows per COPY")
+    return parser.parse_args(argv)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    if not args.db_url:
+        print("set DB_URL or pass --db-url")
+        return 2
+    try:
+        asyncio.run(run(args))
+    except ValueError as e:
+        print(e)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
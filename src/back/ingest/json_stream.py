@@ -0,0 +1,95 @@
+# json_stream.py
+# Incremental parsing of a top-level JSON array, one item at a time
+import codecs
+import json
+from typing import Any, AsyncIterable, AsyncIterator, Iterable, Iterator, List, Union
+
+_WHITESPACE = " \t\n\r"
+
+class JSONArrayReader:
+    """Parse a JSON array fed in pieces, returning each item once it is complete.
+
+    Only the text of the item being read is buffered, so a channel export
+    of any size is parsed in constant memory, unlike json.load.
+    """
+
+    def __init__(self, max_item_chars: int = 1 << 24):
+        self.max_item_chars = max_item_chars
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        # "start", "item_or_end" after "[", "item" after ",", "comma_or_end", "end"
+        self._expect = "start"
+
+    def feed(self, text: str) -> List[Any]:
+        items = []
+        buffer = self._buffer + text
+        position = 0
+        while True:
+            while position < len(buffer) and buffer[position] in _WHITESPACE:
+                position += 1
+            if position == len(buffer):
+                break
+            char = buffer[position]
+            if self._expect == "end":
+                raise ValueError(f"Unexpected data after the JSON array: {buffer[position:position + 20]!r}")
+            if self._expect == "start":
+                if char != "[":
+                    raise ValueError("Expected a JSON array")
+                self._expect = "item_or_end"
+                position += 1
+                continue
+            if self._expect in ("item_or_end", "comma_or_end") and char == "]":
+                self._expect = "end"
+                position += 1
+                continue
+            if self._expect == "comma_or_end":
+                if char != ",":
+                    raise ValueError(f"Expected ',' or ']' in the JSON array, got {char!r}")
+                self._expect = "item"
+                position += 1
+                continue
+            try:
+                item, end = self._decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                # the item is cut by the end of this piece
+                break
+            if end == len(buffer) and not isinstance(item, (dict, list, str)):
+                # a number or literal may go on in the next piece
+                break
+            items.append(item)
+            self._expect = "comma_or_end"
+            position = end
+        self._buffer = buffer[position:]
+        if len(self._buffer) > self.max_item_chars:
+            raise ValueError(f"JSON array item longer than {self.max_item_chars} characters, or malformed")
+        return items
+
+    def close(self) -> None:
+        """Raise ValueError unless the whole array was read."""
+        if self._expect != "end":
+            raise ValueError("The JSON array is incomplete or malformed")
+
+def iter_json_array(pieces: Iterable[str]) -> Iterator[Any]:
+    reader = JSONArrayReader()
+    for piece in pieces:
+        yield from reader.feed(piece)
+    reader.close()
+
+async def aiter_json_array(chunks: AsyncIterable[Union[bytes, str]]) -> AsyncIterator[Any]:
+    """Items of a JSON array received as UTF-8 chunks, e.g. a streamed request body."""
+    reader = JSONArrayReader()
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    async for chunk in chunks:
+        for item in reader.feed(decoder.decode(chunk) if isinstance(chunk, bytes) else chunk):
+            yield item
+    for item in reader.feed(decoder.decode(b"", final=True)):
+        yield item
+    reader.close()
+
+def read_text_pieces(path, size: int = 1 << 16) -> Iterator[str]:
+    with open(path, "r", encoding="utf-8") as handle:
+        while True:
+            piece = handle.read(size)
+            if not piece:
+                return
+            yield piece
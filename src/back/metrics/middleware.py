@@ -0,0 +1,48 @@
+# middleware.py
+# ASGI middleware recording HTTP request latency, in-flight requests and errors
+import time
+
+from metrics.registry import Registry
+
+class MetricsMiddleware:
+    """Time every HTTP request by route template, method and status code.
+
+    Written as plain ASGI rather than BaseHTTPMiddleware so streaming
+    responses are not buffered and the per-request cost stays at a couple of
+    dictionary updates. The route template (e.g. "/models/pull") is read
+    after routing so label cardinality stays bounded.
+    """
+
+    def __init__(self, app, registry: Registry):
+        self.app = app
+        self.latency = registry.histogram("http_request_duration_seconds", "HTTP request latency until the response is fully sent", ("route", "method", "status"))
+        self.in_flight = registry.gauge("http_requests_in_flight", "HTTP requests being served")
+        self.errors = registry.counter("http_request_exceptions_total", "Unhandled exceptions raised by HTTP handlers", ("route", "exception"))
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        self.in_flight.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception as e:
+            self.errors.inc(route_name(scope), type(e).__name__)
+            raise
+        finally:
+            self.in_flight.dec()
+            self.latency.observe(time.perf_counter() - started, route_name(scope), scope["method"], str(status))
+
+def route_name(scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or "other"
@@ -1,7 +1,29 @@
 # client.py
 # Interface for interacting with Ollama models
+import httpx
 import ollama
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Iterator, AsyncIterator, Union
+
+def _stream_chunk(part: ollama.ChatResponse) -> Dict[str, Any]:
+    """Normalise a streamed Ollama chat part into the API chunk schema."""
+    chunk = {
+        "model": part.model,
+        "delta": part.message.content or "",
+        "done": bool(part.done),
+    }
+    if part.done:
+        chunk["finish_reason"] = part.done_reason
+        chunk["usage"] = {
+            "prompt_tokens": part.prompt_eval_count,
+            "completion_tokens": part.eval_count,
+        }
+    return chunk
+
+def _running_models(response: ollama.ProcessResponse) -> List[Dict[str, Any]]:
+    return [
+        {"name": model.model, "size": model.size, "size_vram": model.size_vram, "expires_at": model.expires_at}
+        for model in response.models
+    ]
 
 class OllamaClient:
     def __init__(self, api_url: str = "http://localhost:11434"):
@@ -20,10 +42,94 @@ class OllamaClient:
         result = self.client.generate(model_name, "Hello", think=False)
         return result
 
+    def load_model(self, model_name: str, keep_alive: Union[float, str] = "10m") -> None:
+        """Load a model (an empty prompt generates nothing) and keep it in memory."""
+        self.client.generate(model_name, "", keep_alive=keep_alive)
+
+    def unload_model(self, model_name: str) -> None:
+        """Unload a model from memory."""
+        self.client.generate(model_name, "", keep_alive=0)
+
+    def running_models(self) -> List[Dict[str, Any]]:
+        """List loaded models with their memory footprint."""
+        return _running_models(self.client.ps())
+
     def chat(self, model_name: str, messages: List[Dict[str, str]], options: Optional[Dict[str, Any]] = None) -> ollama.ChatResponse:
         """Generate a chat response from the model."""
         return self.client.chat(model_name, messages, options=options or {})
 
+    def chat_stream(self, model_name: str, messages: List[Dict[str, str]], options: Optional[Dict[str, Any]] = None) -> Iterator[Dict[str, Any]]:
+        """Stream a chat response as normalised chunks."""
+        stream = self.client.chat(model_name, messages, options=options or {}, stream=True)
+        try:
+            for part in stream:
+                yield _stream_chunk(part)
+        finally:
+            # closing the generator closes the HTTP response, which stops the generation
+            stream.close()
+
+    def embed(self, model_name: str, texts: List[str]) -> List[List[float]]:
+        """Embed texts with an embedding model (e.g. nomic-embed-text)."""
+        return self.client.embed(model_name, texts).embeddings
+
+    def close(self) -> None:
+        """Release the underlying HTTP connections."""
+        self.client._client.close()
+
+class AsyncOllamaClient:
+    """Async counterpart of OllamaClient sharing one pooled HTTP connection set."""
+
+    def __init__(self, api_url: str = "http://localhost:11434", max_connections: int = 100):
+        self.client = ollama.AsyncClient(
+            host=api_url,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        )
+
+    async def list_models(self) -> List[Dict[str, Any]]:
+        """List available models."""
+        return await self.client.list()
+
+    async def pull_model(self, model_name: str) -> None:
+        """Pull a model from the Ollama repository."""
+        await self.client.pull(model_name)
+
+    async def warm_model(self, model_name: str) -> None:
+        """Warm up a model to reduce initial latency."""
+        return await self.client.generate(model_name, "Hello", think=False)
+
+    async def load_model(self, model_name: str, keep_alive: Union[float, str] = "10m") -> None:
+        """Load a model (an empty prompt generates nothing) and keep it in memory."""
+        await self.client.generate(model_name, "", keep_alive=keep_alive)
+
+    async def unload_model(self, model_name: str) -> None:
+        """Unload a model from memory."""
+        await self.client.generate(model_name, "", keep_alive=0)
+
+    async def running_models(self) -> List[Dict[str, Any]]:
+        """List loaded models with their memory footprint."""
+        return _running_models(await self.client.ps())
+
+    async def chat(self, model_name: str, messages: List[Dict[str, str]], options: Optional[Dict[str, Any]] = None) -> ollama.ChatResponse:
+        """Generate a chat response from the model."""
+        return await self.client.chat(model_name, messages, options=options or {})
+
+    async def chat_stream(self, model_name: str, messages: List[Dict[str, str]], options: Optional[Dict[str, Any]] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Stream a chat response as normalised chunks."""
+        stream = await self.client.chat(model_name, messages, options=options or {}, stream=True)
+        try:
+            async for part in stream:
+                yield _stream_chunk(part)
+        finally:
+            await stream.aclose()
+
+    async def embed(self, model_name: str, texts: List[str]) -> List[List[float]]:
+        """Embed texts with an embedding model (e.g. nomic-embed-text)."""
+        return (await self.client.embed(model_name, texts)).embeddings
+
+    async def close(self) -> None:
+        """Release the pooled HTTP connections."""
+        await self.client.close()
+
 if __name__ == "__main__":
     client = OllamaClient()
     #print("Available models:", client.list_models())
@@ -31,4 +137,4 @@ if __name__ == "__main__":
     #client.pull_model(model_name)
     #print("DEBUG:",client.warm_model(model_name))
     response = client.chat(model_name, [{"role": "user", "content": "Hello, how are you?"}])
-    print("Response:", response.message.content)
\ No newline at end of file
+    print("Response:", response.message.content)
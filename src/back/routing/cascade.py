@@ -0,0 +1,136 @@
+# cascade.py
+# Answer with a cheap local model first and escalate to a large model on demand
+import json
+import re
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from context.tokens import count_message_tokens, count_text_tokens
+from routing.responses import response_text, response_usage
+
+ChatCall = Callable[[str, List[Dict[str, str]], Optional[Dict[str, Any]]], Awaitable[Any]]
+
+_THINK_BLOCK = re.compile(r"<think>.*?</think>", re.DOTALL)
+
+def parse_json_reply(text: str) -> Optional[Dict[str, Any]]:
+    """Parse the {"want_to_speak", "content"} object, ignoring qwen3 <think> blocks."""
+    text = _THINK_BLOCK.sub("", text)
+    start, end = text.find("{"), text.rfind("}")
+    if start == -1 or end < start:
+        return None
+    try:
+        parsed = json.loads(text[start:end + 1])
+    except ValueError:
+        return None
+    return parsed if isinstance(parsed, dict) else None
+
+class CascadeTier:
+    def __init__(self, model: str, num_ctx: int, cost_per_1k_tokens: float = 0.0):
+        self.model = model
+        self.num_ctx = num_ctx
+        self.cost_per_1k_tokens = cost_per_1k_tokens
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "CascadeTier":
+        return cls(data["model"], int(data["num_ctx"]), float(data.get("cost_per_1k_tokens", 0.0)))
+
+class ModelCascade:
+    """Route a chat to the cheapest model able to decide, escalating when needed.
+
+    `small_tiers` are tried in order: the first whose context window holds the
+    prompt plus `output_reserve` tokens answers first. Its reply is kept when
+    it parses as the persona JSON with "want_to_speak": false and, when the
+    model reports a "confidence", that value is at least
+    `confidence_threshold`. Otherwise the `large` tier answers. Results are
+    returned in the chat completion shape ("choices"), whichever model answered.
+    """
+
+    def __init__(self, small_tiers: List[CascadeTier], large: CascadeTier, confidence_threshold: float = 0.5, output_reserve: int = 512, alias: str = "cascade"):
+        self.small_tiers = small_tiers
+        self.large = large
+        self.confidence_threshold = confidence_threshold
+        self.output_reserve = output_reserve
+        self.alias = alias
+        self.decisions: Dict[str, int] = {}
+        self.small_seconds = 0.0
+        self.large_seconds = 0.0
+        self.large_calls = 0
+        self.saved_seconds = 0.0
+        self.saved_cost = 0.0
+        self.extra_seconds = 0.0
+
+    async def chat(self, messages: List[Dict[str, str]], options: Optional[Dict[str, Any]], call: ChatCall) -> Dict[str, Any]:
+        prompt_tokens = count_message_tokens(messages)
+        tier = self.pick_small_tier(prompt_tokens)
+        if tier is None:
+            return await self._escalate(messages, options, call, "context_overflow")
+
+        started = time.monotonic()
+        response = await call(tier.model, messages, options)
+        elapsed = time.monotonic() - started
+        self.small_seconds += elapsed
+
+        text = response_text(response)
+        reason = self.escalation_reason(text)
+        if reason is not None:
+            self.extra_seconds += elapsed
+            return await self._escalate(messages, options, call, reason)
+
+        self._record("small_only")
+        used_prompt, used_completion = response_usage(response)
+        tokens = (used_prompt or prompt_tokens) + (used_completion or count_text_tokens(text))
+        self.saved_cost += tokens / 1000 * (self.large.cost_per_1k_tokens - tier.cost_per_1k_tokens)
+        if self.large_calls:
+            self.saved_seconds += self.large_seconds / self.large_calls - elapsed
+        return self._result(response, tier.model, escalated=False, reason=None)
+
+    def pick_small_tier(self, prompt_tokens: int) -> Optional[CascadeTier]:
+        for tier in self.small_tiers:
+            if prompt_tokens + self.output_reserve <= tier.num_ctx:
+                return tier
+        return None
+
+    def escalation_reason(self, text: str) -> Optional[str]:
+        parsed = parse_json_reply(text)
+        if parsed is None or "want_to_speak" not in parsed:
+            return "invalid_reply"
+        confidence = parsed.get("confidence")
+        if isinstance(confidence, (int, float)) and confidence < self.confidence_threshold:
+            return "low_confidence"
+        if parsed["want_to_speak"] is True or str(parsed["want_to_speak"]).lower() == "true":
+            return "wants_to_speak"
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "decisions": dict(self.decisions),
+            "small_seconds": self.small_seconds,
+            "large_seconds": self.large_seconds,
+            "estimated_saved_seconds": self.saved_seconds,
+            "estimated_saved_cost": self.saved_cost,
+            "escalation_overhead_seconds": self.extra_seconds,
+        }
+
+    async def _escalate(self, messages, options, call: ChatCall, reason: str) -> Dict[str, Any]:
+        self._record(reason)
+        started = time.monotonic()
+        response = await call(self.large.model, messages, options)
+        elapsed = time.monotonic() - started
+        self.large_seconds += elapsed
+        self.large_calls += 1
+        return self._result(response, self.large.model, escalated=True, reason=reason)
+
+    def _record(self, decision: str) -> None:
+        self.decisions[decision] = self.decisions.get(decision, 0) + 1
+
+    def _result(self, response: Any, model: str, escalated: bool, reason: Optional[str]) -> Dict[str, Any]:
+        prompt_tokens, completion_tokens = response_usage(response)
+        return {
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": response_text(response)},
+            }],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens},
+            "cascade": {"escalated": escalated, "reason": reason},
+        }
@@ -0,0 +1,46 @@
+# responses.py
+# Read text, usage and timings out of Ollama and Groq chat responses
+from typing import Any, Dict, Optional, Tuple
+
+def response_to_dict(response: Any) -> Dict[str, Any]:
+    if hasattr(response, "model_dump"):
+        return response.model_dump()
+    return dict(response)
+
+def response_text(response: Any) -> str:
+    """Assistant text of an Ollama or Groq chat response."""
+    data = response_to_dict(response)
+    if data.get("choices"):
+        return data["choices"][0]["message"].get("content") or ""
+    return (data.get("message") or {}).get("content") or ""
+
+def response_usage(response: Any) -> Tuple[Optional[int], Optional[int]]:
+    """(prompt_tokens, completion_tokens) reported by an Ollama or Groq response."""
+    data = response_to_dict(response)
+    if data.get("usage"):
+        return data["usage"].get("prompt_tokens"), data["usage"].get("completion_tokens")
+    return data.get("prompt_eval_count"), data.get("eval_count")
+
+def response_timings(response: Any) -> Dict[str, Optional[float]]:
+    """Time to first token and generation speed reported by the backend.
+
+    Ollama reports nanosecond durations (load, prompt evaluation, generation),
+    Groq reports seconds in its usage block.
+    """
+    data = response_to_dict(response)
+    usage = data.get("usage") or {}
+    if usage.get("completion_time") is not None:
+        completion_tokens = usage.get("completion_tokens") or 0
+        completion_time = usage.get("completion_time") or 0.0
+        return {
+            "time_to_first_token": (usage.get("queue_time") or 0.0) + (usage.get("prompt_time") or 0.0),
+            "tokens_per_second": completion_tokens / completion_time if completion_time else None,
+        }
+    if data.get("eval_duration") is not None:
+        eval_count = data.get("eval_count") or 0
+        eval_seconds = data["eval_duration"] / 1e9
+        return {
+            "time_to_first_token": ((data.get("load_duration") or 0) + (data.get("prompt_eval_duration") or 0)) / 1e9,
+            "tokens_per_second": eval_count / eval_seconds if eval_seconds else None,
+        }
+    return {"time_to_first_token": None, "tokens_per_second": None}
@@ -0,0 +1,321 @@
+# router.py
+# Route chat calls across several backends with failover, hedging and circuit breakers
+import asyncio
+import time
+from collections import deque
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Tuple
+
+from concurrency.calls import call_client, stream_client, close_client
+
+class CircuitBreaker:
+    """Skip a backend after repeated failures, then let one trial call through.
+
+    closed: calls go through. open: calls are skipped until `reset_timeout`
+    has elapsed. half-open: a single trial call decides whether the breaker
+    closes again or re-opens.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_running = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half-open" and not self._trial_running:
+            self._trial_running = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+
+    def record_cancelled(self) -> None:
+        self._trial_running = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._trial_running = False
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+
+class LatencyTracker:
+    """Sliding window of successful call durations."""
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self.min_samples = min_samples
+        self._samples: Deque[float] = deque(maxlen=window)
+
+    def record(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def quantile(self, q: float) -> Optional[float]:
+        if len(self._samples) < self.min_samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+@asynccontextmanager
+async def open_gate(backend: str, model_name: str):
+    yield
+
+class Backend:
+    def __init__(self, name: str, client, breaker: CircuitBreaker):
+        self.name = name
+        self.client = client
+        self.breaker = breaker
+        self.latency = LatencyTracker()
+        self.calls = 0
+        self.errors = 0
+
+class BackendRouter:
+    """Client facade over several backends, exposing the usual client methods.
+
+    `model_map` maps an alias to the model name used on each backend, e.g.
+    {"aletheia": {"groq": "llama-3.3-70b-versatile", "ollama": "qwen3:1.7b"}}.
+    A request may name the alias or any backend-specific name of an entry;
+    unmapped names are sent unchanged. Backends are tried in order, the one
+    that natively serves the requested name first, skipping open circuit
+    breakers. With hedging enabled, a duplicate call goes to the next backend
+    when the first has not answered within its observed p95 latency.
+    `gate(backend, model)` is an async context manager held around each
+    call to a backend, e.g. an admission slot of the backend actually tried;
+    a backend whose gate refuses the call is skipped like a failed one,
+    without counting against its breaker.
+    """
+
+    def __init__(self, backends: List[Tuple[str, Any]], model_map: Optional[Dict[str, Dict[str, str]]] = None, timeout: float = 60.0, hedge: bool = False, hedge_delay: float = 2.0, failure_threshold: int = 5, reset_timeout: float = 30.0, gate=open_gate):
+        if not backends:
+            raise ValueError("BackendRouter needs at least one backend")
+        self.backends = [Backend(name, client, CircuitBreaker(failure_threshold, reset_timeout)) for name, client in backends]
+        self.model_map = model_map or {}
+        self.timeout = timeout
+        self.hedge = hedge
+        self.hedge_delay = hedge_delay
+        self.gate = gate
+        self.failovers = 0
+        self.hedges = 0
+        self.hedges_won = 0
+
+    def resolve(self, model_name: str, backend: str) -> Optional[str]:
+        """Name of `model_name` on `backend`, None when the mapping excludes it."""
+        for alias, names in self.model_map.items():
+            if model_name == alias or model_name in names.values():
+                return names.get(backend)
+        return model_name
+
+    def candidates(self, model_name: str) -> List[Tuple[Backend, str]]:
+        ordered = []
+        for backend in self.backends:
+            resolved = self.resolve(model_name, backend.name)
+            if resolved is not None:
+                ordered.append((backend, resolved))
+        # the backend that serves the requested name as-is goes first
+        ordered.sort(key=lambda item: item[1] != model_name)
+        return ordered
+
+    async def list_models(self) -> Dict[str, Any]:
+        """List models on every backend."""
+        models = {}
+        for backend in self.backends:
+            try:
+                models[backend.name] = await call_client(backend.client.list_models)
+            except Exception as e:
+                models[backend.name] = {"error": str(e)}
+        return models
+
+    async def pull_model(self, model_name: str) -> None:
+        """Pull a model on the first backend that supports it."""
+        await self._first_success("pull_model", model_name)
+
+    async def warm_model(self, model_name: str):
+        """Warm up a model on the first backend that supports it."""
+        return await self._first_success("warm_model", model_name)
+
+    async def chat(self, model_name: str, messages: List[Dict[str, str]], options: Optional[Dict[str, Any]] = None):
+        """Generate a chat response, failing over or hedging across backends."""
+        candidates = self.candidates(model_name)
+        running: Dict[asyncio.Task, Tuple[Backend, bool]] = {}
+        last_error: Optional[BaseException] = None
+        started_any = False
+        try:
+            while True:
+                if not running:
+                    picked = self._next_candidate(candidates)
+                    if picked is None:
+                        break
+                    if started_any:
+                        self.failovers += 1
+                    started_any = True
+                    running[self._start_chat(picked, messages, options)] = (picked[0], False)
+                delay = None
+                if self.hedge and len(running) == 1 and candidates:
+                    delay = self._hedge_delay(next(iter(running.values()))[0])
+                done, _ = await asyncio.wait(running, timeout=delay, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    picked = self._next_candidate(candidates)
+                    if picked is not None:
+                        self.hedges += 1
+                        running[self._start_chat(picked, messages, options)] = (picked[0], True)
+                    continue
+                for task in done:
+                    _, is_hedge = running.pop(task)
+                    if task.exception() is None:
+                        if is_hedge:
+                            self.hedges_won += 1
+                        return task.result()
+                    last_error = task.exception()
+        finally:
+            for task in running:
+                task.cancel()
+        if last_error is None:
+            raise Exception(f"No available backend for model {model_name}")
+        raise last_error
+
+    async def chat_stream(self, model_name: str, messages: List[Dict[str, str]], options: Optional[Dict[str, Any]] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Stream a chat response, failing over until a backend yields its first chunk."""
+        candidates = self.candidates(model_name)
+        last_error: Optional[BaseException] = None
+        while True:
+            picked = self._next_candidate(candidates)
+            if picked is None:
+                break
+            backend, resolved = picked
+            slot = AsyncExitStack()
+            try:
+                await slot.enter_async_context(self.gate(backend.name, resolved))
+            except BaseException as e:
+                backend.breaker.record_cancelled()
+                if not isinstance(e, Exception):
+                    raise
+                last_error = e
+                continue
+            backend.calls += 1
+            stream = stream_client(backend.client.chat_stream, resolved, messages, options)
+            started = time.monotonic()
+            try:
+                first = await asyncio.wait_for(anext(stream), self.timeout)
+            except StopAsyncIteration:
+                await slot.aclose()
+                backend.breaker.record_success()
+                return
+            except asyncio.CancelledError:
+                try:
+                    await stream.aclose()
+                finally:
+                    await slot.aclose()
+                backend.breaker.record_cancelled()
+                raise
+            except Exception as e:
+                try:
+                    await stream.aclose()
+                finally:
+                    await slot.aclose()
+                backend.errors += 1
+                backend.breaker.record_failure()
+                self.failovers += 1
+                last_error = e
+                continue
+            backend.breaker.record_success()
+            backend.latency.record(time.monotonic() - started)
+            try:
+                yield first
+                async for chunk in stream:
+                    yield chunk
+            finally:
+                try:
+                    await stream.aclose()
+                finally:
+                    await slot.aclose()
+            return
+        if last_error is None:
+            raise Exception(f"No available backend for model {model_name}")
+        raise last_error
+
+    async def close(self) -> None:
+        for backend in self.backends:
+            await close_client(backend.client)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backends": {
+                backend.name: {
+                    "state": backend.breaker.state,
+                    "consecutive_failures": backend.breaker.failures,
+                    "calls": backend.calls,
+                    "errors": backend.errors,
+                    "p50_seconds": backend.latency.quantile(0.5),
+                    "p95_seconds": backend.latency.quantile(0.95),
+                }
+                for backend in self.backends
+            },
+            "failovers": self.failovers,
+            "hedges": self.hedges,
+            "hedges_won": self.hedges_won,
+        }
+
+    def _next_candidate(self, candidates: List[Tuple[Backend, str]]) -> Optional[Tuple[Backend, str]]:
+        # breakers are asked one at a time so a half-open trial is only
+        # claimed by the call that actually uses it
+        while candidates:
+            backend, resolved = candidates.pop(0)
+            if backend.breaker.allow():
+                return backend, resolved
+        return None
+
+    def _start_chat(self, picked: Tuple[Backend, str], messages, options) -> asyncio.Task:
+        backend, resolved = picked
+        return asyncio.ensure_future(self._timed_chat(backend, resolved, messages, options))
+
+    def _hedge_delay(self, backend: Backend) -> float:
+        p95 = backend.latency.quantile(0.95)
+        return p95 if p95 is not None else self.hedge_delay
+
+    async def _timed_chat(self, backend: Backend, model_name: str, messages, options):
+        async with AsyncExitStack() as slot:
+            try:
+                await slot.enter_async_context(self.gate(backend.name, model_name))
+            except BaseException:
+                # refused or cancelled before reaching the backend
+                backend.breaker.record_cancelled()
+                raise
+            started = time.monotonic()
+            backend.calls += 1
+            try:
+                result = await asyncio.wait_for(call_client(backend.client.chat, model_name, messages, options), self.timeout)
+            except asyncio.CancelledError:
+                # lost a hedge race: neither a success nor a failure
+                backend.breaker.record_cancelled()
+                raise
+            except Exception:
+                backend.errors += 1
+                backend.breaker.record_failure()
+                raise
+            backend.breaker.record_success()
+            backend.latency.record(time.monotonic() - started)
+            return result
+
+    async def _first_success(self, method: str, model_name: str):
+        last_error: Optional[BaseException] = None
+        for backend, resolved in self.candidates(model_name):
+            try:
+                async with self.gate(backend.name, resolved):
+                    return await call_client(getattr(backend.client, method), resolved)
+            except Exception as e:
+                last_error = e
+        raise last_error or Exception(f"No backend can {method} {model_name}")
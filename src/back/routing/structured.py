@@ -0,0 +1,228 @@
+# structured.py
+# Parse the persona JSON while it streams and stop generating once Aletheia stays silent
+import json
+from typing import Any, Dict, List, Optional
+
+from concurrency.calls import stream_client
+from context.tokens import count_text_tokens
+
+# keys of the {"want_to_speak": bool, "content": str} reply and the value types accepted
+SCHEMA = {
+    "want_to_speak": (bool, str),
+    "content": (str,),
+    "confidence": (int, float),
+}
+
+_LITERALS = {"true": True, "false": False, "null": None}
+
+class PersonaStreamParser:
+    """Incremental parser for the persona reply object.
+
+    Deltas are fed as they arrive. `want_to_speak` is set as soon as its
+    value is complete, `content` holds what has streamed of that string so
+    far, and `error` describes the first schema violation (wrong value type,
+    nested value, malformed JSON). Text before the object, including a qwen3
+    <think> block, is skipped like parse_json_reply does; text after it is
+    ignored.
+    """
+
+    def __init__(self):
+        self.want_to_speak: Optional[bool] = None
+        self.error: Optional[str] = None
+        self.complete = False
+        self._content = ""
+        self._state = "prefix"
+        self._tail = ""
+        self._in_think = False
+        self._key: Optional[str] = None
+        self._token: List[str] = []
+        self._escape: Optional[str] = None
+
+    @property
+    def content(self) -> str:
+        if self._state == "value_string" and self._key == "content":
+            return "".join(self._token)
+        return self._content
+
+    def feed(self, text: str) -> None:
+        for char in text:
+            if self.error is not None or self.complete:
+                return
+            self._step(char)
+
+    def _step(self, char: str) -> None:
+        state = self._state
+        if state == "prefix":
+            # keep the last characters only, enough to spot the think tags
+            self._tail = (self._tail + char)[-8:]
+            if self._in_think:
+                self._in_think = not self._tail.endswith("</think>")
+            elif self._tail.endswith("<think>"):
+                self._in_think = True
+            elif char == "{":
+                self._state = "key_or_end"
+        elif state in ("key_or_end", "key"):
+            if char.isspace():
+                return
+            if char == '"':
+                self._token = []
+                self._state = "key_string"
+            elif char == "}" and state == "key_or_end":
+                self._finish()
+            else:
+                self.error = f"unexpected {char!r} where a key was expected"
+        elif state == "key_string":
+            if self._string_char(char):
+                self._key = "".join(self._token)
+                self._state = "colon"
+        elif state == "colon":
+            if char == ":":
+                self._state = "value"
+            elif not char.isspace():
+                self.error = f"missing ':' after {self._key!r}"
+        elif state == "value":
+            if char.isspace():
+                return
+            self._token = []
+            if char == '"':
+                self._state = "value_string"
+            elif SCHEMA.get(self._key) == (str,):
+                # reject a non-string content before it streams
+                self.error = f"{self._key!r} is not a string"
+            elif char in "{[":
+                self.error = f"nested value for {self._key!r}"
+            else:
+                self._token.append(char)
+                self._state = "value_literal"
+        elif state == "value_string":
+            if self._string_char(char):
+                self._state = "comma_or_end"
+                self._set_value("".join(self._token))
+        elif state == "value_literal":
+            if char in ",}" or char.isspace():
+                self._state = "comma_or_end"
+                if self._set_literal("".join(self._token)):
+                    self._step(char)
+            else:
+                self._token.append(char)
+                # "false" can not continue into another literal, resolve it now
+                if self._key == "want_to_speak" and len(self._token) == 5 and "".join(self._token) == "false":
+                    self._state = "comma_or_end"
+                    self._set_literal("false")
+        elif state == "comma_or_end":
+            if char == ",":
+                self._state = "key"
+            elif char == "}":
+                self._finish()
+            elif not char.isspace():
+                self.error = f"unexpected {char!r} after {self._key!r}"
+
+    def _string_char(self, char: str) -> bool:
+        """Add a character to the current string, True once the string is closed."""
+        if self._escape is not None:
+            self._escape += char
+            if self._escape[0] == "u" and len(self._escape) < 5:
+                return False
+            try:
+                self._token.append(json.loads(f'"\\{self._escape}"'))
+            except ValueError:
+                self.error = "invalid escape sequence"
+            self._escape = None
+            return False
+        if char == "\\":
+            self._escape = ""
+            return False
+        if char == '"':
+            return True
+        self._token.append(char)
+        return False
+
+    def _set_literal(self, token: str) -> bool:
+        if token in _LITERALS:
+            value = _LITERALS[token]
+        else:
+            try:
+                value = float(token) if any(c in token for c in ".eE") else int(token)
+            except ValueError:
+                self.error = f"invalid value {token!r} for {self._key!r}"
+                return False
+        self._set_value(value)
+        return self.error is None
+
+    def _set_value(self, value: Any) -> None:
+        types = SCHEMA.get(self._key)
+        if types is None:
+            return
+        if not isinstance(value, types) or (isinstance(value, bool) and bool not in types):
+            self.error = f"{self._key!r} has type {type(value).__name__}"
+            return
+        if self._key == "want_to_speak":
+            # the prompt describes the field as "boolean", some models quote it
+            if isinstance(value, str):
+                if value.lower() not in ("true", "false"):
+                    self.error = f"'want_to_speak' is {value!r}"
+                    return
+                value = value.lower() == "true"
+            self.want_to_speak = value
+        elif self._key == "content":
+            self._content = value
+
+    def _finish(self) -> None:
+        self.complete = True
+        if self.want_to_speak is None:
+            self.error = "'want_to_speak' is missing"
+
+async def early_abort_chat(client, model_name: str, messages: List[Dict[str, str]], options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Stream a chat and stop as soon as the reply says want_to_speak false.
+
+    Generation also stops at the first schema violation and once the object
+    is closed, ignoring trailing text. Closing the stream closes the backend
+    request, which ends the generation. The result has the chat completion
+    shape ("choices"); an aborted silent reply is returned as
+    {"want_to_speak": false, "content": ""}, whatever content streamed
+    before want_to_speak.
+    """
+    parser = PersonaStreamParser()
+    parts: List[str] = []
+    usage = None
+    done = False
+    stream = stream_client(client.chat_stream, model_name, messages, options)
+    try:
+        async for chunk in stream:
+            delta = chunk.get("delta") or ""
+            parts.append(delta)
+            parser.feed(delta)
+            if chunk.get("done"):
+                usage = chunk.get("usage")
+                done = True
+                break
+            if parser.want_to_speak is False or parser.error is not None or parser.complete:
+                break
+    finally:
+        await stream.aclose()
+
+    text = "".join(parts)
+    # stopping after the closing brace only drops trailing text
+    aborted = not done and not parser.complete
+    if aborted and parser.want_to_speak is False and parser.error is None:
+        # a silent reply is never shown, a half-written content would only mislead
+        text = json.dumps({"want_to_speak": False, "content": ""}, ensure_ascii=False)
+    elif parser.complete and not done:
+        text = text[:text.rfind("}") + 1]
+    if usage is None:
+        usage = {"prompt_tokens": None, "completion_tokens": count_text_tokens("".join(parts))}
+    return {
+        "model": model_name,
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": text},
+            "finish_reason": "early_abort" if aborted else "stop",
+        }],
+        "usage": usage,
+        "structured": {
+            "aborted": aborted,
+            "valid": parser.error is None and (parser.complete or aborted),
+            "error": parser.error,
+            "want_to_speak": parser.want_to_speak,
+        },
+    }
@@ -0,0 +1,66 @@
+# embeddings.py
+# Local embedding functions used to index and query memories
+import asyncio
+import re
+import unicodedata
+import zlib
+from typing import List
+
+import numpy as np
+
+from concurrency.calls import call_client
+
+_WORD = re.compile(r"\w+")
+
+def normalise_rows(vectors: np.ndarray) -> np.ndarray:
+    """Scale each row to unit length so a dot product is a cosine similarity."""
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+def fold(text: str) -> str:
+    """Lowercase and strip accents, so "thé" and "the" share features."""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+class HashingEmbedder:
+    """Feature-hashed words and character trigrams, needing no model.
+
+    Deterministic and fast. It matches shared words and word fragments
+    ("thé" finds "Milo aime le thé", "chat" finds "chaton"), not
+    synonyms; use a ClientEmbedder for semantic matches.
+    """
+
+    def __init__(self, dim: int = 256):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    async def embed(self, texts: List[str]) -> np.ndarray:
+        return await asyncio.to_thread(self.embed_sync, texts)
+
+    def embed_sync(self, texts: List[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in _WORD.findall(fold(text)):
+                self._add(vectors[row], word, 1.0)
+                padded = f"<{word}>"
+                for start in range(len(padded) - 2):
+                    self._add(vectors[row], padded[start:start + 3], 0.5)
+        return normalise_rows(vectors)
+
+    def _add(self, vector: np.ndarray, feature: str, weight: float) -> None:
+        # crc32 is stable across processes, unlike hash()
+        digest = zlib.crc32(feature.encode("utf-8"))
+        vector[digest % self.dim] += weight if digest & 0x80000000 else -weight
+
+class ClientEmbedder:
+    """Embeddings from a local model served by the LLM client (Ollama's /api/embed)."""
+
+    def __init__(self, client, model_name: str):
+        self.client = client
+        self.model_name = model_name
+        self.name = f"client-{model_name}"
+
+    async def embed(self, texts: List[str]) -> np.ndarray:
+        vectors = await call_client(self.client.embed, self.model_name, texts)
+        return normalise_rows(np.asarray(vectors, dtype=np.float32).reshape(len(texts), -1))
@@ -0,0 +1,197 @@
+# memory_search.py
+# Keep the vector index in step with LongTermMemory and answer similarity queries
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+from search.vector_index import VectorIndex
+
+logger = logging.getLogger(__name__)
+
+class MemorySearch:
+    """Semantic retrieval over LongTermMemory.
+
+    sync() embeds the memories not indexed yet, `batch_size` at a time, and
+    appends them to the index. It runs every `interval` seconds and right
+    after the memory writer flushes (notify). The writer, imports and
+    compaction commit concurrently, so ids do not become visible in order:
+    each sync reads the last `window` ids below the highest indexed one
+    again, and remembers the ids missing below it as gaps, looked up on
+    every sync until they appear or `gap_timeout` seconds have passed
+    (rolled back or deleted rows never do).
+    Once the index holds `train_rows` rows it is trained into `nlist` IVF
+    lists, unless `nlist` is 0 (exact search).
+
+    search() over-fetches when filtering by author or source, since the
+    index only knows memory ids, and tops up when hits have no row any
+    more. forget() tombstones ids archived by compaction; ids a search
+    finds without a row are forgotten too.
+    """
+
+    def __init__(self, db, index: VectorIndex, embedder, batch_size: int = 256, interval: float = 10.0, nlist: int = 0, train_rows: int = 100000, window: int = 1000, gap_timeout: float = 600.0, max_gaps: int = 100000):
+        self.db = db
+        self.index = index
+        self.embedder = embedder
+        self.batch_size = batch_size
+        self.interval = interval
+        self.nlist = nlist
+        self.train_rows = train_rows
+        self.window = window
+        self.gap_timeout = gap_timeout
+        self.max_gaps = max_gaps
+        # missing id -> when it was first seen missing
+        self._gaps: Dict[int, float] = {}
+        self._wakeup = asyncio.Event()
+        self._sync_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.indexed = 0
+        self.gaps_filled = 0
+        self.gaps_expired = 0
+        self.searches = 0
+        self.forgotten = 0
+        self.errors = 0
+        self.last_search_ms: Optional[float] = None
+
+    def notify(self, written: int = 0) -> None:
+        """Ask for a sync, called by the memory writer after a flush."""
+        self._wakeup.set()
+
+    async def sync(self) -> int:
+        """Index the memories written since the last sync; returns how many were added."""
+        added = 0
+        async with self._sync_lock:
+            floor = max(self.index.max_id - self.window, 0)
+            added += await self._fill_gaps(floor)
+            indexed = set((await asyncio.to_thread(self.index.ids_above, floor)).tolist())
+            after = floor
+            while True:
+                rows = await self.db.read_memories_after_id(after, self.batch_size)
+                if not rows:
+                    break
+                self._note_gaps(after, [row["id"] for row in rows], indexed)
+                added += await self._add([row for row in rows if row["id"] not in indexed])
+                after = rows[-1]["id"]
+                if len(rows) < self.batch_size:
+                    break
+            if self.nlist and not self.index.trained and self.index.count >= self.train_rows:
+                logger.info("training the memory index into %d lists", self.nlist)
+                await asyncio.to_thread(self.index.train, self.nlist)
+        self.indexed += added
+        return added
+
+    async def _add(self, rows: List[Dict[str, Any]]) -> int:
+        if not rows:
+            return 0
+        vectors = await self.embedder.embed([row["content"] for row in rows])
+        await asyncio.to_thread(self.index.add, [row["id"] for row in rows], vectors)
+        return len(rows)
+
+    def _note_gaps(self, after: int, ids: List[int], indexed: set) -> None:
+        """Remember the ids skipped between `after` and the ids just read, in id order."""
+        now = time.monotonic()
+        expected = after + 1
+        for memory_id in ids:
+            if self._gaps.pop(memory_id, None) is not None:
+                self.gaps_filled += 1
+            # a jump of burnt sequence values only keeps its last max_gaps ids
+            for missing in range(max(expected, memory_id - self.max_gaps), memory_id):
+                if missing not in indexed:
+                    self._gaps.setdefault(missing, now)
+            expected = memory_id + 1
+        # the oldest gaps go first
+        while len(self._gaps) > self.max_gaps:
+            del self._gaps[next(iter(self._gaps))]
+            self.gaps_expired += 1
+
+    async def _fill_gaps(self, floor: int) -> int:
+        """Index the gaps below `floor` committed since; ids above it are read again anyway."""
+        expired = time.monotonic() - self.gap_timeout
+        for memory_id in [memory_id for memory_id, seen in self._gaps.items() if seen < expired]:
+            del self._gaps[memory_id]
+            self.gaps_expired += 1
+        pending = sorted(memory_id for memory_id in self._gaps if memory_id <= floor)
+        added = 0
+        for start in range(0, len(pending), self.batch_size):
+            rows = await self.db.get_memories(pending[start:start + self.batch_size])
+            for row in rows:
+                del self._gaps[row["id"]]
+            added += await self._add(rows)
+            self.gaps_filled += len(rows)
+        return added
+
+    async def search(self, query: str, k: int = 10, author: Optional[str] = None, source: Optional[str] = None) -> List[Dict[str, Any]]:
+        """The k memories closest to the query, each with its "score"."""
+        started = time.perf_counter()
+        vector = (await self.embedder.embed([query]))[0]
+        wanted = k * 10 if author is not None or source is not None else k
+        while True:
+            hits = await asyncio.to_thread(self.index.search, vector, wanted)
+            rows = {row["id"]: row for row in await self.db.get_memories([memory_id for memory_id, _ in hits])}
+            results = []
+            gone = []
+            for memory_id, score in hits:
+                row = rows.get(memory_id)
+                # a memory deleted since it was indexed has no row
+                if row is None:
+                    gone.append(memory_id)
+                    continue
+                if (author is not None and row["author"] != author) or (source is not None and row["source"] != source):
+                    continue
+                results.append({**row, "score": round(score, 4)})
+                if len(results) == k:
+                    break
+            # fetch more while rows were missing and the index has more to give, up to 100 per result
+            if len(results) == k or len(hits) < wanted or not gone or wanted >= k * 100:
+                break
+            wanted *= 4
+        if gone:
+            await self.forget(gone)
+        self.searches += 1
+        self.last_search_ms = round((time.perf_counter() - started) * 1000, 2)
+        return results
+
+    async def forget(self, ids: List[int]) -> int:
+        """Drop memories from the search results, e.g. once compaction archived them."""
+        removed = await asyncio.to_thread(self.index.remove, ids)
+        self.forgotten += removed
+        return removed
+
+    async def run(self) -> None:
+        while True:
+            try:
+                await self.sync()
+            except Exception as e:
+                self.errors += 1
+                logger.warning("memory index sync failed: %s", e)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.index.stats(),
+            "indexed": self.indexed,
+            "gaps": len(self._gaps),
+            "gaps_filled": self.gaps_filled,
+            "gaps_expired": self.gaps_expired,
+            "searches": self.searches,
+            "forgotten": self.forgotten,
+            "sync_errors": self.errors,
+            "last_search_ms": self.last_search_ms,
+        }
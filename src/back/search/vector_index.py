@@ -0,0 +1,270 @@
+# vector_index.py
+# Memory-mapped cosine similarity index, exact or IVF, grown incrementally
+import json
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from search.embeddings import normalise_rows
+
+logger = logging.getLogger(__name__)
+
+# rows scored per matrix product in exact search, bounds the temporary memory
+SCAN_CHUNK = 65536
+
+class VectorIndex:
+    """Unit vectors and their memory ids, appended to files under `path`.
+
+    vectors.f32 holds the rows, ids.i64 the memory id of each row. Both are
+    memory-mapped read-only, so the index costs page cache rather than
+    process memory, and add() only appends. Until train() is called, search
+    scores every row with a chunked matrix product. Once trained, rows are
+    grouped into `nlist` IVF lists (centroids.f32, lists.i32) and a search
+    only scores the rows of the `nprobe` lists closest to the query.
+
+    remove() tombstones memory ids in deleted.i64, e.g. once compaction
+    archives them, and search skips their rows. Once a quarter of the rows
+    are tombstoned the files are rewritten without them.
+
+    An index built by another embedder is discarded on open.
+    """
+
+    def __init__(self, path: Path, embedder: str, nprobe: int = 8):
+        self.path = Path(path)
+        self.embedder = embedder
+        self.nprobe = nprobe
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.dim: Optional[int] = None
+        self.count = 0
+        self.centroids: Optional[np.ndarray] = None
+        self._vectors = np.zeros((0, 0), dtype=np.float32)
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._lists = np.zeros(0, dtype=np.int32)
+        self._members: List[List[np.ndarray]] = []
+        self._max_id = 0
+        # positions of the tombstoned rows, sorted
+        self._dead = np.zeros(0, dtype=np.int64)
+        self._lock = threading.Lock()
+        self._open()
+
+    @property
+    def max_id(self) -> int:
+        """Highest memory id indexed, 0 when empty; ids may be appended out of order."""
+        return self._max_id
+
+    def ids_above(self, floor: int) -> np.ndarray:
+        """Indexed memory ids greater than `floor`."""
+        with self._lock:
+            return np.asarray(self._ids[self._ids > floor])
+
+    @property
+    def trained(self) -> bool:
+        return self.centroids is not None
+
+    def add(self, ids: np.ndarray, vectors: np.ndarray) -> None:
+        vectors = normalise_rows(vectors)
+        ids = np.asarray(ids, dtype=np.int64)
+        if len(ids) == 0:
+            return
+        with self._lock:
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+                self._write_meta()
+            if vectors.shape[1] != self.dim:
+                raise ValueError(f"Expected vectors of dimension {self.dim}, got {vectors.shape[1]}")
+            # vectors first, the lists last: open() keeps the rows present in every file
+            self._append("vectors.f32", vectors)
+            self._append("ids.i64", ids)
+            first = self.count
+            if self.trained:
+                assignments = self._assign(vectors)
+                self._append("lists.i32", assignments)
+                rows = np.arange(first, first + len(ids))
+                for list_id in np.unique(assignments):
+                    self._members[list_id].append(rows[assignments == list_id])
+            self._map(first + len(ids))
+            self._max_id = max(self._max_id, int(ids.max()))
+
+    def remove(self, ids: List[int]) -> int:
+        """Tombstone these memory ids; returns how many indexed rows they had."""
+        ids = np.asarray(ids, dtype=np.int64)
+        with self._lock:
+            if self.count == 0 or len(ids) == 0:
+                return 0
+            rows = np.setdiff1d(np.nonzero(np.isin(self._ids, ids))[0], self._dead)
+            if len(rows) == 0:
+                return 0
+            self._append("deleted.i64", np.asarray(self._ids[rows]))
+            self._dead = np.union1d(self._dead, rows)
+            if len(self._dead) * 4 > self.count:
+                self._purge()
+            return len(rows)
+
+    def search(self, query: np.ndarray, k: int = 10) -> List[Tuple[int, float]]:
+        """The k best (memory id, cosine similarity) pairs, best first."""
+        query = normalise_rows(query.reshape(1, -1))[0]
+        with self._lock:
+            if self.count == 0 or k <= 0:
+                return []
+            if self.trained:
+                probe = np.argsort(self.centroids @ query)[-self.nprobe:]
+                rows = np.sort(np.concatenate([self._list_rows(list_id) for list_id in probe]))
+                if len(self._dead):
+                    rows = rows[~np.isin(rows, self._dead)]
+                scores = self._vectors[rows] @ query if len(rows) else np.zeros(0, dtype=np.float32)
+            else:
+                rows = None
+                scores = np.empty(self.count, dtype=np.float32)
+                for start in range(0, self.count, SCAN_CHUNK):
+                    scores[start:start + SCAN_CHUNK] = self._vectors[start:start + SCAN_CHUNK] @ query
+                scores[self._dead] = -np.inf
+            if len(scores) > k:
+                best = np.argpartition(-scores, k - 1)[:k]
+            else:
+                best = np.arange(len(scores))
+            best = best[np.argsort(-scores[best])]
+            best = best[np.isfinite(scores[best])]
+            positions = rows[best] if rows is not None else best
+            return [(int(memory_id), float(score)) for memory_id, score in zip(self._ids[positions], scores[best])]
+
+    def train(self, nlist: int, iterations: int = 10, sample_per_list: int = 64, seed: int = 0) -> None:
+        """Cluster the rows into `nlist` IVF lists with spherical k-means on a sample."""
+        with self._lock:
+            if self.count < nlist:
+                raise ValueError(f"Need at least {nlist} rows to train {nlist} lists, have {self.count}")
+            rng = np.random.default_rng(seed)
+            sample_rows = np.sort(rng.choice(self.count, min(self.count, nlist * sample_per_list), replace=False))
+            sample = np.asarray(self._vectors[sample_rows])
+            centroids = sample[rng.choice(len(sample), nlist, replace=False)].copy()
+            for _ in range(iterations):
+                assignments = np.argmax(sample @ centroids.T, axis=1)
+                sums = np.zeros_like(centroids)
+                np.add.at(sums, assignments, sample)
+                # an empty list keeps its previous centroid
+                filled = np.bincount(assignments, minlength=nlist) > 0
+                centroids[filled] = normalise_rows(sums[filled])
+            self.centroids = centroids
+            lists = np.concatenate([self._assign(self._vectors[start:start + SCAN_CHUNK]) for start in range(0, self.count, SCAN_CHUNK)])
+            (self.path / "lists.i32").write_bytes(lists.astype(np.int32).tobytes())
+            (self.path / "centroids.f32").write_bytes(centroids.tobytes())
+            self._write_meta()
+            self._map(self.count)
+            self._group_lists()
+
+    def reset(self) -> None:
+        with self._lock:
+            for name in ("vectors.f32", "ids.i64", "lists.i32", "centroids.f32", "deleted.i64", "purging", "meta.json"):
+                (self.path / name).unlink(missing_ok=True)
+            self.dim = None
+            self.centroids = None
+            self._members = []
+            self._max_id = 0
+            self._dead = np.zeros(0, dtype=np.int64)
+            self._map(0)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "rows": self.count,
+            "dim": self.dim,
+            "embedder": self.embedder,
+            "max_id": self.max_id,
+            "deleted": len(self._dead),
+            "lists": len(self.centroids) if self.trained else 0,
+            "nprobe": self.nprobe,
+        }
+
+    def _open(self) -> None:
+        meta_path = self.path / "meta.json"
+        if not meta_path.exists():
+            return
+        meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        if meta.get("embedder") != self.embedder:
+            logger.warning("memory index was built by %s, rebuilding it for %s", meta.get("embedder"), self.embedder)
+            self.reset()
+            return
+        if (self.path / "purging").exists():
+            logger.warning("memory index was being rewritten when the process stopped, rebuilding it")
+            self.reset()
+            return
+        self.dim = meta["dim"]
+        if meta.get("lists"):
+            self.centroids = np.fromfile(self.path / "centroids.f32", dtype=np.float32).reshape(meta["lists"], self.dim)
+        rows = min(self._rows("vectors.f32", 4 * self.dim), self._rows("ids.i64", 8))
+        if self.trained:
+            rows = min(rows, self._rows("lists.i32", 4))
+        # an add() interrupted between files leaves extra rows in the first ones
+        for name, width in (("vectors.f32", 4 * self.dim), ("ids.i64", 8), ("lists.i32", 4)):
+            if (self.path / name).exists() and self._rows(name, width) > rows:
+                with open(self.path / name, "r+b") as handle:
+                    handle.truncate(rows * width)
+        self._map(rows)
+        self._max_id = int(self._ids.max()) if rows else 0
+        if rows and (self.path / "deleted.i64").exists():
+            self._dead = np.nonzero(np.isin(self._ids, np.fromfile(self.path / "deleted.i64", dtype=np.int64)))[0]
+        if self.trained:
+            self._group_lists()
+
+    def _purge(self) -> None:
+        """Rewrite the files without the tombstoned rows."""
+        keep = np.ones(self.count, dtype=bool)
+        keep[self._dead] = False
+        # open() rebuilds an index whose rewrite was interrupted, its files may not line up
+        (self.path / "purging").touch()
+        files = [("vectors.f32", self._vectors), ("ids.i64", self._ids)]
+        if self.trained:
+            files.append(("lists.i32", self._lists))
+        for name, array in files:
+            with open(self.path / f"{name}.tmp", "wb") as handle:
+                for start in range(0, self.count, SCAN_CHUNK):
+                    handle.write(np.ascontiguousarray(array[start:start + SCAN_CHUNK][keep[start:start + SCAN_CHUNK]]).tobytes())
+        for name, _ in files:
+            (self.path / f"{name}.tmp").replace(self.path / name)
+        (self.path / "deleted.i64").unlink(missing_ok=True)
+        self._dead = np.zeros(0, dtype=np.int64)
+        self._map(int(keep.sum()))
+        if self.trained:
+            self._group_lists()
+        (self.path / "purging").unlink()
+
+    def _map(self, rows: int) -> None:
+        self.count = rows
+        dim = self.dim or 0
+        if rows == 0:
+            self._vectors = np.zeros((0, dim), dtype=np.float32)
+            self._ids = np.zeros(0, dtype=np.int64)
+            self._lists = np.zeros(0, dtype=np.int32)
+            return
+        self._vectors = np.memmap(self.path / "vectors.f32", dtype=np.float32, mode="r", shape=(rows, dim))
+        self._ids = np.memmap(self.path / "ids.i64", dtype=np.int64, mode="r", shape=(rows,))
+        if self.trained:
+            self._lists = np.memmap(self.path / "lists.i32", dtype=np.int32, mode="r", shape=(rows,))
+
+    def _group_lists(self) -> None:
+        order = np.argsort(self._lists, kind="stable")
+        bounds = np.searchsorted(self._lists[order], np.arange(len(self.centroids) + 1))
+        self._members = [[order[bounds[i]:bounds[i + 1]]] for i in range(len(self.centroids))]
+
+    def _list_rows(self, list_id: int) -> np.ndarray:
+        chunks = self._members[list_id]
+        if len(chunks) > 1:
+            # merge the chunks appended since the last search of this list
+            self._members[list_id] = chunks = [np.concatenate(chunks)]
+        return chunks[0]
+
+    def _assign(self, vectors: np.ndarray) -> np.ndarray:
+        return np.argmax(np.asarray(vectors) @ self.centroids.T, axis=1).astype(np.int32)
+
+    def _append(self, name: str, array: np.ndarray) -> None:
+        with open(self.path / name, "ab") as handle:
+            handle.write(np.ascontiguousarray(array).tobytes())
+
+    def _rows(self, name: str, width: int) -> int:
+        path = self.path / name
+        return path.stat().st_size // width if path.exists() else 0
+
+    def _write_meta(self) -> None:
+        meta = {"embedder": self.embedder, "dim": self.dim, "lists": len(self.centroids) if self.trained else 0}
+        (self.path / "meta.json").write_text(json.dumps(meta), encoding="utf-8")
@@ -0,0 +1,131 @@
+# pool.py
+# Keep frequently used local models loaded within a memory budget
+import asyncio
+import logging
+import math
+import time
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from concurrency.calls import call_client
+
+logger = logging.getLogger(__name__)
+
+class WarmPool:
+    """Background keep-alive scheduler for local (Ollama) models.
+
+    Every `interval` seconds the pool loads the pinned models and the
+    `predict_top` most requested ones (request counts decay with
+    `half_life`), refreshing their keep-alive. It then reads the loaded
+    models and, while their total size exceeds `memory_budget` bytes,
+    unloads the least recently used model that is not pinned.
+
+    `client` must provide load_model, unload_model and running_models.
+    """
+
+    def __init__(self, client, pinned: Optional[List[str]] = None, interval: float = 60.0, keep_alive: Union[float, str] = "10m", memory_budget: Optional[int] = None, predict_top: int = 2, half_life: float = 600.0, min_score: float = 1.0):
+        self.client = client
+        self.pinned = list(pinned or [])
+        self.interval = interval
+        self.keep_alive = keep_alive
+        self.memory_budget = memory_budget
+        self.predict_top = predict_top
+        self.half_life = half_life
+        self.min_score = min_score
+        self._scores: Dict[str, Tuple[float, float]] = {}
+        self._last_used: Dict[str, float] = {}
+        self._loaded: List[Dict[str, Any]] = []
+        self._task: Optional[asyncio.Task] = None
+        self.pings = 0
+        self.evictions = 0
+        self.errors = 0
+        self.last_refresh: Optional[float] = None
+
+    def touch(self, model_name: str) -> None:
+        """Record a request for a model."""
+        now = time.time()
+        self._scores[model_name] = (self.score(model_name, now) + 1.0, now)
+        self._last_used[model_name] = now
+
+    def score(self, model_name: str, now: Optional[float] = None) -> float:
+        """Request count of a model, halved every `half_life` seconds."""
+        if model_name not in self._scores:
+            return 0.0
+        value, updated_at = self._scores[model_name]
+        elapsed = (now or time.time()) - updated_at
+        return value * math.pow(0.5, elapsed / self.half_life)
+
+    def predicted(self) -> List[str]:
+        now = time.time()
+        ranked = sorted(
+            ((self.score(model, now), model) for model in self._scores if model not in self.pinned),
+            reverse=True,
+        )
+        return [model for score, model in ranked[:self.predict_top] if score >= self.min_score]
+
+    async def refresh(self) -> None:
+        for model_name in self.pinned + self.predicted():
+            try:
+                await call_client(self.client.load_model, model_name, self.keep_alive)
+                self.pings += 1
+            except Exception as e:
+                self.errors += 1
+                logger.warning("warm pool could not load %s: %s", model_name, e)
+        self._loaded = await call_client(self.client.running_models)
+        await self.enforce_budget()
+        self.last_refresh = time.time()
+
+    async def enforce_budget(self) -> None:
+        if self.memory_budget is None:
+            return
+        loaded = sorted(
+            (model for model in self._loaded if model["name"] not in self.pinned),
+            key=lambda model: self._last_used.get(model["name"], 0.0),
+        )
+        used = self.memory_used()
+        while used > self.memory_budget and loaded:
+            victim = loaded.pop(0)
+            await call_client(self.client.unload_model, victim["name"])
+            self._loaded = [model for model in self._loaded if model["name"] != victim["name"]]
+            used -= victim["size"] or 0
+            self.evictions += 1
+
+    def memory_used(self) -> int:
+        return sum(model["size"] or 0 for model in self._loaded)
+
+    async def run(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                self.errors += 1
+                logger.warning("warm pool refresh failed: %s", e)
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def state(self) -> Dict[str, Any]:
+        return {
+            "pinned": self.pinned,
+            "predicted": self.predicted(),
+            "loaded": [
+                {"name": model["name"], "size": model["size"], "size_vram": model["size_vram"], "last_used": self._last_used.get(model["name"])}
+                for model in self._loaded
+            ],
+            "memory_used": self.memory_used(),
+            "memory_budget": self.memory_budget,
+            "pings": self.pings,
+            "evictions": self.evictions,
+            "errors": self.errors,
+            "last_refresh": self.last_refresh,
+        }
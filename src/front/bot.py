@@ -35,7 +35,19 @@ intents.messages = True  # Nécessaire pour lire les messages
 intents.message_content = True  # Requis pour lire le contenu des messages (prefix cmds)
 intents.voice_states = True  # Requis pour rejoindre/déplacer en vocal
 
-bot = commands.Bot(command_prefix=Config.COMMAND_PREFIX, intents=intents)
+class Bot(commands.Bot):
+    async def close(self):
+        # py-cord n'attend pas cog_unload : les cogs qui ont des connexions à fermer exposent close()
+        for cog in list(self.cogs.values()):
+            close = getattr(cog, "close", None)
+            if close is not None:
+                try:
+                    await close()
+                except Exception as e:
+                    logger.warning(f"failed to close cog {cog.qualified_name}: {e}")
+        await super().close()
+
+bot = Bot(command_prefix=Config.COMMAND_PREFIX, intents=intents)
 
 async def load_extensions_and_sync():
     # Chargement des cogs et synchronisation des commandes (slash/hybrides)
@@ -1,11 +1,37 @@
 import discord
 from discord.ext import commands
 from config import Config
+import asyncio
+import aiohttp
 import json
 import logging
 import sys
-import requests
 import os  # For checking file existence and removing files after playback
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+# answers worth retrying: the backend is busy, restarting or behind a proxy that timed out
+RETRY_STATUSES = {429, 502, 503, 504}
+# longest Retry-After honoured, beyond it the message is dropped
+MAX_RETRY_AFTER = 30
+# sessions being closed by an unloaded cog, kept until closed so the task is not garbage collected
+_closing: set[asyncio.Task] = set()
+
+def retry_after(value: str | None, default: float) -> float:
+    """Seconds to wait from a Retry-After header, in seconds or as an HTTP date; `default` when absent or unreadable."""
+    if not value:
+        return default
+    try:
+        return max(float(value), 0)
+    except ValueError:
+        pass
+    try:
+        moment = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return default
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return max((moment - datetime.now(timezone.utc)).total_seconds(), 0)
 
 class Aletheia(commands.Cog):
     def __init__(self, bot) -> None:
@@ -17,13 +43,70 @@ class Aletheia(commands.Cog):
         handler.setFormatter(logging.Formatter('%(asctime)s:%(levelname)s:%(name)s: %(message)s'))
         self.logger.addHandler(handler)
         self.chat_activated:bool = False
-        response = requests.get("http://127.0.0.1:8000/system")
-        if response.status_code != 200:
-            return
-        self.system_prompt = dict(response.json())['prompt']
-        self.logger.debug(f"system prompt: {self.system_prompt}")
+        # created on first use, on the bot's event loop, and closed by close()
+        self.session: aiohttp.ClientSession | None = None
+        # by name only: the API serves the latest version, rechecked every SYSTEM_PROMPT_TTL seconds
+        self.system_prompt_ref = {"name": Config.ALETHEIA_PROMPT_NAME}
+        # set once the previous message of each channel has its reply sent: replies go out in
+        # arrival order while the API calls, and their retries, run concurrently
+        self.channel_turns: dict[int, asyncio.Event] = {}
         self.logger.info("Aletheia cog initialized.")
 
+    async def close(self) -> None:
+        """Close the API session, awaited by the bot when it shuts down."""
+        session, self.session = self.session, None
+        if session is not None and not session.closed:
+            await session.close()
+
+    def cog_unload(self):
+        # py-cord calls cog_unload without awaiting it, e.g. on reload
+        if self.session is not None:
+            task = asyncio.ensure_future(self.close())
+            _closing.add(task)
+            task.add_done_callback(_closing.discard)
+
+    def http(self) -> aiohttp.ClientSession:
+        """The pooled keep-alive session every call to the API goes through."""
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession(
+                base_url=Config.ALETHEIA_API_URL,
+                connector=aiohttp.TCPConnector(limit=Config.ALETHEIA_API_CONNECTIONS, keepalive_timeout=60),
+                timeout=aiohttp.ClientTimeout(total=Config.ALETHEIA_API_TIMEOUT, connect=5),
+                raise_for_status=False,
+            )
+        return self.session
+
+    async def api_request(self, method: str, path: str, **kwargs) -> dict:
+        """JSON answer of the API, retried on connection errors, timeouts and busy answers.
+
+        The attempts and the waits between them share one ALETHEIA_API_TIMEOUT
+        deadline. Raises aiohttp.ClientError or asyncio.TimeoutError once the
+        retries or the time are spent.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + Config.ALETHEIA_API_TIMEOUT
+        for attempt in range(Config.ALETHEIA_API_RETRIES + 1):
+            last_try = attempt == Config.ALETHEIA_API_RETRIES
+            remaining = deadline - loop.time()
+            timeout = aiohttp.ClientTimeout(total=remaining, connect=min(5, remaining))
+            try:
+                async with self.http().request(method, path, timeout=timeout, **kwargs) as response:
+                    if response.status in RETRY_STATUSES and not last_try:
+                        delay = retry_after(response.headers.get("Retry-After"), 2 ** attempt)
+                        if delay > MAX_RETRY_AFTER or delay >= deadline - loop.time():
+                            response.raise_for_status()
+                        self.logger.warning(f"{method} {path} answered {response.status}, retrying in {delay}s")
+                        await asyncio.sleep(delay)
+                        continue
+                    response.raise_for_status()
+                    return await response.json()
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                delay = 2 ** attempt
+                if last_try or delay >= deadline - loop.time():
+                    raise
+                self.logger.warning(f"{method} {path} failed ({e!r}), retrying in {delay}s")
+                await asyncio.sleep(delay)
+
     aletheia = discord.SlashCommandGroup("aletheia", "aletheia related commands", guild_ids=[Config.GUILD_ID])
     text = aletheia.create_subgroup("text", "commands to interact with aletheia using text", guild_ids=[Config.GUILD_ID])
 
@@ -52,26 +135,47 @@ class Aletheia(commands.Cog):
 
         self.logger.debug(f"received message: {message.content}")
 
+        channel_id = message.channel.id
+        previous = self.channel_turns.get(channel_id)
+        turn = self.channel_turns[channel_id] = asyncio.Event()
+        try:
+            reply = await self.answer(message)
+            if previous is not None:
+                await previous.wait()
+            if reply is not None:
+                await message.channel.send(reply)
+        finally:
+            turn.set()
+            if self.channel_turns.get(channel_id) is turn:
+                del self.channel_turns[channel_id]
+        return
+
+    async def answer(self, message: discord.Message) -> str | None:
+        """What Aletheia replies to the message, None when she stays silent or the API fails."""
         context = await self.load_context(message.channel, 10)
 
-        messages = [{"role": "system", "content": self.system_prompt}]
-        messages.extend(context)
+        messages = list(context)
         messages.append({"role": "user", "content": f"""{message.author}, utilisateur du serveur Discord "Berlin Est" a envoyé un message: <message>{message.content}</message>"""})
         self.logger.debug(f"nb of llm messages: {len(messages)}")
 
-        response = requests.post("http://localhost:8000/chat", json={
-            "model_name": "llama-3.3-70b-versatile",
-            "messages": messages,
-            "options": {"seed": 42, "response_format": {"type": "json_object"}}
-        })
-        self.logger.debug(f"response status: {response.status_code}")
-        llm_response = json.loads(response.json()['choices'][0]['message']['content'])
-        if bool(llm_response['want_to_speak']):
-            await message.channel.send(f"{llm_response['content']}")
-        else:
-            #await message.channel.send(f"Aletheia ne veut pas parler\n{llm_response}")
-            pass
-        return
+        try:
+            response = await self.api_request("POST", "/chat", headers={"X-Priority": "interactive"}, json={
+                "model_name": "llama-3.3-70b-versatile",
+                "messages": messages,
+                "system_prompt": self.system_prompt_ref,
+                "options": {"seed": 42, "response_format": {"type": "json_object"}}
+            })
+            llm_response = json.loads(response['choices'][0]['message']['content'])
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            self.logger.error(f"chat request failed: {e!r}")
+            return None
+        except (KeyError, IndexError, TypeError, ValueError) as e:
+            self.logger.error(f"unexpected chat response: {e!r}")
+            return None
+        if bool(llm_response.get('want_to_speak')):
+            return f"{llm_response['content']}"
+        #return f"Aletheia ne veut pas parler\n{llm_response}"
+        return None
 
 
     @text.command(guild_ids=[Config.GUILD_ID], name="activate_chat", description="activate the ability to chat with Aletheia")
@@ -0,0 +1,83 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+BACK_PACKAGE_ROOT = PROJECT_ROOT / "src" / "back"
+if str(BACK_PACKAGE_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACK_PACKAGE_ROOT))
+
+from concurrency.admission import AdmissionController, AdmissionRejected, PRIORITIES  # noqa: E402
+
+
+def test_priority_order_when_slot_frees():
+    async def main():
+        admission = AdmissionController(backend_limit=1, model_limit=1)
+        order = []
+        ticket = await admission.acquire("ollama", "qwen3:1.7b")
+
+        async def waiter(name, priority):
+            t = await admission.acquire("ollama", "qwen3:1.7b", PRIORITIES[priority])
+            order.append(name)
+            admission.release(t)
+
+        batch = asyncio.ensure_future(waiter("batch", "batch"))
+        await asyncio.sleep(0)
+        interactive = asyncio.ensure_future(waiter("interactive", "interactive"))
+        await asyncio.sleep(0)
+        assert admission.stats()["queue_depth"] == 2
+        admission.release(ticket)
+        await asyncio.gather(batch, interactive)
+        return order, admission
+
+    order, admission = asyncio.run(main())
+    assert order == ["interactive", "batch"]
+    assert admission.stats()["admitted"] == 3
+    assert admission.stats()["queue_depth"] == 0
+
+
+def test_model_limit_does_not_block_other_models():
+    async def main():
+        admission = AdmissionController(backend_limit=4, model_limit=1)
+        await admission.acquire("ollama", "a")
+        blocked = asyncio.ensure_future(admission.acquire("ollama", "a"))
+        await asyncio.sleep(0)
+        other = await asyncio.wait_for(admission.acquire("ollama", "b"), 0.1)
+        blocked.cancel()
+        return other
+
+    backend, model, _ = asyncio.run(main())
+    assert (backend, model) == ("ollama", "b")
+
+
+def test_full_queue_is_rejected_with_retry_after():
+    async def main():
+        admission = AdmissionController(backend_limit=1, max_queue=1)
+        await admission.acquire("groq", "m")
+        queued = asyncio.ensure_future(admission.acquire("groq", "m"))
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejected) as excinfo:
+            await admission.acquire("groq", "m")
+        queued.cancel()
+        return excinfo.value, admission
+
+    error, admission = asyncio.run(main())
+    assert error.status_code == 429
+    assert error.retry_after >= 1
+    assert admission.stats()["rejected"] == 1
+
+
+def test_queue_timeout_returns_503():
+    async def main():
+        admission = AdmissionController(backend_limit=1, queue_timeout=0.01)
+        await admission.acquire("groq", "m")
+        with pytest.raises(AdmissionRejected) as excinfo:
+            await admission.acquire("groq", "m")
+        return excinfo.value, admission
+
+    error, admission = asyncio.run(main())
+    assert error.status_code == 503
+    assert admission.stats()["queue_depth"] == 0
+    assert admission.stats()["timed_out"] == 1
@@ -1,4 +1,8 @@
+import json
+import os
+import subprocess
 import sys
+import time
 from pathlib import Path
 from typing import Dict, List, Any, Optional
 
@@ -37,6 +41,7 @@ def make_fake_client():
                 "pull_model": [],
                 "warm_model": [],
                 "chat": [],
+                "chat_stream_closed": 0,
             }
             self._models: List[Dict[str, Any]] = [
                 {"name": "qwen3:1.7b"},
@@ -70,6 +75,14 @@ def make_fake_client():
                 message={"role": "assistant", "content": f"Echo: {user_message}"},
             )
 
+        def chat_stream(self, model_name: str, messages: List[Dict[str, Any]], options=None):
+            try:
+                for word in ["Echo:", " ", messages[-1].get("content", "")]:
+                    yield {"model": model_name, "delta": word, "done": False}
+                yield {"model": model_name, "delta": "", "done": True, "finish_reason": "stop"}
+            finally:
+                self.calls["chat_stream_closed"] += 1
+
     return FakeClient()
 
 
@@ -91,6 +104,48 @@ def test_health_check():
     assert response.json() == {"status": "ok"}
 
 
+def test_readiness_waits_for_models_and_database(app_and_client, monkeypatch):
+    app, fake = app_and_client
+    api = _import_api(monkeypatch)
+
+    class FakeDB:
+        configured = True
+        up = False
+
+        async def connect(self):
+            if not self.up:
+                raise ConnectionError("db down")
+
+    db = FakeDB()
+    monkeypatch.setattr(api, "db_client", db)
+
+    with TestClient(app) as client:
+        live = client.get("/health/live")
+        client.get("/models")
+        down = client.get("/health/ready")
+        db.up = True
+        up = client.get("/health/ready")
+
+    assert live.status_code == 200
+    assert down.status_code == 503
+    assert down.json()["checks"] == {"client": True, "models": True, "db": False}
+    assert up.status_code == 200 and up.json()["status"] == "ready"
+
+
+def test_importing_api_loads_no_backend_sdk():
+    code = (
+        "import sys; sys.path[:0] = [sys.argv[1], sys.argv[2]]; import src.back.api; "
+        "print(','.join(m for m in ('ollama', 'groq', 'sqlalchemy') if m in sys.modules))"
+    )
+    env = {key: value for key, value in os.environ.items() if key != "DB_URL"}
+    result = subprocess.run(
+        [sys.executable, "-c", code, str(PROJECT_ROOT), str(BACK_PACKAGE_ROOT)],
+        env=env, capture_output=True, text=True, check=True,
+    )
+
+    assert result.stdout.strip() == ""
+
+
 def test_list_models_success(app_and_client):
     app, fake = app_and_client
 
@@ -161,3 +216,607 @@ def test_pull_model_error_returns_400(monkeypatch):
         resp = client.post("/models/pull", json={"model_name": "bad"})
     assert resp.status_code == 400
     assert resp.json()["detail"] == "pull failed"
+
+
+def test_async_client_methods_are_awaited(monkeypatch):
+    api = _import_api(monkeypatch)
+    sync_fake = make_fake_client()
+
+    class AsyncFakeClient:
+        async def list_models(self):
+            return sync_fake.list_models()
+
+        async def chat(self, model_name, messages, options=None):
+            return sync_fake.chat(model_name, messages, options)
+
+    monkeypatch.setattr(api, "client", AsyncFakeClient())
+
+    with TestClient(api.app) as client:
+        models = client.get("/models")
+        chat = client.post("/chat", json={
+            "model_name": "qwen3:1.7b",
+            "messages": [{"role": "user", "content": "Salut"}],
+        })
+
+    assert models.status_code == 200
+    assert chat.status_code == 200
+    assert chat.json()["message"]["content"] == "Echo: Salut"
+    assert sync_fake.calls["list_models"] == 1
+
+
+def wait_for_models(client: TestClient, attempts: int = 100) -> None:
+    for _ in range(attempts):
+        if client.get("/health/ready").json()["checks"].get("models"):
+            return
+        time.sleep(0.01)
+    raise AssertionError("model list never loaded")
+
+
+def test_get_client_modes(monkeypatch):
+    api = _import_api(monkeypatch)
+    monkeypatch.setenv("GROQ_API_KEY", "test-key")
+
+    from ollama_interface.client import OllamaClient, AsyncOllamaClient
+    from groq_interface.client import GroqClient, AsyncGroqClient
+
+    assert isinstance(api.get_client("ollama", "async"), AsyncOllamaClient)
+    assert isinstance(api.get_client("ollama", "sync"), OllamaClient)
+    assert isinstance(api.get_client("groq", "async"), AsyncGroqClient)
+    assert isinstance(api.get_client("groq", "sync"), GroqClient)
+    with pytest.raises(ValueError):
+        api.get_client("ollama", "threads")
+
+
+def test_groq_chat_params_map_ollama_options():
+    from groq_interface.client import _chat_params
+
+    assert _chat_params(None) == {"seed": 42, "response_format": None}
+    assert _chat_params({"num_predict": 300, "temperature": 0.2, "seed": "7"}) == {"seed": 7, "response_format": None, "max_tokens": 300}
+
+
+def test_chat_stream_ndjson(app_and_client):
+    import json
+
+    app, fake = app_and_client
+    payload = {"model_name": "qwen3:1.7b", "messages": [{"role": "user", "content": "Hello"}]}
+
+    with TestClient(app) as client:
+        resp = client.post("/chat/stream", json=payload)
+
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+    chunks = [json.loads(line) for line in resp.text.splitlines()]
+    assert "".join(c["delta"] for c in chunks) == "Echo: Hello"
+    assert chunks[-1]["done"] is True
+    assert fake.calls["chat_stream_closed"] == 1
+
+
+def test_chat_stream_sse_from_accept_header(app_and_client):
+    app, _ = app_and_client
+    payload = {"model_name": "qwen3:1.7b", "messages": [{"role": "user", "content": "Hello"}]}
+
+    with TestClient(app) as client:
+        resp = client.post("/chat/stream", json=payload, headers={"Accept": "text/event-stream"})
+
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/event-stream")
+    events = [e for e in resp.text.split("\n\n") if e]
+    assert len(events) == 4
+    assert all(e.startswith("data: ") for e in events)
+
+
+def test_chat_stream_error_before_first_chunk_returns_400(monkeypatch):
+    api = _import_api(monkeypatch)
+
+    class FailingClient:
+        async def chat_stream(self, model_name, messages, options=None):
+            raise RuntimeError("model not found")
+            yield
+
+    monkeypatch.setattr(api, "client", FailingClient())
+
+    with TestClient(api.app) as client:
+        resp = client.post("/chat/stream", json={"model_name": "nope", "messages": []})
+    assert resp.status_code == 400
+    assert resp.json()["detail"] == "model not found"
+
+
+def test_chat_cache_hit_and_bypass(app_and_client, monkeypatch):
+    app, fake = app_and_client
+    api = _import_api(monkeypatch)
+    monkeypatch.setattr(api, "response_cache", api.ResponseCache())
+    payload = {
+        "model_name": "qwen3:1.7b",
+        "messages": [{"role": "user", "content": "Hello"}],
+        "options": {"seed": 42},
+    }
+
+    with TestClient(app) as client:
+        first = client.post("/chat", json=payload)
+        second = client.post("/chat", json=payload)
+        bypass = client.post("/chat", json=payload, headers={"Cache-Control": "no-cache"})
+        stats = client.get("/cache/stats").json()
+
+    assert first.headers["X-Cache"] == "MISS"
+    assert second.headers["X-Cache"] == "HIT"
+    assert second.json() == first.json()
+    assert bypass.headers["X-Cache"] == "MISS"
+    assert len(fake.calls["chat"]) == 2
+    assert stats["hits"] == 1
+
+
+def test_chat_rejected_when_admission_queue_full(app_and_client, monkeypatch):
+    app, fake = app_and_client
+    api = _import_api(monkeypatch)
+    monkeypatch.setattr(api, "admission", api.AdmissionController(max_queue=0, model_limit=0))
+
+    with TestClient(app) as client:
+        resp = client.post("/chat", json={"model_name": "qwen3:1.7b", "messages": []})
+
+    assert resp.status_code == 429
+    assert int(resp.headers["Retry-After"]) >= 1
+    assert fake.calls["chat"] == []
+
+
+def test_models_served_from_catalogue_with_etag(app_and_client):
+    app, fake = app_and_client
+
+    with TestClient(app) as client:
+        first = client.get("/models")
+        cached = client.get("/models", headers={"If-None-Match": first.headers["ETag"]})
+
+    assert [m["name"] for m in first.json()["models"]] == ["qwen3:1.7b", "llama3.1:8b"]
+    assert cached.status_code == 304
+    assert fake.calls["list_models"] == 1
+
+
+def test_chat_unknown_model_rejected_locally(app_and_client):
+    app, fake = app_and_client
+
+    with TestClient(app) as client:
+        # the model list loads in the background after startup
+        wait_for_models(client)
+        resp = client.post("/chat", json={"model_name": "qwen3:17b", "messages": []})
+
+    assert resp.status_code == 404
+    assert fake.calls["chat"] == []
+
+
+def test_metrics_endpoint_exposes_request_and_backend_metrics(app_and_client):
+    app, fake = app_and_client
+
+    with TestClient(app) as client:
+        client.post("/chat", json={"model_name": "qwen3:1.7b", "messages": [{"role": "user", "content": "Hello"}]})
+        resp = client.get("/metrics")
+
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert 'http_request_duration_seconds_count{route="/chat",method="POST",status="200"}' in resp.text
+    assert 'llm_backend_call_seconds_count{backend="ollama",model="qwen3:1.7b",call="chat"}' in resp.text
+    assert "request_coalescing_calls_total" in resp.text
+
+
+def test_chat_history_trimmed_to_context_window(app_and_client, monkeypatch):
+    app, fake = app_and_client
+    monkeypatch.setenv("CONTEXT_BUDGET", "1")
+    monkeypatch.setenv("CONTEXT_WINDOWS", "qwen3:1.7b=600")
+    monkeypatch.setenv("CONTEXT_OUTPUT_RESERVE", "100")
+    messages = [{"role": "system", "content": "Tu es Aletheia."}]
+    messages += [{"role": "user", "content": f"message {i} " + "blabla " * 40} for i in range(20)]
+
+    with TestClient(app) as client:
+        resp = client.post("/chat", json={"model_name": "qwen3:1.7b", "messages": messages})
+        stats = client.get("/context/stats").json()
+
+    assert resp.status_code == 200
+    sent = fake.calls["chat"][0]["messages"]
+    assert sent[0] == messages[0] and sent[-1] == messages[-1]
+    assert len(sent) < len(messages)
+    assert stats["enabled"] is True and stats["trimmed_requests"] == 1
+
+
+def test_chat_batch_streams_results_grouped_by_model(app_and_client):
+    app, fake = app_and_client
+    items = [
+        {"model_name": "qwen3:1.7b", "messages": [{"role": "user", "content": "un"}]},
+        {"model_name": "llama3.1:8b", "messages": [{"role": "user", "content": "deux"}]},
+        {"model_name": "qwen3:1.7b", "messages": [{"role": "user", "content": "trois"}]},
+        {"model_name": "unknown:1b", "messages": [{"role": "user", "content": "quatre"}]},
+        {"messages": "not a list"},
+    ]
+
+    with TestClient(app) as client:
+        resp = client.post("/chat/batch", json={"items": items, "max_parallel": 2})
+
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in resp.text.splitlines()]
+    results = {line["index"]: line for line in lines[:-1]}
+    assert sorted(results) == [0, 1, 2, 3, 4]
+    assert results[0]["response"]["message"]["content"] == "Echo: un"
+    assert results[2]["response"]["message"]["content"] == "Echo: trois"
+    assert results[3]["status"] == 404
+    assert results[4]["status"] == 422
+    assert lines[-1] == {"done": True, "items": 5, "errors": 2}
+    # both qwen3 items ran before the llama3.1 one
+    assert [call["model"] for call in fake.calls["chat"]] == ["qwen3:1.7b", "qwen3:1.7b", "llama3.1:8b"]
+
+
+def test_chat_early_abort_cuts_silent_reply(app_and_client):
+    app, fake = app_and_client
+    closed = []
+
+    def chat_stream(model_name, messages, options=None):
+        try:
+            yield {"model": model_name, "delta": '{"want_to_speak": false, "content": "', "done": False}
+            for _ in range(100):
+                yield {"model": model_name, "delta": "bla ", "done": False}
+        finally:
+            closed.append(True)
+
+    fake.chat_stream = chat_stream
+
+    with TestClient(app) as client:
+        resp = client.post("/chat", json={
+            "model_name": "qwen3:1.7b",
+            "messages": [{"role": "user", "content": "Hello"}],
+            "early_abort": True,
+        })
+
+    assert resp.status_code == 200
+    body = resp.json()
+    assert json.loads(body["choices"][0]["message"]["content"]) == {"want_to_speak": False, "content": ""}
+    assert body["structured"]["aborted"] is True
+    assert closed == [True]
+    assert fake.calls["chat"] == []
+
+
+def test_system_prompt_versions_with_etag(app_and_client, monkeypatch):
+    app, fake = app_and_client
+    api = _import_api(monkeypatch)
+
+    class FakePromptDB:
+        configured = False
+
+        def __init__(self):
+            self.rows = []
+
+        async def latest_system_prompt_version(self, name):
+            versions = [row["version"] for row in self.rows if row["name"] == name]
+            return max(versions) if versions else None
+
+        async def get_system_prompt(self, name, version=None):
+            return next((dict(row) for row in self.rows if row["name"] == name and row["version"] == version), None)
+
+        async def create_system_prompt(self, name, content):
+            row = {"id": len(self.rows) + 1, "name": name, "version": len(self.rows) + 1, "content": content, "created_at": None}
+            self.rows.append(row)
+            return dict(row)
+
+    monkeypatch.setattr(api, "db_client", FakePromptDB())
+
+    with TestClient(app) as client:
+        builtin = client.get("/system")
+        created = client.post("/system", json={"content": "Tu es Aletheia, version 1."})
+        latest = client.get("/system")
+        not_modified = client.get("/system", headers={"If-None-Match": latest.headers["etag"]})
+        pinned = client.get("/system", params={"version": 1})
+        chat = client.post("/chat", json={
+            "model_name": "qwen3:1.7b",
+            "messages": [{"role": "user", "content": "Hello"}],
+            "system_prompt": {"version": 1},
+        })
+        missing = client.post("/chat", json={
+            "model_name": "qwen3:1.7b",
+            "messages": [{"role": "user", "content": "Hello"}],
+            "system_prompt": {"version": 9},
+        })
+
+    assert builtin.status_code == 200 and builtin.json()["version"] == 0
+    assert created.status_code == 201 and created.json()["version"] == 1
+    assert latest.json()["prompt"] == "Tu es Aletheia, version 1."
+    assert latest.headers["cache-control"] == "no-cache"
+    assert not_modified.status_code == 304
+    assert "immutable" in pinned.headers["cache-control"]
+    assert chat.status_code == 200
+    assert fake.calls["chat"][0]["messages"][0] == {"role": "system", "content": "Tu es Aletheia, version 1."}
+    assert missing.status_code == 404
+
+
+def test_memories_are_queued_and_written_on_shutdown(app_and_client, monkeypatch):
+    app, fake = app_and_client
+    api = _import_api(monkeypatch)
+
+    class FakeMemoryDB:
+        configured = False
+
+        def __init__(self):
+            self.rows = []
+
+        async def write_memories(self, memories):
+            self.rows.extend(memories)
+            return len(memories)
+
+    db = FakeMemoryDB()
+    monkeypatch.setattr(api, "memory_writer", api.MemoryWriter(db, batch_size=100, flush_interval=60))
+
+    with TestClient(app) as client:
+        queued = client.post("/memories", json={"content": "Milo aime le thé", "author": "milo", "tags": ["gouts"]})
+        stats = client.get("/memories/stats").json()
+
+    assert queued.status_code == 202 and queued.json()["status"] == "queued"
+    assert stats["enabled"] is True and stats["buffered"] == 1
+    assert [(row["content"], row["tags"]) for row in db.rows] == [("Milo aime le thé", ["gouts"])]
+
+
+def test_memories_need_a_database(app_and_client, monkeypatch):
+    app, fake = app_and_client
+    api = _import_api(monkeypatch)
+    monkeypatch.setattr(api, "db_client", api.DBClient(""))
+
+    with TestClient(app) as client:
+        resp = client.post("/memories", json={"content": "Bonjour", "author": "milo"})
+
+    assert resp.status_code == 503
+
+
+def test_memories_keyset_pagination(app_and_client, monkeypatch):
+    from datetime import datetime, timedelta
+
+    app, fake = app_and_client
+    api = _import_api(monkeypatch)
+    start = datetime(2025, 10, 1, 12, 0)
+    rows = [
+        {"id": i, "content": f"m{i}", "author": "milo" if i % 2 else "aletheia", "timestamp": start + timedelta(minutes=i // 2), "source": "discord", "tags": None}
+        for i in range(1, 8)
+    ]
+
+    class FakeMemoryDB:
+        configured = True
+
+        def __init__(self):
+            self.limits = []
+
+        async def connect(self):
+            return None
+
+        async def read_memories(self, after=None, limit=100, author=None, source=None, since=None, until=None):
+            self.limits.append(limit)
+            matching = [row for row in rows if (author is None or row["author"] == author) and (after is None or (row["timestamp"], row["id"]) > after)]
+            return [dict(row) for row in matching[:limit]]
+
+    db = FakeMemoryDB()
+    monkeypatch.setattr(api, "db_client", db)
+    monkeypatch.setattr(api, "memory_writer", None)
+    monkeypatch.setattr(api, "get_memory_writer", lambda db: None)
+
+    with TestClient(app) as client:
+        pages = []
+        cursor = None
+        while True:
+            params = {"limit": 3, "author": "milo"}
+            if cursor:
+                params["after"] = cursor
+            body = client.get("/memories", params=params).json()
+            pages.append([memory["content"] for memory in body["memories"]])
+            cursor = body["next"]
+            if cursor is None:
+                break
+        invalid = client.get("/memories", params={"after": "not-a-cursor"})
+
+    assert pages == [["m1", "m3", "m5"], ["m7"]]
+    assert db.limits == [4, 4]
+    assert invalid.status_code == 400
+
+
+def test_memory_search_endpoint(app_and_client, monkeypatch):
+    app, fake = app_and_client
+    api = _import_api(monkeypatch)
+
+    class FakeMemorySearch:
+        def __init__(self):
+            self.queries = []
+
+        def start(self):
+            pass
+
+        async def stop(self):
+            pass
+
+        async def search(self, query, k, author=None, source=None):
+            self.queries.append((query, k, author))
+            return [{"id": 3, "content": "Le thé de Milo est froid", "author": "aletheia", "score": 0.71}]
+
+    search = FakeMemorySearch()
+
+    with TestClient(app) as client:
+        disabled = client.get("/memories/search", params={"q": "thé"})
+        monkeypatch.setattr(api, "memory_search", search)
+        found = client.get("/memories/search", params={"q": "thé", "k": 5000, "author": "aletheia"})
+
+    assert disabled.status_code == 503
+    assert found.json()["memories"][0]["id"] == 3
+    assert search.queries == [("thé", api.MEMORY_PAGE_MAX, "aletheia")]
+
+
+def test_memories_fulltext_parses_tags(app_and_client, monkeypatch):
+    from datetime import datetime, timedelta
+
+    app, fake = app_and_client
+    api = _import_api(monkeypatch)
+
+    class FakeMemoryDB:
+        configured = True
+
+        def __init__(self):
+            self.calls = []
+
+        async def connect(self):
+            return None
+
+        async def search_memories_text(self, query, tags, any_tag, author, source, limit, since=None, until=None):
+            self.calls.append((query, tags, any_tag, limit, since))
+            return [{"id": 1, "content": "Milo aime le thé", "rank": 0.1}]
+
+    db = FakeMemoryDB()
+    monkeypatch.setattr(api, "db_client", db)
+    monkeypatch.setattr(api, "get_memory_writer", lambda db: None)
+
+    with TestClient(app) as client:
+        empty = client.get("/memories/fulltext", params={"q": "  "})
+        found = client.get("/memories/fulltext", params={"q": "thé", "tags": "gouts, milo", "any_tag": "true", "since": "2025-03-01T00:00:00"})
+        # without since, only the recent partitions are searched
+        client.get("/memories/fulltext", params={"q": "thé", "until": "2025-06-01T00:00:00"})
+
+    assert empty.status_code == 400
+    assert found.json()["memories"][0]["id"] == 1
+    assert db.calls == [
+        ("thé", ["gouts", "milo"], True, 20, datetime(2025, 3, 1)),
+        ("thé", [], False, 20, datetime(2025, 6, 1) - timedelta(days=api.MEMORY_FULLTEXT_HORIZON_DAYS)),
+    ]
+
+
+def test_memory_compaction_endpoints(app_and_client, monkeypatch):
+    app, fake = app_and_client
+    api = _import_api(monkeypatch)
+
+    class FakeCompactor:
+        def __init__(self):
+            self.running = False
+
+        def start(self):
+            pass
+
+        async def stop(self):
+            pass
+
+        async def run_once(self):
+            if self.running:
+                raise api.CompactionRunning("A compaction run is in progress")
+            return {"groups": 2, "summaries": 2, "archived": 11, "tokens": 900, "failures": 0, "budget_exhausted": False}
+
+        def stats(self):
+            return {"runs": 1, "summaries": 2, "archived": 11, "tokens": 900, "failures": 0}
+
+    compactor = FakeCompactor()
+
+    with TestClient(app) as client:
+        disabled = client.post("/memories/compact")
+        disabled_stats = client.get("/memories/compaction/stats").json()
+        monkeypatch.setattr(api, "memory_compactor", compactor)
+        report = client.post("/memories/compact").json()
+        compactor.running = True
+        busy = client.post("/memories/compact")
+        stats = client.get("/memories/compaction/stats").json()
+
+    assert disabled.status_code == 503
+    assert disabled_stats == {"enabled": False}
+    assert report["archived"] == 11
+    assert busy.status_code == 409
+    assert stats["enabled"] is True and stats["summaries"] == 2
+
+
+def test_memories_import_streams_the_export(app_and_client, monkeypatch):
+    app, fake = app_and_client
+    api = _import_api(monkeypatch)
+
+    class FakeImportDB:
+        configured = True
+
+        def __init__(self):
+            self.batches = []
+
+        async def connect(self):
+            return None
+
+        async def import_memories(self, memories):
+            self.batches.append(memories)
+            return len(memories) - 1
+
+    db = FakeImportDB()
+    monkeypatch.setattr(api, "db_client", db)
+    monkeypatch.setattr(api, "get_memory_writer", lambda db: None)
+    export = [
+        {"author": "293414992663805952", "content": f"message {i}", "timestamp": "2024-02-01T08:30:00+00:00", "attachments": [], "stickers": [], "reactions": []}
+        for i in range(3)
+    ]
+
+    with TestClient(app) as client:
+        missing = client.post("/memories/import", json=export)
+        report = client.post("/memories/import", params={"channel_id": "42"}, json=export).json()
+        invalid = client.post("/memories/import", params={"channel_id": "42"}, content=b'[{"author": "1"')
+
+    assert missing.status_code == 400
+    assert report["read"] == 3 and report["inserted"] == 2 and report["duplicates"] == 1
+    assert db.batches[0][0]["source"] == "discord:42"
+    assert invalid.status_code == 400
+
+
+def test_chat_stream_closes_backend_when_client_leaves_before_first_chunk(app_and_client, monkeypatch):
+    import asyncio
+
+    app, fake = app_and_client
+    api = _import_api(monkeypatch)
+    closed = []
+
+    class SlowStreamClient:
+        async def chat_stream(self, model_name, messages, options=None):
+            try:
+                await asyncio.sleep(10)
+                yield {"model": model_name, "delta": "trop tard", "done": True}
+            finally:
+                closed.append(True)
+
+    class FakeRequest:
+        headers = {"accept": "application/x-ndjson"}
+
+    released = []
+    monkeypatch.setattr(api, "client", SlowStreamClient())
+    monkeypatch.setattr(api, "release_slot", lambda ticket: released.append(ticket))
+    req = api.ChatRequest(model_name="qwen3:1.7b", messages=[{"role": "user", "content": "Hello"}])
+
+    async def run():
+        task = asyncio.create_task(api.chat_stream(req, FakeRequest()))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    asyncio.run(run())
+
+    assert closed == [True]
+    assert released == [None]
+
+
+def test_router_admission_and_metrics_follow_the_backend_that_served(app_and_client, monkeypatch):
+    app, fake = app_and_client
+    api = _import_api(monkeypatch)
+    monkeypatch.setenv("MODEL_CATALOG", "0")
+    monkeypatch.setenv("LLM_CLIENT", "router")
+
+    class DownClient:
+        def chat(self, model_name, messages, options=None):
+            raise ConnectionError("groq down")
+
+    class RecordingAdmission(api.AdmissionController):
+        acquired = []
+
+        async def acquire(self, backend, model, priority=0):
+            self.acquired.append((backend, model))
+            return await super().acquire(backend, model, priority)
+
+    admission = RecordingAdmission()
+    router = api.BackendRouter([("groq", DownClient()), ("ollama", fake)], gate=api.backend_slot)
+    monkeypatch.setattr(api, "client", router)
+    monkeypatch.setattr(api, "admission", admission)
+
+    with TestClient(app) as client:
+        resp = client.post("/chat", json={"model_name": "qwen3:1.7b", "messages": [{"role": "user", "content": "Salut"}]})
+        metrics = client.get("/metrics").text
+
+    assert resp.status_code == 200
+    assert admission.acquired == [("groq", "qwen3:1.7b"), ("ollama", "qwen3:1.7b")]
+    assert 'llm_backend_call_seconds_count{backend="ollama",model="qwen3:1.7b",call="chat"} 1' in metrics
+    assert 'backend="router"' not in metrics
@@ -0,0 +1,125 @@
+import asyncio
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import httpx
+import ollama
+from groq import AsyncGroq
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from benchmarks.fake_backend import FakeBackendError, FakeLLM, create_app  # noqa: E402
+from benchmarks.memory_data import CHUNK_ROWS, MemoryGenerator, copy_field, copy_text, shard_chunks  # noqa: E402
+from benchmarks.report import compare, percentile, summarise  # noqa: E402
+
+
+def test_percentiles_and_summary():
+    samples = [i / 1000 for i in range(1, 101)]
+
+    assert percentile(samples, 50) == 0.05
+    assert percentile(samples, 99) == 0.099
+    assert percentile([], 50) is None
+    summary = summarise(samples, seconds=2.0, errors=2)
+    assert summary["requests"] == 102
+    assert summary["throughput"] == 51.0
+    assert summary["p95_ms"] == 95.0
+
+
+def test_compare_reports_only_real_regressions():
+    baseline = {"chat@c8": {"p50_ms": 40.0, "p95_ms": 0.4, "throughput": 200.0, "errors": 0}}
+    current = {"chat@c8": {"p50_ms": 60.0, "p95_ms": 0.9, "throughput": 190.0, "errors": 1}}
+
+    regressions = compare(current, baseline, tolerance=0.2)
+
+    assert regressions == ["chat@c8 p50_ms: 40.0 -> 60.0", "chat@c8 errors: 0 -> 1"]
+
+
+def test_fake_llm_error_rate_is_deterministic():
+    async def failures(seed):
+        fake = FakeLLM(ttft=0, tokens_per_second=0, error_rate=0.5, seed=seed)
+        failed = []
+        for _ in range(20):
+            try:
+                await fake.chat("qwen3:1.7b", [{"role": "user", "content": "hi"}])
+                failed.append(False)
+            except FakeBackendError:
+                failed.append(True)
+        return failed
+
+    first, second = asyncio.run(failures(1)), asyncio.run(failures(1))
+    assert first == second and any(first) and not all(first)
+
+
+def test_fake_http_backend_speaks_ollama_and_groq():
+    app = create_app(FakeLLM(ttft=0, tokens_per_second=0, completion_tokens=8))
+    messages = [{"role": "user", "content": "Salut"}]
+
+    async def run():
+        ollama_client = ollama.AsyncClient(host="http://fake", transport=httpx.ASGITransport(app=app))
+        listed = await ollama_client.list()
+        reply = await ollama_client.chat("qwen3:1.7b", messages)
+        parts = [part async for part in await ollama_client.chat("qwen3:1.7b", messages, stream=True)]
+
+        groq_http = httpx.AsyncClient(transport=httpx.ASGITransport(app=app))
+        groq_client = AsyncGroq(api_key="fake", base_url="http://fake", http_client=groq_http)
+        models = await groq_client.models.list()
+        completion = await groq_client.chat.completions.create(model="llama-3.3-70b-versatile", messages=messages)
+        await groq_http.aclose()
+        return listed, reply, parts, models, completion
+
+    listed, reply, parts, models, completion = asyncio.run(run())
+
+    assert [model.model for model in listed.models] == ["qwen3:1.7b", "llama-3.3-70b-versatile"]
+    assert '"want_to_speak": false' in reply.message.content
+    assert parts[-1].done and parts[-1].eval_count == reply.eval_count
+    assert "".join(part.message.content for part in parts) == reply.message.content
+    assert [model.id for model in models.data] == ["qwen3:1.7b", "llama-3.3-70b-versatile"]
+    assert completion.choices[0].message.content == reply.message.content
+    assert completion.usage.completion_tokens == reply.eval_count
+
+
+def test_synthetic_memories_are_deterministic_and_ordered():
+    start, end = datetime(2024, 1, 1), datetime(2025, 1, 1)
+    first = MemoryGenerator(3, start, end).chunk(0, 2000)
+    again = MemoryGenerator(3, start, end).chunk(0, 2000)
+
+    assert first == again and len(first) == 2000
+    timestamps = [row["timestamp"] for row in first]
+    assert timestamps == sorted(timestamps) and start <= timestamps[0] and timestamps[-1] <= end
+    # activity grows over the year
+    assert sum(timestamp.month > 6 for timestamp in timestamps) > 1200
+    assert all(row["source"].startswith("synthetic:") for row in first)
+    assert any(row["author"] == "aletheia" and row["tags"] == ["summary", "conversation", "discord"] for row in first)
+
+
+def test_copy_text_escapes_fields_and_arrays():
+    assert copy_field(None) == "\\N"
+    assert copy_field("a\tb\\c\nd") == "a\\tb\\\\c\\nd"
+    assert copy_field(['dit "salut"', "x,y"]) == '{"dit \\\\"salut\\\\"","x,y"}'
+    row = {"content": "gg", "author": "1", "timestamp": datetime(2025, 3, 1, 21, 5), "source": "synthetic:x", "tags": None}
+    assert copy_text([row]) == "gg\t1\t2025-03-01 21:05:00\tsynthetic:x\t\\N\n"
+
+
+def test_shards_split_chunks_between_workers():
+    assert shard_chunks(CHUNK_ROWS * 10, 4) == [(0, 3), (3, 6), (6, 9), (9, 10)]
+    assert shard_chunks(10, 8) == [(0, 1)]
+
+
+def test_fulltext_scenarios_match_the_shared_data_set():
+    import random
+
+    from benchmarks.memory_data import KEYWORDS, TAGS
+    from benchmarks.memory_fulltext import scenario_arguments
+
+    rows = MemoryGenerator(0, datetime(2024, 1, 1), datetime(2025, 1, 1)).chunk(0, 20000)
+    text = " ".join(row["content"].lower() for row in rows)
+    tags = {tag for row in rows for tag in row["tags"] or []}
+
+    # every keyword and tag a scenario can ask for is present in the seeded rows
+    assert all(keyword.lower() in text for keyword in KEYWORDS)
+    assert set(TAGS) <= tags
+    arguments = scenario_arguments("keyword_and_tag", random.Random(1))
+    assert arguments["query"] in KEYWORDS and arguments["tags"][0] in TAGS
@@ -0,0 +1,58 @@
+import asyncio
+import sys
+import threading
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+BACK_PACKAGE_ROOT = PROJECT_ROOT / "src" / "back"
+if str(BACK_PACKAGE_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACK_PACKAGE_ROOT))
+
+from concurrency.calls import stream_client  # noqa: E402
+
+
+def test_blocking_stream_is_closed_after_a_cancelled_next():
+    release = threading.Event()
+    waiting = threading.Event()
+    threads = []
+    closed = []
+
+    def chat_stream():
+        try:
+            threads.append(threading.get_ident())
+            yield "un"
+            threads.append(threading.get_ident())
+            waiting.set()
+            release.wait(5)
+            yield "deux"
+        finally:
+            threads.append(threading.get_ident())
+            closed.append(True)
+
+    async def run():
+        stream = stream_client(chat_stream)
+
+        async def consume():
+            return [chunk async for chunk in stream]
+
+        task = asyncio.create_task(consume())
+        await asyncio.to_thread(waiting.wait, 5)
+        task.cancel()
+        # the cancelled next() is still running; close() must wait for it instead of failing
+        release.set()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    asyncio.run(run())
+
+    assert closed == [True]
+    assert len(set(threads)) == 1
+
+
+def test_blocking_stream_yields_every_chunk():
+    async def run():
+        return [chunk async for chunk in stream_client(lambda: iter(["a", "b", "c"]))]
+
+    assert asyncio.run(run()) == ["a", "b", "c"]
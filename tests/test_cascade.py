@@ -0,0 +1,74 @@
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+BACK_PACKAGE_ROOT = PROJECT_ROOT / "src" / "back"
+if str(BACK_PACKAGE_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACK_PACKAGE_ROOT))
+
+from routing.cascade import CascadeTier, ModelCascade  # noqa: E402
+
+
+def make_call(replies):
+    calls = []
+
+    async def call(model, messages, options):
+        calls.append(model)
+        return {"model": model, "message": {"role": "assistant", "content": replies[model]}}
+
+    return call, calls
+
+
+def make_cascade(**kwargs):
+    return ModelCascade(
+        [CascadeTier("qwen3:1.7b", 8192, 0.0)],
+        CascadeTier("llama-3.3-70b-versatile", 131072, 0.6),
+        **kwargs,
+    )
+
+
+def test_silent_small_model_answer_is_kept():
+    cascade = make_cascade()
+    call, calls = make_call({"qwen3:1.7b": '<think>rien</think>{"want_to_speak": false, "content": ""}'})
+
+    result = asyncio.run(cascade.chat([{"role": "user", "content": "salut"}], None, call))
+
+    assert calls == ["qwen3:1.7b"]
+    assert result["cascade"] == {"escalated": False, "reason": None}
+    assert cascade.stats()["decisions"] == {"small_only": 1}
+    assert cascade.stats()["estimated_saved_cost"] > 0
+
+
+def test_escalates_when_small_model_wants_to_speak():
+    cascade = make_cascade()
+    reply = json.dumps({"want_to_speak": True, "content": "Bonjour !"})
+    call, calls = make_call({"qwen3:1.7b": reply, "llama-3.3-70b-versatile": reply})
+
+    result = asyncio.run(cascade.chat([{"role": "user", "content": "salut"}], None, call))
+
+    assert calls == ["qwen3:1.7b", "llama-3.3-70b-versatile"]
+    assert result["model"] == "llama-3.3-70b-versatile"
+    assert json.loads(result["choices"][0]["message"]["content"])["content"] == "Bonjour !"
+    assert result["cascade"]["reason"] == "wants_to_speak"
+
+
+def test_escalates_on_low_confidence_or_invalid_reply():
+    cascade = make_cascade(confidence_threshold=0.7)
+    call, _ = make_call({"qwen3:1.7b": '{"want_to_speak": false, "confidence": 0.2}', "llama-3.3-70b-versatile": "{}"})
+    asyncio.run(cascade.chat([], None, call))
+    call, _ = make_call({"qwen3:1.7b": "pas du json", "llama-3.3-70b-versatile": "{}"})
+    asyncio.run(cascade.chat([], None, call))
+
+    assert cascade.stats()["decisions"] == {"low_confidence": 1, "invalid_reply": 1}
+
+
+def test_prompt_larger_than_small_context_goes_straight_to_large_model():
+    cascade = make_cascade()
+    call, calls = make_call({"llama-3.3-70b-versatile": "{}"})
+
+    asyncio.run(cascade.chat([{"role": "user", "content": "x" * 40000}], None, call))
+
+    assert calls == ["llama-3.3-70b-versatile"]
+    assert cascade.stats()["decisions"] == {"context_overflow": 1}
@@ -0,0 +1,118 @@
+import asyncio
+import json
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+BACK_PACKAGE_ROOT = PROJECT_ROOT / "src" / "back"
+if str(BACK_PACKAGE_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACK_PACKAGE_ROOT))
+
+from ingest.channel_export import channel_id_from_path, export_memory, file_records, import_records  # noqa: E402
+from ingest.json_stream import JSONArrayReader, aiter_json_array, iter_json_array  # noqa: E402
+
+
+def export_messages(count):
+    return [
+        {
+            "author": "293414992663805952",
+            "content": f"Message {i} : « thé » ou café ?",
+            "timestamp": f"2024-02-01T08:{i % 60:02d}:00.123000+00:00",
+            "attachments": [],
+            "stickers": [],
+            "reactions": [{"👍": 2}] if i % 3 == 0 else [],
+        }
+        for i in range(count)
+    ]
+
+
+class FakeImportDB:
+    def __init__(self):
+        self.rows = {}
+        self.batches = []
+
+    async def import_memories(self, memories):
+        self.batches.append(len(memories))
+        inserted = 0
+        for memory in memories:
+            if memory["import_key"] not in self.rows:
+                self.rows[memory["import_key"]] = memory
+                inserted += 1
+        return inserted
+
+
+async def as_async(items):
+    for item in items:
+        yield item
+
+
+@pytest.mark.parametrize("size", [1, 2, 7, 64, 100000])
+def test_array_items_are_parsed_whatever_the_piece_size(size):
+    messages = export_messages(20) + [[1, 2], "texte", 12345, True, None]
+    text = json.dumps(messages, ensure_ascii=False, indent=4)
+
+    parsed = list(iter_json_array(text[i:i + size] for i in range(0, len(text), size)))
+
+    assert parsed == messages
+
+
+def test_chunks_split_inside_utf8_characters():
+    data = json.dumps(export_messages(5), ensure_ascii=False).encode("utf-8")
+
+    async def collect():
+        return [item async for item in aiter_json_array(as_async(data[i:i + 3] for i in range(0, len(data), 3)))]
+
+    assert asyncio.run(collect()) == export_messages(5)
+
+
+@pytest.mark.parametrize("text", ['{"author": "1"}', '[{"a": 1}', '[{"a": 1}] trailing', '[{"a": 1} {"b": 2}]'])
+def test_malformed_arrays_are_rejected(text):
+    with pytest.raises(ValueError):
+        list(iter_json_array([text]))
+
+
+def test_reader_bounds_the_buffered_item():
+    reader = JSONArrayReader(max_item_chars=100)
+
+    with pytest.raises(ValueError):
+        reader.feed('[{"content": "' + "x" * 200)
+
+
+def test_export_record_mapping():
+    record = {
+        "author": "177442452934754304",
+        "content": "regardez ça",
+        "timestamp": "2024-02-01T08:30:00+01:00",
+        "attachments": ["https://cdn.discordapp.com/attachments/1/2/capture.png"],
+        "stickers": ["pepe"],
+        "reactions": [{"👍": 3}, {"<:kekw:1202723383897235488>": 1}, {"👍": 1}],
+    }
+
+    memory = export_memory(record, "discord:42")
+
+    assert memory["content"] == "regardez ça\nhttps://cdn.discordapp.com/attachments/1/2/capture.png\n[sticker: pepe]"
+    assert memory["timestamp"] == datetime(2024, 2, 1, 7, 30)
+    assert memory["tags"] == ["reaction:👍", "reaction:<:kekw:1202723383897235488>", "sticker:pepe"]
+    assert memory["source"] == "discord:42" and len(memory["import_key"]) == 40
+    assert export_memory({**record, "content": "", "attachments": [], "stickers": []}, "discord:42") is None
+
+
+def test_reimport_skips_existing_rows(tmp_path):
+    path = tmp_path / "channel_1202714609396486154_data.json"
+    records = export_messages(25) + [{"author": "1", "content": "", "timestamp": "2024-02-01T08:00:00"}, {"content": "no author"}, "not a message"]
+    path.write_text(json.dumps(records, ensure_ascii=False, indent=4), encoding="utf-8")
+    db = FakeImportDB()
+    source = f"discord:{channel_id_from_path(path)}"
+
+    first = asyncio.run(import_records(db, file_records(path), source, batch_size=10))
+    second = asyncio.run(import_records(db, file_records(path), source, batch_size=10))
+
+    assert source == "discord:1202714609396486154"
+    assert db.batches == [10, 10, 5, 10, 10, 5]
+    assert (first["read"], first["inserted"], first["duplicates"], first["empty"], first["invalid"]) == (28, 25, 0, 1, 2)
+    assert (second["inserted"], second["duplicates"]) == (0, 25)
+    assert first["rows_per_second"] > 0
+    assert len(db.rows) == 25
@@ -0,0 +1,83 @@
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+BACK_PACKAGE_ROOT = PROJECT_ROOT / "src" / "back"
+if str(BACK_PACKAGE_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACK_PACKAGE_ROOT))
+
+from context.budget import ContextBudget, TokenCounter  # noqa: E402
+
+
+def history(turns):
+    messages = [{"role": "system", "content": "Tu es Aletheia."}]
+    for i in range(turns):
+        messages.append({"role": "user", "content": f"message {i} " + "blabla " * 40})
+    return messages
+
+
+def test_short_prompt_is_untouched():
+    budget = ContextBudget(output_reserve=100)
+    messages = history(3)
+
+    kept, report = budget.fit(messages, 8192)
+
+    assert kept is messages
+    assert report["dropped"] == 0
+
+
+def test_oldest_turns_dropped_and_system_prompt_pinned():
+    budget = ContextBudget(output_reserve=100)
+    messages = history(20)
+
+    kept, report = budget.fit(messages, 1000)
+
+    assert kept[0] == messages[0]
+    assert kept[-1] == messages[-1]
+    assert kept[1:] == messages[-len(kept) + 1:]
+    assert report["dropped"] == len(messages) - len(kept)
+    assert report["tokens"] <= 900
+    assert budget.stats()["trimmed_requests"] == 1
+
+
+def test_newest_message_kept_even_when_over_budget():
+    budget = ContextBudget(output_reserve=0)
+    messages = [{"role": "system", "content": "x" * 400}, {"role": "user", "content": "y" * 400}]
+
+    kept, _ = budget.fit(messages, 50)
+
+    assert kept == messages
+
+
+def test_summarise_mode_replaces_dropped_turns():
+    budget = ContextBudget(output_reserve=100, mode="summarise", summary_tokens=120)
+    messages = history(20)
+
+    kept, report = budget.fit(messages, 1000)
+
+    summary = kept[1]
+    assert summary["role"] == "system"
+    assert summary["content"].startswith("Earlier messages, abbreviated:")
+    dropped_last = messages[report["dropped"]]["content"]
+    assert dropped_last[:20] in summary["content"]
+    assert report["tokens"] <= 900
+
+
+def test_counts_are_memoised_across_a_sliding_window():
+    counter = TokenCounter()
+    messages = history(10)
+    for message in messages:
+        counter.count(message)
+    for message in messages[1:] + [{"role": "user", "content": "nouveau"}]:
+        counter.count(message)
+
+    assert counter.misses == len(messages) + 1
+    assert counter.hits == len(messages) - 1
+
+
+def test_window_lookup_order():
+    budget = ContextBudget(default_window=4096, windows={"qwen3:1.7b": 8192})
+
+    assert budget.window("qwen3:1.7b", 32768) == 8192
+    assert budget.window("llama-3.3-70b-versatile", 131072) == 131072
+    assert budget.window("mistral") == 4096
@@ -0,0 +1,253 @@
+import asyncio
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+BACK_PACKAGE_ROOT = PROJECT_ROOT / "src" / "back"
+if str(BACK_PACKAGE_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACK_PACKAGE_ROOT))
+
+from db.compaction import CompactionRunning, MemoryCompactor, window_end  # noqa: E402
+
+
+class FakeCompactionDB:
+    """Groups memories the way compaction_groups does, with a week window."""
+
+    def __init__(self, memories):
+        self.memories = {memory["id"]: memory for memory in memories}
+        self.summaries = []
+        self.archived = {}
+        self.bounds = []
+
+    def _key(self, memory):
+        start = memory["timestamp"] - timedelta(days=memory["timestamp"].weekday())
+        return memory["author"], memory["source"], (memory["tags"] or [""])[0], start.replace(hour=0, minute=0, second=0, microsecond=0)
+
+    async def compaction_groups(self, before, window, min_size, limit):
+        groups = {}
+        for memory in self.memories.values():
+            if memory["timestamp"] < before:
+                groups.setdefault(self._key(memory), []).append(memory)
+        rows = [
+            {"author": key[0], "source": key[1], "tag": key[2], "window_start": key[3], "memories": len(members)}
+            for key, members in sorted(groups.items(), key=lambda item: item[0][3]) if len(members) >= min_size
+        ]
+        return rows[:limit]
+
+    async def compaction_group(self, author, source, tag, start, end, before, limit):
+        members = [
+            memory for memory in self.memories.values()
+            if self._key(memory) == (author, source, tag, start) and start <= memory["timestamp"] < min(end, before)
+        ]
+        return sorted(members, key=lambda memory: (memory["timestamp"], memory["id"]))[:limit]
+
+    async def replace_with_summary(self, summary, memory_ids, start=None, end=None):
+        self.bounds.append((start, end))
+        moved = [self.memories.pop(memory_id) for memory_id in memory_ids if memory_id in self.memories]
+        if not moved:
+            return None
+        summary_id = 1000 + len(self.summaries)
+        self.summaries.append({**summary, "id": summary_id, "compacted_from": len(moved)})
+        for memory in moved:
+            self.archived[memory["id"]] = summary_id
+        return summary_id
+
+
+def old_memories(count, author="milo", tags=None, start=datetime(2025, 3, 3, 9, 0)):
+    return [
+        {"id": i, "content": f"Milo parle du thé numéro {i}", "author": author, "timestamp": start + timedelta(hours=i), "source": "discord", "tags": tags}
+        for i in range(1, count + 1)
+    ]
+
+
+class FakeChat:
+    def __init__(self, reply="<think>hmm</think>Milo a parlé de thé toute la semaine.", fail=False, delay=0):
+        self.reply = reply
+        self.fail = fail
+        self.delay = delay
+        self.calls = []
+        self.active = 0
+        self.max_active = 0
+
+    async def __call__(self, model, messages, options):
+        self.calls.append((model, messages, options))
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+            if self.fail:
+                raise ConnectionError("backend down")
+            return {"message": {"content": self.reply}, "prompt_eval_count": 100, "eval_count": 20}
+        finally:
+            self.active -= 1
+
+
+def test_group_is_replaced_by_a_summary_with_merged_tags():
+    memories = old_memories(6, tags=["gouts"])
+    memories[2]["tags"] = ["gouts", "the"]
+    db = FakeCompactionDB(memories)
+    chat = FakeChat()
+    compactor = MemoryCompactor(db, chat, "summariser", min_group=5)
+
+    report = asyncio.run(compactor.run_once())
+
+    assert report["summaries"] == 1 and report["archived"] == 6 and report["tokens"] == 120
+    summary = db.summaries[0]
+    assert summary["content"] == "Milo a parlé de thé toute la semaine."
+    assert summary["author"] == "milo" and summary["source"] == "discord"
+    assert summary["tags"] == ["gouts", "the"]
+    assert summary["timestamp"] == memories[-1]["timestamp"]
+    assert set(db.archived) == {1, 2, 3, 4, 5, 6}
+    # the week bounds let the archive query prune partitions
+    assert db.bounds == [(datetime(2025, 3, 3), datetime(2025, 3, 10))]
+    model, messages, options = chat.calls[0]
+    assert model == "summariser" and options["num_predict"] == 300
+    assert "numéro 1" in messages[1]["content"]
+
+
+def test_long_memories_are_cut_so_a_listed_group_is_compacted():
+    memories = old_memories(5)
+    for memory in memories:
+        memory["content"] = f"Milo raconte sa semaine numéro {memory['id']} " + "et encore du thé " * 200
+    db = FakeCompactionDB(memories)
+    chat = FakeChat()
+
+    report = asyncio.run(MemoryCompactor(db, chat, "summariser", min_group=5, max_input_tokens=3000).run_once())
+
+    assert report["summaries"] == 1 and report["archived"] == 5
+    lines = chat.calls[0][1][1]["content"].splitlines()
+    assert len(lines) == 5 and all(line.endswith("…") for line in lines)
+    assert sum(len(line) for line in lines) < 3000 * 3.5
+
+
+def test_archived_ids_are_handed_to_on_archive():
+    db = FakeCompactionDB(old_memories(6))
+    compactor = MemoryCompactor(db, FakeChat(), "summariser", min_group=5)
+    archived = []
+
+    async def forget(ids):
+        archived.extend(ids)
+
+    compactor.on_archive = forget
+    asyncio.run(compactor.run_once())
+
+    assert archived == [1, 2, 3, 4, 5, 6]
+
+
+def test_small_and_recent_groups_are_left_alone():
+    recent = old_memories(10, author="aletheia", start=datetime.now() - timedelta(days=2))
+    db = FakeCompactionDB(old_memories(3) + [{**memory, "id": memory["id"] + 100} for memory in recent])
+    chat = FakeChat()
+
+    report = asyncio.run(MemoryCompactor(db, chat, "summariser", min_group=5).run_once())
+
+    assert report["groups"] == 0 and chat.calls == []
+    assert len(db.memories) == 13
+
+
+def test_large_group_is_resumed_on_the_next_run():
+    db = FakeCompactionDB(old_memories(40))
+    compactor = MemoryCompactor(db, FakeChat(), "summariser", min_group=5, max_input_tokens=120)
+
+    first = asyncio.run(compactor.run_once())
+    second = asyncio.run(compactor.run_once())
+
+    assert 5 <= first["archived"] < 40
+    assert second["archived"] > 0
+    # the oldest memories go first and summaries are never picked up again
+    assert min(db.archived) == 1
+    assert all(memory_id not in db.memories for memory_id in range(1, first["archived"] + 1))
+
+
+def test_token_budget_stops_new_summaries():
+    weeks = [old_memories(5, start=datetime(2025, 1, 6) + timedelta(weeks=week)) for week in range(4)]
+    memories = [{**memory, "id": week * 10 + memory["id"]} for week, group in enumerate(weeks) for memory in group]
+    db = FakeCompactionDB(memories)
+    chat = FakeChat()
+    compactor = MemoryCompactor(db, chat, "summariser", min_group=5, concurrency=1, token_budget=200)
+
+    report = asyncio.run(compactor.run_once())
+
+    assert report["groups"] == 4
+    assert len(chat.calls) == 2
+    assert report["budget_exhausted"] is True
+    assert len(db.memories) == 10
+
+
+def test_window_straddling_the_age_cutoff_keeps_younger_memories():
+    # a Wednesday noon cutoff, in the middle of the week of 2025-03-03
+    cutoff = datetime(2025, 3, 5, 12, 0)
+    memories = old_memories(10, start=cutoff - timedelta(hours=6, minutes=30))
+    db = FakeCompactionDB(memories)
+    compactor = MemoryCompactor(db, FakeChat(), "summariser", min_group=5, min_age_days=(datetime.now() - cutoff) / timedelta(days=1))
+
+    report = asyncio.run(compactor.run_once())
+
+    assert report["summaries"] == 1 and report["archived"] == 6
+    assert set(db.archived) == {1, 2, 3, 4, 5, 6}
+    assert all(memory["timestamp"] > cutoff for memory in db.memories.values()) and len(db.memories) == 4
+
+
+def test_concurrent_groups_reserve_the_budget_before_reading_memories():
+    weeks = [old_memories(5, start=datetime(2025, 1, 6) + timedelta(weeks=week)) for week in range(4)]
+    db = FakeCompactionDB([{**memory, "id": week * 10 + memory["id"]} for week, group in enumerate(weeks) for memory in group])
+    read_group = db.compaction_group
+
+    async def slow_read(*args, **kwargs):
+        await asyncio.sleep(0.01)
+        return await read_group(*args, **kwargs)
+
+    db.compaction_group = slow_read
+    chat = FakeChat()
+
+    report = asyncio.run(MemoryCompactor(db, chat, "summariser", concurrency=4, token_budget=100).run_once())
+
+    # the first group's reservation is seen by the others while it reads its memories
+    assert len(chat.calls) == 1
+    assert report["budget_exhausted"] is True
+    assert report["tokens"] == 120
+
+
+def test_concurrency_limits_calls_in_flight():
+    weeks = [old_memories(5, start=datetime(2025, 1, 6) + timedelta(weeks=week)) for week in range(6)]
+    db = FakeCompactionDB([{**memory, "id": week * 10 + memory["id"]} for week, group in enumerate(weeks) for memory in group])
+    chat = FakeChat(delay=0.01)
+
+    report = asyncio.run(MemoryCompactor(db, chat, "summariser", concurrency=2).run_once())
+
+    assert report["summaries"] == 6
+    assert chat.max_active == 2
+
+
+def test_failed_summaries_keep_the_memories():
+    db = FakeCompactionDB(old_memories(6))
+    compactor = MemoryCompactor(db, FakeChat(fail=True), "summariser")
+
+    report = asyncio.run(compactor.run_once())
+
+    assert report["failures"] == 1 and report["summaries"] == 0
+    assert len(db.memories) == 6
+    assert compactor.stats()["failures"] == 1
+
+
+def test_second_run_is_refused_while_one_is_in_progress():
+    db = FakeCompactionDB(old_memories(6))
+    compactor = MemoryCompactor(db, FakeChat(delay=0.05), "summariser")
+
+    async def run():
+        first = asyncio.create_task(compactor.run_once())
+        await asyncio.sleep(0.01)
+        with pytest.raises(CompactionRunning):
+            await compactor.run_once()
+        return await first
+
+    assert asyncio.run(run())["summaries"] == 1
+
+
+def test_window_end():
+    assert window_end(datetime(2025, 3, 3), "day") == datetime(2025, 3, 4)
+    assert window_end(datetime(2025, 3, 3), "week") == datetime(2025, 3, 10)
+    assert window_end(datetime(2025, 2, 1), "month") == datetime(2025, 3, 1)
@@ -0,0 +1,68 @@
+import asyncio
+import sys
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+BACK_PACKAGE_ROOT = PROJECT_ROOT / "src" / "back"
+if str(BACK_PACKAGE_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACK_PACKAGE_ROOT))
+
+from db.client import DBClient, add_months, decode_memory_cursor, encode_memory_cursor, fulltext_query, memory_partition_month, memory_partition_name  # noqa: E402
+
+
+def test_cursor_round_trip_and_rejects_garbage():
+    timestamp = datetime(2025, 10, 14, 21, 40, 12, 903114)
+
+    assert decode_memory_cursor(encode_memory_cursor(timestamp, 42)) == (timestamp, 42)
+    with pytest.raises(ValueError):
+        decode_memory_cursor("bm90IGEgY3Vyc29y")
+    with pytest.raises(ValueError):
+        decode_memory_cursor("%%%")
+
+
+def test_iter_memories_reads_page_after_page(monkeypatch):
+    start = datetime(2025, 10, 1)
+    rows = [{"id": i, "timestamp": start + timedelta(seconds=i // 3)} for i in range(10)]
+    calls = []
+
+    async def read_memories(after=None, limit=100, author=None, source=None, since=None, until=None):
+        calls.append(after)
+        matching = [row for row in rows if after is None or (row["timestamp"], row["id"]) > after]
+        return matching[:limit]
+
+    db = DBClient("")
+    monkeypatch.setattr(db, "read_memories", read_memories)
+
+    async def collect():
+        return [row["id"] async for row in db.iter_memories(page_size=4)]
+
+    assert asyncio.run(collect()) == list(range(10))
+    assert calls == [None, (rows[3]["timestamp"], 3), (rows[7]["timestamp"], 7)]
+
+
+def test_fulltext_query_uses_french_tsquery_and_tag_containment():
+    ranked, ranked_params = fulltext_query("thé vert", ["gouts", "milo"], limit=5)
+    tagged, tagged_params = fulltext_query(None, ["gouts"], any_tag=True, author="milo")
+
+    assert "websearch_to_tsquery('french', :query)" in ranked and "content_tsv @@ query" in ranked
+    assert "tags @> CAST(:tags AS VARCHAR(50)[])" in ranked and ranked.endswith("ORDER BY rank DESC, timestamp DESC LIMIT :limit")
+    assert ranked_params == {"limit": 5, "query": "thé vert", "tags": ["gouts", "milo"]}
+    assert "tags && CAST" in tagged and "rank" not in tagged and tagged_params["author"] == "milo"
+
+
+def test_fulltext_query_time_bounds():
+    command, params = fulltext_query("thé", since=datetime(2025, 3, 1), until=datetime(2025, 4, 1))
+
+    assert "timestamp >= :since AND timestamp < :until" in command
+    assert params["since"] == datetime(2025, 3, 1) and params["until"] == datetime(2025, 4, 1)
+
+
+def test_partition_names_and_months():
+    assert add_months(date(2025, 11, 1), 2) == date(2026, 1, 1)
+    assert add_months(date(2025, 1, 31), -1) == date(2024, 12, 1)
+    assert memory_partition_name(date(2025, 3, 1)) == "LongTermMemory_y2025m03"
+    assert memory_partition_month("LongTermMemory_y2025m03") == date(2025, 3, 1)
+    assert memory_partition_month("LongTermMemory_default") is None
@@ -0,0 +1,130 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+BACK_PACKAGE_ROOT = PROJECT_ROOT / "src" / "back"
+if str(BACK_PACKAGE_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACK_PACKAGE_ROOT))
+
+from db.client import MemoryBufferFull, MemoryWriter  # noqa: E402
+
+
+class FakeMemoryDB:
+    def __init__(self):
+        self.batches = []
+        self.fail = False
+
+    async def write_memories(self, memories):
+        await asyncio.sleep(0)
+        if self.fail:
+            raise ConnectionError("db down")
+        self.batches.append([memory["content"] for memory in memories])
+        return len(memories)
+
+
+def test_full_batches_are_written_without_waiting_for_the_interval():
+    db = FakeMemoryDB()
+    writer = MemoryWriter(db, batch_size=3, flush_interval=60)
+
+    async def run():
+        writer.start()
+        for i in range(7):
+            await writer.put(f"m{i}", "milo")
+        await asyncio.sleep(0.01)
+        early = list(db.batches)
+        await writer.drain()
+        return early
+
+    early = asyncio.run(run())
+
+    assert early == [["m0", "m1", "m2"], ["m3", "m4", "m5"], ["m6"]]
+    assert writer.stats()["written"] == 7
+
+
+def test_partial_batch_is_written_after_the_interval():
+    db = FakeMemoryDB()
+    writer = MemoryWriter(db, batch_size=100, flush_interval=0.02)
+
+    async def run():
+        writer.start()
+        await writer.put("hello", "milo", tags=["chat"])
+        await asyncio.sleep(0.1)
+        await writer.stop()
+
+    asyncio.run(run())
+
+    assert db.batches == [["hello"]]
+
+
+def test_failed_flush_keeps_memories_and_full_buffer_pushes_back():
+    db = FakeMemoryDB()
+    db.fail = True
+    writer = MemoryWriter(db, batch_size=2, flush_interval=0.01, max_buffer=2, put_timeout=0.05)
+
+    async def run():
+        writer.start()
+        await writer.put("a", "milo")
+        await writer.put("b", "milo")
+        with pytest.raises(MemoryBufferFull):
+            await writer.put("c", "milo")
+        db.fail = False
+        # room is made by the next successful flush
+        await writer.put("c", "milo")
+        await writer.drain()
+        with pytest.raises(RuntimeError):
+            await writer.put("d", "milo")
+
+    asyncio.run(run())
+
+    stats = writer.stats()
+    assert [content for batch in db.batches for content in batch] == ["a", "b", "c"]
+    assert stats["failures"] >= 1 and stats["rejected"] == 1 and stats["buffered"] == 0
+
+
+def test_waiting_puts_never_overfill_the_buffer():
+    writer = MemoryWriter(FakeMemoryDB(), batch_size=10, max_buffer=2, put_timeout=0.1)
+
+    async def run():
+        await writer.put("a", "milo")
+        await writer.put("b", "milo")
+        waiting = [asyncio.create_task(writer.put(f"w{i}", "milo")) for i in range(3)]
+        await asyncio.sleep(0.01)
+        # a flush writing a single row wakes every waiter, but only one fits
+        del writer._buffer[0]
+        async with writer._space:
+            writer._space.notify_all()
+        return await asyncio.gather(*waiting, return_exceptions=True)
+
+    results = asyncio.run(run())
+
+    assert len(writer._buffer) == 2
+    assert sum(isinstance(result, MemoryBufferFull) for result in results) == 2
+    assert writer.stats()["rejected"] == 2
+
+
+def test_drain_lets_the_flush_in_progress_finish():
+    class SlowMemoryDB(FakeMemoryDB):
+        async def write_memories(self, memories):
+            written = await super().write_memories(memories)
+            # committed, the answer is still on its way
+            await asyncio.sleep(0.05)
+            return written
+
+    db = SlowMemoryDB()
+    writer = MemoryWriter(db, batch_size=2, flush_interval=60)
+
+    async def run():
+        writer.start()
+        await writer.put("a", "milo")
+        await writer.put("b", "milo")
+        await asyncio.sleep(0.01)
+        # the background flush is writing ["a", "b"] now
+        await writer.drain()
+
+    asyncio.run(run())
+
+    assert db.batches == [["a", "b"]]
+    assert writer.stats()["written"] == 2 and writer.stats()["buffered"] == 0
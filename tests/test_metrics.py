@@ -0,0 +1,95 @@
+import asyncio
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+BACK_PACKAGE_ROOT = PROJECT_ROOT / "src" / "back"
+if str(BACK_PACKAGE_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACK_PACKAGE_ROOT))
+
+from metrics.registry import Registry  # noqa: E402
+from metrics.middleware import MetricsMiddleware  # noqa: E402
+from routing.responses import response_timings  # noqa: E402
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = Registry()
+    latency = registry.histogram("latency_seconds", "Latency", ("model",), buckets=(0.1, 1.0))
+    latency.observe(0.05, "qwen3")
+    latency.observe(0.5, "qwen3")
+    latency.observe(5.0, "qwen3")
+
+    text = registry.render()
+
+    assert '# TYPE latency_seconds histogram' in text
+    assert 'latency_seconds_bucket{model="qwen3",le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{model="qwen3",le="1.0"} 2' in text
+    assert 'latency_seconds_bucket{model="qwen3",le="+Inf"} 3' in text
+    assert 'latency_seconds_count{model="qwen3"} 3' in text
+    assert 'latency_seconds_sum{model="qwen3"} 5.55' in text
+
+
+def test_counter_gauge_and_collector_render():
+    registry = Registry()
+    errors = registry.counter("errors_total", "Errors", ("exception",))
+    in_flight = registry.gauge("in_flight", "In flight")
+    errors.inc('Value"Error')
+    errors.inc('Value"Error')
+    in_flight.inc()
+    in_flight.inc()
+    in_flight.dec()
+    registry.add_collector(lambda: [("queue_depth", "gauge", "Queue", [({"priority": "batch"}, 3)])])
+
+    text = registry.render()
+
+    assert 'errors_total{exception="Value\\"Error"} 2.0' in text
+    assert "in_flight 1.0" in text
+    assert 'queue_depth{priority="batch"} 3' in text
+
+
+def test_middleware_labels_by_route_template_and_counts_errors():
+    registry = Registry()
+
+    class Route:
+        path = "/models/{name}"
+
+    async def app(scope, receive, send):
+        scope["route"] = Route()
+        if scope["path"] == "/boom":
+            raise KeyError("boom")
+        await send({"type": "http.response.start", "status": 404})
+        await send({"type": "http.response.body", "body": b""})
+
+    middleware = MetricsMiddleware(app, registry)
+
+    async def send(message):
+        pass
+
+    async def run():
+        await middleware({"type": "http", "method": "GET", "path": "/models/qwen3"}, None, send)
+        try:
+            await middleware({"type": "http", "method": "GET", "path": "/boom"}, None, send)
+        except KeyError:
+            pass
+
+    asyncio.run(run())
+    text = registry.render()
+
+    assert 'http_request_duration_seconds_count{route="/models/{name}",method="GET",status="404"} 1' in text
+    assert 'http_request_duration_seconds_count{route="/models/{name}",method="GET",status="500"} 1' in text
+    assert 'http_request_exceptions_total{route="/models/{name}",exception="KeyError"} 1.0' in text
+    assert "http_requests_in_flight 0.0" in text
+
+
+def test_response_timings_for_ollama_and_groq():
+    ollama = response_timings({
+        "load_duration": 500_000_000,
+        "prompt_eval_duration": 250_000_000,
+        "eval_count": 40,
+        "eval_duration": 2_000_000_000,
+    })
+    groq = response_timings({"usage": {"queue_time": 0.1, "prompt_time": 0.05, "completion_tokens": 300, "completion_time": 1.5}})
+
+    assert ollama == {"time_to_first_token": 0.75, "tokens_per_second": 20.0}
+    assert abs(groq["time_to_first_token"] - 0.15) < 1e-9
+    assert groq["tokens_per_second"] == 200.0
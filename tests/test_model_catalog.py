@@ -0,0 +1,72 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import ollama
+from groq.types import ModelListResponse
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+BACK_PACKAGE_ROOT = PROJECT_ROOT / "src" / "back"
+if str(BACK_PACKAGE_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACK_PACKAGE_ROOT))
+
+from catalog.model_catalog import ModelCatalog, normalise_models  # noqa: E402
+
+
+def test_normalise_ollama_and_groq_listings():
+    ollama_list = ollama.ListResponse(models=[{"model": "qwen3:1.7b", "size": 1400, "details": {"family": "qwen3"}}])
+    groq_list = ModelListResponse(object="list", data=[{
+        "id": "llama-3.3-70b-versatile", "created": 1, "object": "model", "owned_by": "Meta", "context_window": 131072,
+    }])
+
+    local = normalise_models("ollama", ollama_list)
+    remote = normalise_models("groq", groq_list)
+
+    assert local == [{"name": "qwen3:1.7b", "backend": "ollama", "size": 1400, "context_window": None, "family": "qwen3", "modified_at": None}]
+    assert remote[0]["name"] == "llama-3.3-70b-versatile"
+    assert remote[0]["context_window"] == 131072
+
+
+class Source:
+    def __init__(self, names, fail=False):
+        self.names = names
+        self.fail = fail
+
+    async def list_models(self):
+        if self.fail:
+            raise RuntimeError("offline")
+        return {"models": [{"name": n} for n in self.names]}
+
+
+def test_failed_backend_keeps_previous_entries_and_etag_is_stable():
+    source = Source(["qwen3:latest"])
+    catalog = ModelCatalog([("ollama", source)])
+
+    assert catalog.is_known("anything")
+    asyncio.run(catalog.refresh())
+    etag = catalog.etag
+    source.fail = True
+    asyncio.run(catalog.refresh())
+
+    assert catalog.etag == etag
+    assert catalog.errors == {"ollama": "offline"}
+    assert catalog.is_known("qwen3")
+    assert not catalog.is_known("qwen2")
+
+
+def test_names_are_not_rejected_while_a_backend_is_unlisted():
+    groq = Source(["llama-3.3-70b-versatile"], fail=True)
+    catalog = ModelCatalog([("ollama", Source(["qwen3:1.7b"])), ("groq", groq)])
+
+    asyncio.run(catalog.refresh())
+
+    assert catalog.is_loaded() and catalog.unlisted() == ["groq"]
+    assert catalog.is_known("llama-3.3-70b-versatile")
+    assert catalog.snapshot()["unlisted"] == ["groq"]
+
+    groq.fail = False
+    asyncio.run(catalog.refresh())
+
+    assert catalog.unlisted() == []
+    assert catalog.is_known("llama-3.3-70b-versatile")
+    assert not catalog.is_known("mixtral")
@@ -0,0 +1,69 @@
+import asyncio
+import sys
+from datetime import date
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+BACK_PACKAGE_ROOT = PROJECT_ROOT / "src" / "back"
+if str(BACK_PACKAGE_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACK_PACKAGE_ROOT))
+
+from db.client import memory_partition_name  # noqa: E402
+from db.partitions import PartitionMaintainer  # noqa: E402
+
+
+class FakePartitionDB:
+    def __init__(self, months, default_rows=None):
+        self.months = set(months)
+        # month -> rows sitting in the default partition
+        self.default_rows = dict(default_rows or {})
+        self.detached = []
+
+    async def default_partition_months(self):
+        return sorted(self.default_rows)
+
+    async def create_memory_partition(self, month):
+        if month in self.months:
+            return None
+        self.months.add(month)
+        return self.default_rows.pop(month, 0)
+
+    async def memory_partitions(self):
+        partitions = [{"name": memory_partition_name(month), "month": month} for month in sorted(self.months)]
+        return partitions + [{"name": "LongTermMemory_default", "month": None}]
+
+    async def detach_memory_partition(self, month, drop=False):
+        self.months.discard(month)
+        self.detached.append((month, drop))
+
+
+def test_upcoming_months_are_created_once():
+    db = FakePartitionDB([date(2025, 10, 1), date(2025, 11, 1)])
+    maintainer = PartitionMaintainer(db, months_ahead=3)
+
+    first = asyncio.run(maintainer.run_once(date(2025, 10, 17)))
+    second = asyncio.run(maintainer.run_once(date(2025, 10, 18)))
+
+    assert first["created"] == ["LongTermMemory_y2025m12", "LongTermMemory_y2026m01"]
+    assert second["created"] == []
+    assert maintainer.stats()["runs"] == 2
+
+
+def test_months_in_the_default_partition_get_their_own():
+    db = FakePartitionDB([date(2025, 10, 1)], default_rows={date(2023, 5, 1): 120})
+
+    report = asyncio.run(PartitionMaintainer(db, months_ahead=0).run_once(date(2025, 10, 17)))
+
+    assert report["created"] == ["LongTermMemory_y2023m05"]
+    assert report["moved_rows"] == 120
+    assert db.default_rows == {}
+
+
+def test_partitions_past_retention_are_detached():
+    months = [date(2025, month, 1) for month in range(1, 11)]
+    db = FakePartitionDB(months)
+
+    report = asyncio.run(PartitionMaintainer(db, months_ahead=0, retain_months=6, drop_detached=True).run_once(date(2025, 10, 17)))
+
+    assert report["detached"] == ["LongTermMemory_y2025m01", "LongTermMemory_y2025m02", "LongTermMemory_y2025m03"]
+    assert db.detached == [(date(2025, 1, 1), True), (date(2025, 2, 1), True), (date(2025, 3, 1), True)]
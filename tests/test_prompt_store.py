@@ -0,0 +1,136 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+BACK_PACKAGE_ROOT = PROJECT_ROOT / "src" / "back"
+if str(BACK_PACKAGE_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACK_PACKAGE_ROOT))
+
+from db.client import DEFAULT_SYSTEM_PROMPT, DBClient  # noqa: E402
+from db.prompt_store import PromptNotFound, SystemPromptStore  # noqa: E402
+
+
+class FakePromptDB:
+    def __init__(self):
+        self.rows = []
+        self.queries = []
+        self.fail = False
+
+    async def latest_system_prompt_version(self, name):
+        self.queries.append(("latest", name))
+        if self.fail:
+            raise ConnectionError("db down")
+        versions = [row["version"] for row in self.rows if row["name"] == name]
+        return max(versions) if versions else None
+
+    async def get_system_prompt(self, name, version=None):
+        self.queries.append(("get", name, version))
+        for row in self.rows:
+            if row["name"] == name and row["version"] == version:
+                return dict(row)
+        return None
+
+    async def get_system_prompt_by_id(self, prompt_id):
+        self.queries.append(("id", prompt_id))
+        return next((dict(row) for row in self.rows if row["id"] == prompt_id), None)
+
+    async def create_system_prompt(self, name, content):
+        version = max([row["version"] for row in self.rows if row["name"] == name] or [0]) + 1
+        row = {"id": len(self.rows) + 1, "name": name, "version": version, "content": content, "created_at": None}
+        self.rows.append(row)
+        return dict(row)
+
+
+def test_builtin_prompt_until_a_version_is_stored():
+    db = FakePromptDB()
+    store = SystemPromptStore(db, ttl=60)
+
+    async def run():
+        builtin = await store.get()
+        created = await store.create("aletheia", "v1 du prompt")
+        latest = await store.get()
+        return builtin, created, latest
+
+    builtin, created, latest = asyncio.run(run())
+
+    assert builtin["version"] == 0 and builtin["content"] == DEFAULT_SYSTEM_PROMPT
+    assert created["version"] == 1
+    # the store's own write invalidates the cached latest version
+    assert latest["content"] == "v1 du prompt"
+    assert latest["etag"] != builtin["etag"]
+
+
+def test_versions_are_cached_and_latest_revalidated_after_ttl():
+    db = FakePromptDB()
+    db.rows.append({"id": 7, "name": "aletheia", "version": 1, "content": "v1", "created_at": None})
+    store = SystemPromptStore(db, ttl=60)
+
+    async def run():
+        for _ in range(5):
+            await store.get()
+            await store.get(version=1)
+            await store.get(prompt_id=7)
+        db.rows.append({"id": 8, "name": "aletheia", "version": 2, "content": "v2", "created_at": None})
+        stale = await store.get()
+        store.invalidate("aletheia")
+        fresh = await store.get()
+        return stale, fresh
+
+    stale, fresh = asyncio.run(run())
+
+    assert db.queries == [("latest", "aletheia"), ("get", "aletheia", 1), ("latest", "aletheia"), ("get", "aletheia", 2)]
+    assert stale["version"] == 1 and fresh["version"] == 2
+
+
+def test_unknown_prompt_and_db_outage():
+    db = FakePromptDB()
+    store = SystemPromptStore(db)
+
+    with pytest.raises(PromptNotFound):
+        asyncio.run(store.get("other"))
+    with pytest.raises(PromptNotFound):
+        asyncio.run(store.get(prompt_id=3))
+
+    db.fail = True
+    assert asyncio.run(store.get())["version"] == 0
+
+
+def test_db_client_creates_engine_on_first_use(monkeypatch):
+    monkeypatch.delenv("DB_URL", raising=False)
+    db = DBClient()
+
+    assert not db.configured
+    with pytest.raises(Exception, match="No DB URL"):
+        db.engine
+    assert DBClient("postgresql+asyncpg://u:p@localhost/db")._engine is None
+
+
+def test_db_client_creates_a_single_engine_across_threads(monkeypatch):
+    import threading
+    import time
+
+    from sqlalchemy.ext import asyncio as sqlalchemy_asyncio
+
+    created = []
+    real_create = sqlalchemy_asyncio.create_async_engine
+
+    def slow_create(url):
+        time.sleep(0.05)
+        engine = real_create(url)
+        created.append(engine)
+        return engine
+
+    monkeypatch.setattr(sqlalchemy_asyncio, "create_async_engine", slow_create)
+    db = DBClient("postgresql+asyncpg://u:p@localhost/db")
+    engines = []
+    threads = [threading.Thread(target=lambda: engines.append(db.engine)) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(created) == 1
+    assert all(engine is created[0] for engine in engines)
@@ -0,0 +1,89 @@
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+BACK_PACKAGE_ROOT = PROJECT_ROOT / "src" / "back"
+if str(BACK_PACKAGE_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACK_PACKAGE_ROOT))
+
+from cache.response_cache import ResponseCache  # noqa: E402
+
+
+def test_key_is_canonical():
+    messages = [{"role": "user", "content": "Salut"}]
+    a = ResponseCache.make_key("groq", "m", messages, {"seed": 42, "response_format": {"type": "json_object"}})
+    b = ResponseCache.make_key("GROQ", "m", messages, {"response_format": {"type": "json_object"}, "seed": 42})
+    c = ResponseCache.make_key("ollama", "m", messages, {"seed": 42, "response_format": {"type": "json_object"}})
+    assert a == b
+    assert a != c
+
+
+def test_lru_eviction_by_entries_and_bytes():
+    cache = ResponseCache(max_entries=2, max_bytes=10)
+    cache.set("a", b"1234")
+    cache.set("b", b"1234")
+    assert cache.get("a") == b"1234"  # "b" becomes least recently used
+    cache.set("c", b"1234")
+    assert cache.get("b") is None
+    cache.set("d", b"123456789")
+    assert cache.stats()["bytes"] <= 10
+    assert cache.stats()["evictions"] == 3
+
+
+def test_ttl_expiry():
+    cache = ResponseCache(ttl=0.01)
+    cache.set("a", b"x")
+    time.sleep(0.02)
+    assert cache.get("a") is None
+    assert cache.stats()["misses"] == 1
+
+
+def test_disk_tier_survives_restart(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    cache = ResponseCache(disk_path=path)
+    cache.set("a", b'{"ok": true}')
+    cache.close()
+
+    reopened = ResponseCache(disk_path=path)
+    assert reopened.get("a") == b'{"ok": true}'
+    assert reopened.stats()["disk_hits"] == 1
+    assert reopened.get("a") == b'{"ok": true}'
+    assert reopened.stats()["hits"] == 1
+    reopened.close()
+
+
+def test_disk_tier_is_bounded_and_purges_expired_rows(tmp_path):
+    cache = ResponseCache(ttl=60, disk_path=str(tmp_path / "cache.sqlite"), disk_max_bytes=1000)
+    for i in range(30):
+        cache.set(f"k{i}", b"x" * 100)
+
+    stats = cache.stats()
+    assert stats["disk_bytes"] <= 1000
+    assert stats["disk_evictions"] >= 20
+    # the entries closest to expiry, the oldest writes, went first
+    assert cache._disk_get("k0", time.time()) is None
+    assert cache._disk_get("k29", time.time()) == b"x" * 100
+
+    cache.ttl = 0.01
+    cache.set("short", b"y" * 10)
+    time.sleep(0.02)
+    cache.ttl = 60
+    cache.set("next", b"z" * 10)
+    assert cache._disk_get("short", time.time() - 1) is None
+    cache.close()
+
+
+def test_async_lookups_read_the_disk_tier(tmp_path):
+    import asyncio
+
+    path = str(tmp_path / "cache.sqlite")
+    cache = ResponseCache(disk_path=path)
+    asyncio.run(cache.aset("a", b"1"))
+    cache.close()
+
+    reopened = ResponseCache(disk_path=path)
+    assert asyncio.run(reopened.aget("a")) == b"1"
+    assert asyncio.run(reopened.aget("missing")) is None
+    assert reopened.stats()["disk_hits"] == 1 and reopened.stats()["misses"] == 1
+    reopened.close()
@@ -0,0 +1,116 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+BACK_PACKAGE_ROOT = PROJECT_ROOT / "src" / "back"
+if str(BACK_PACKAGE_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACK_PACKAGE_ROOT))
+
+from routing.router import BackendRouter, CircuitBreaker  # noqa: E402
+
+
+class FakeBackend:
+    def __init__(self, name, delay=0.0, fail=False):
+        self.name = name
+        self.delay = delay
+        self.fail = fail
+        self.models = []
+
+    async def chat(self, model_name, messages, options=None):
+        self.models.append(model_name)
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError(f"{self.name} down")
+        return {"backend": self.name, "model": model_name}
+
+
+MODEL_MAP = {"aletheia": {"groq": "llama-3.3-70b-versatile", "ollama": "qwen3:1.7b"}}
+
+
+def test_failover_uses_mapped_model_name():
+    groq, ollama = FakeBackend("groq", fail=True), FakeBackend("ollama")
+    router = BackendRouter([("groq", groq), ("ollama", ollama)], model_map=MODEL_MAP)
+
+    result = asyncio.run(router.chat("llama-3.3-70b-versatile", []))
+
+    assert result == {"backend": "ollama", "model": "qwen3:1.7b"}
+    assert groq.models == ["llama-3.3-70b-versatile"]
+    assert router.stats()["failovers"] == 1
+
+
+def test_native_backend_is_tried_first():
+    groq, ollama = FakeBackend("groq"), FakeBackend("ollama")
+    router = BackendRouter([("groq", groq), ("ollama", ollama)], model_map=MODEL_MAP)
+
+    result = asyncio.run(router.chat("qwen3:1.7b", []))
+
+    assert result["backend"] == "ollama"
+    assert groq.models == []
+
+
+def test_hedged_request_returns_fastest_answer():
+    slow, fast = FakeBackend("groq", delay=0.5), FakeBackend("ollama")
+    router = BackendRouter([("groq", slow), ("ollama", fast)], model_map=MODEL_MAP, hedge=True, hedge_delay=0.01)
+
+    result = asyncio.run(router.chat("aletheia", []))
+
+    assert result["backend"] == "ollama"
+    assert router.stats()["hedges"] == 1
+    assert router.stats()["hedges_won"] == 1
+
+
+def test_open_breaker_skips_backend():
+    groq, ollama = FakeBackend("groq", fail=True), FakeBackend("ollama")
+    router = BackendRouter([("groq", groq), ("ollama", ollama)], model_map=MODEL_MAP, failure_threshold=2)
+
+    async def main():
+        for _ in range(3):
+            await router.chat("aletheia", [])
+
+    asyncio.run(main())
+    assert len(groq.models) == 2
+    assert router.stats()["backends"]["groq"]["state"] == "open"
+
+
+def test_all_backends_failing_raises_last_error():
+    router = BackendRouter([("groq", FakeBackend("groq", fail=True)), ("ollama", FakeBackend("ollama", fail=True))], model_map=MODEL_MAP)
+
+    with pytest.raises(RuntimeError, match="ollama down"):
+        asyncio.run(router.chat("aletheia", []))
+
+
+def test_breaker_half_open_allows_single_trial():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.0)
+    breaker.record_failure()
+    assert breaker.state == "half-open"
+    assert breaker.allow() is True
+    assert breaker.allow() is False
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+
+def test_gate_is_held_around_the_backend_actually_called():
+    from contextlib import asynccontextmanager
+
+    entered, refused = [], {"groq"}
+
+    @asynccontextmanager
+    async def gate(backend, model_name):
+        if backend in refused:
+            raise RuntimeError(f"{backend} queue full")
+        entered.append((backend, model_name))
+        yield
+
+    groq, ollama = FakeBackend("groq"), FakeBackend("ollama")
+    router = BackendRouter([("groq", groq), ("ollama", ollama)], model_map=MODEL_MAP, failure_threshold=1, gate=gate)
+
+    result = asyncio.run(router.chat("aletheia", []))
+
+    assert result["backend"] == "ollama"
+    assert entered == [("ollama", "qwen3:1.7b")]
+    assert groq.models == []
+    # a refused slot is not a backend failure
+    assert router.stats()["backends"]["groq"]["state"] == "closed"
@@ -0,0 +1,83 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+BACK_PACKAGE_ROOT = PROJECT_ROOT / "src" / "back"
+if str(BACK_PACKAGE_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACK_PACKAGE_ROOT))
+
+from concurrency.singleflight import SingleFlight  # noqa: E402
+
+
+def test_concurrent_callers_share_one_call():
+    calls = []
+
+    async def backend():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "answer"
+
+    async def main():
+        flights = SingleFlight()
+        results = await asyncio.gather(*(flights.do("k", backend) for _ in range(5)))
+        return flights, results
+
+    flights, results = asyncio.run(main())
+    assert results == ["answer"] * 5
+    assert len(calls) == 1
+    assert flights.shared == 4
+    assert flights.in_flight() == 0
+
+
+def test_errors_reach_every_waiter():
+    async def backend():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("boom")
+
+    async def main():
+        flights = SingleFlight()
+        return await asyncio.gather(*(flights.do("k", backend) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert all(isinstance(r, RuntimeError) and str(r) == "boom" for r in results)
+
+
+def test_cancelled_waiter_does_not_cancel_shared_call():
+    async def backend():
+        await asyncio.sleep(0.02)
+        return "answer"
+
+    async def main():
+        flights = SingleFlight()
+        first = asyncio.ensure_future(flights.do("k", backend))
+        second = asyncio.ensure_future(flights.do("k", backend))
+        await asyncio.sleep(0)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(main()) == "answer"
+
+
+def test_abandoned_call_is_cancelled():
+    finished = []
+
+    async def backend():
+        await asyncio.sleep(0.05)
+        finished.append(1)
+
+    async def main():
+        flights = SingleFlight()
+        waiter = asyncio.ensure_future(flights.do("k", backend))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.sleep(0.1)
+        return flights
+
+    flights = asyncio.run(main())
+    assert finished == []
+    assert flights.in_flight() == 0
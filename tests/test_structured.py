@@ -0,0 +1,100 @@
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+BACK_PACKAGE_ROOT = PROJECT_ROOT / "src" / "back"
+if str(BACK_PACKAGE_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACK_PACKAGE_ROOT))
+
+from routing.structured import PersonaStreamParser, early_abort_chat  # noqa: E402
+
+
+def feed_in_pieces(text, size=3):
+    parser = PersonaStreamParser()
+    for i in range(0, len(text), size):
+        parser.feed(text[i:i + size])
+    return parser
+
+
+def test_want_to_speak_false_resolves_before_the_object_ends():
+    parser = PersonaStreamParser()
+    parser.feed('<think>\n{"plan": 1}\n</think>\n{"want_to_speak": fal')
+    assert parser.want_to_speak is None
+    parser.feed("se")
+    assert parser.want_to_speak is False
+    assert parser.error is None and not parser.complete
+
+
+def test_full_reply_with_escapes_and_quoted_boolean():
+    reply = {"want_to_speak": "TRUE", "content": 'Salut "Berlin Est" é\\n', "confidence": 0.8}
+    parser = feed_in_pieces(json.dumps(reply))
+
+    assert parser.complete and parser.error is None
+    assert parser.want_to_speak is True
+    assert parser.content == reply["content"]
+
+
+def test_content_is_available_while_streaming():
+    parser = PersonaStreamParser()
+    parser.feed('{"want_to_speak": true, "content": "Bonjour tout')
+    assert parser.content == "Bonjour tout"
+    parser.feed(' le monde"}')
+    assert parser.content == "Bonjour tout le monde"
+
+
+def test_schema_violations_are_reported_early():
+    assert feed_in_pieces('{"want_to_speak": true, "content": 42').error == "'content' is not a string"
+    assert feed_in_pieces('{"want_to_speak": "maybe"').error == "'want_to_speak' is 'maybe'"
+    assert feed_in_pieces('{"want_to_speak": true, "content": "x", "extra": [').error == "nested value for 'extra'"
+    assert feed_in_pieces('{"content": "x"}').error == "'want_to_speak' is missing"
+
+
+class StreamingClient:
+    def __init__(self, text):
+        self.text = text
+        self.sent = 0
+        self.closed = False
+
+    async def chat_stream(self, model_name, messages, options=None):
+        try:
+            for i in range(0, len(self.text), 4):
+                self.sent += 1
+                yield {"model": model_name, "delta": self.text[i:i + 4], "done": False}
+            yield {"model": model_name, "delta": "", "done": True, "usage": {"prompt_tokens": 10, "completion_tokens": 50}}
+        finally:
+            self.closed = True
+
+
+def test_early_abort_stops_silent_replies():
+    client = StreamingClient(json.dumps({"want_to_speak": False, "content": "blabla " * 50}))
+
+    result = asyncio.run(early_abort_chat(client, "qwen3:1.7b", [{"role": "user", "content": "hi"}]))
+
+    assert client.closed and client.sent < 10
+    assert result["structured"] == {"aborted": True, "valid": True, "error": None, "want_to_speak": False}
+    assert json.loads(result["choices"][0]["message"]["content"]) == {"want_to_speak": False, "content": ""}
+    assert result["choices"][0]["finish_reason"] == "early_abort"
+
+
+def test_early_abort_drops_content_streamed_before_want_to_speak():
+    client = StreamingClient('{"content": "une moitié de phrase", "want_to_speak": false' + " " * 200 + "}")
+
+    result = asyncio.run(early_abort_chat(client, "qwen3:1.7b", [{"role": "user", "content": "hi"}]))
+
+    assert result["structured"]["aborted"] is True
+    assert json.loads(result["choices"][0]["message"]["content"]) == {"want_to_speak": False, "content": ""}
+
+
+def test_early_abort_keeps_replies_that_speak():
+    text = json.dumps({"want_to_speak": True, "content": "Coucou !"})
+    client = StreamingClient(text)
+
+    result = asyncio.run(early_abort_chat(client, "qwen3:1.7b", [{"role": "user", "content": "hi"}]))
+
+    assert result["choices"][0]["message"]["content"] == text
+    assert result["structured"]["aborted"] is False
+    assert result["choices"][0]["finish_reason"] == "stop"
+    assert result["structured"]["valid"] is True
+    assert result["structured"]["want_to_speak"] is True
@@ -0,0 +1,190 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+BACK_PACKAGE_ROOT = PROJECT_ROOT / "src" / "back"
+if str(BACK_PACKAGE_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACK_PACKAGE_ROOT))
+
+from search.embeddings import HashingEmbedder, normalise_rows  # noqa: E402
+from search.memory_search import MemorySearch  # noqa: E402
+from search.vector_index import VectorIndex  # noqa: E402
+
+
+def random_vectors(rows, dim=32, seed=0):
+    return normalise_rows(np.random.default_rng(seed).standard_normal((rows, dim)))
+
+
+def exact_top(vectors, query, k):
+    return list(np.argsort(-(vectors @ normalise_rows(query[None])[0]))[:k])
+
+
+def test_exact_search_matches_brute_force_and_survives_reopen(tmp_path):
+    vectors = random_vectors(500)
+    index = VectorIndex(tmp_path, "test")
+    index.add(np.arange(1, 301), vectors[:300])
+    index.add(np.arange(301, 501), vectors[300:])
+    query = vectors[42] + 0.1 * vectors[7]
+
+    hits = index.search(query, k=5)
+
+    assert [memory_id - 1 for memory_id, _ in hits] == exact_top(vectors, query, 5)
+    assert hits[0][1] >= hits[-1][1]
+    reopened = VectorIndex(tmp_path, "test")
+    assert reopened.count == 500 and reopened.max_id == 500
+    assert reopened.search(query, k=5) == hits
+
+
+def test_interrupted_add_is_truncated_and_other_embedder_resets(tmp_path):
+    index = VectorIndex(tmp_path, "test")
+    index.add([1, 2], random_vectors(2))
+    # a vector was written but not its id
+    with open(tmp_path / "vectors.f32", "ab") as handle:
+        handle.write(random_vectors(1, seed=1).tobytes())
+
+    assert VectorIndex(tmp_path, "test").count == 2
+    assert VectorIndex(tmp_path, "other").count == 0
+    assert not (tmp_path / "ids.i64").exists()
+
+
+def test_ivf_search_finds_near_duplicates_and_indexes_new_rows(tmp_path):
+    vectors = random_vectors(4000, dim=16)
+    index = VectorIndex(tmp_path, "test", nprobe=4)
+    index.add(np.arange(1, 4001), vectors)
+    index.train(nlist=16)
+    extra = random_vectors(10, dim=16, seed=3)
+    index.add(np.arange(4001, 4011), extra)
+
+    found = sum(index.search(vectors[i] + 0.01, k=1)[0][0] == i + 1 for i in range(0, 4000, 40))
+    assert found >= 95
+    assert index.search(extra[4], k=1)[0][0] == 4005
+    assert VectorIndex(tmp_path, "test", nprobe=4).search(extra[4], k=1)[0][0] == 4005
+
+
+def test_removed_ids_are_skipped_then_purged(tmp_path):
+    vectors = random_vectors(100)
+    index = VectorIndex(tmp_path, "test")
+    index.add(np.arange(1, 101), vectors)
+
+    assert index.remove([5, 6, 1000]) == 2
+    assert index.search(vectors[4], k=1)[0][0] != 5
+    assert 6 not in [memory_id for memory_id, _ in index.search(vectors[5], k=100)]
+    assert len(index.search(vectors[0], k=500)) == 98
+    reopened = VectorIndex(tmp_path, "test")
+    assert reopened.stats()["deleted"] == 2 and reopened.search(vectors[4], k=1)[0][0] != 5
+
+    # past a quarter of the rows the files are rewritten without them
+    index.remove(list(range(10, 40)))
+    assert index.count == 68 and index.stats()["deleted"] == 0
+    assert not (tmp_path / "deleted.i64").exists()
+    assert index.search(vectors[50], k=1)[0][0] == 51
+    assert VectorIndex(tmp_path, "test").count == 68
+
+
+def test_trained_index_skips_removed_ids(tmp_path):
+    vectors = random_vectors(2000, dim=16)
+    index = VectorIndex(tmp_path, "test", nprobe=16)
+    index.add(np.arange(1, 2001), vectors)
+    index.train(nlist=8)
+
+    index.remove([43])
+
+    assert index.search(vectors[42], k=1)[0][0] != 43
+    (tmp_path / "purging").touch()
+    assert VectorIndex(tmp_path, "test").count == 0
+
+
+def test_hashing_embedder_matches_shared_words_without_accents():
+    embedder = HashingEmbedder(dim=256)
+    vectors = embedder.embed_sync(["Milo aime le thé vert", "Le serveur Berlin Est", "le the"])
+
+    assert vectors[2] @ vectors[0] > vectors[2] @ vectors[1]
+    np.testing.assert_allclose(np.linalg.norm(vectors, axis=1), 1, rtol=1e-5)
+
+
+class FakeMemoryDB:
+    def __init__(self):
+        self.rows = {}
+
+    def commit(self, memory_id, content="souvenir", author="milo"):
+        self.rows[memory_id] = {"id": memory_id, "content": content, "author": author, "timestamp": None, "source": "discord", "tags": None}
+
+    async def read_memories_after_id(self, after_id, limit):
+        return [{"id": i, "content": self.rows[i]["content"]} for i in sorted(self.rows) if i > after_id][:limit]
+
+    async def get_memories(self, ids):
+        return [dict(self.rows[i]) for i in ids if i in self.rows]
+
+
+def test_memory_search_syncs_new_memories_and_filters(tmp_path):
+    db = FakeMemoryDB()
+    for i, (content, author) in enumerate([("Milo aime le thé", "milo"), ("Aletheia raconte une histoire", "aletheia"), ("Le thé de Milo est froid", "aletheia")], start=1):
+        db.rows[i] = {"id": i, "content": content, "author": author, "timestamp": None, "source": "discord", "tags": None}
+    search = MemorySearch(db, VectorIndex(tmp_path, "hashing-256"), HashingEmbedder(256), batch_size=2)
+
+    async def run():
+        added = await search.sync()
+        again = await search.sync()
+        found = await search.search("thé", k=2)
+        filtered = await search.search("thé", k=1, author="aletheia")
+        return added, again, found, filtered
+
+    added, again, found, filtered = asyncio.run(run())
+
+    assert (added, again) == (3, 0)
+    assert {memory["id"] for memory in found} == {1, 3}
+    assert [memory["id"] for memory in filtered] == [3]
+
+
+def test_memory_search_indexes_ids_committed_out_of_order(tmp_path):
+    db = FakeMemoryDB()
+    for memory_id in (1, 2, 4, 5, 8):
+        db.commit(memory_id)
+    search = MemorySearch(db, VectorIndex(tmp_path, "hashing-256"), HashingEmbedder(256), batch_size=2, window=2, gap_timeout=60)
+
+    async def run():
+        first = await search.sync()
+        gaps = search.stats()["gaps"]
+        # 7 is inside the window read again, 3 only comes back as a gap
+        db.commit(7)
+        db.commit(3)
+        second = await search.sync()
+        third = await search.sync()
+        return first, gaps, second, third
+
+    first, gaps, second, third = asyncio.run(run())
+
+    assert (first, gaps) == (5, 3)
+    assert (second, third) == (2, 0)
+    assert sorted(search.index.ids_above(0).tolist()) == [1, 2, 3, 4, 5, 7, 8]
+    stats = search.stats()
+    assert (stats["gaps"], stats["gaps_filled"], stats["max_id"]) == (1, 2, 8)
+
+    search.gap_timeout = 0
+    asyncio.run(search.sync())
+    assert search.stats()["gaps"] == 0 and search.stats()["gaps_expired"] == 1
+
+
+def test_memory_search_tops_up_and_forgets_archived_memories(tmp_path):
+    db = FakeMemoryDB()
+    for memory_id in range(1, 7):
+        db.commit(memory_id, f"Milo boit du thé numéro {memory_id}")
+    search = MemorySearch(db, VectorIndex(tmp_path, "hashing-256"), HashingEmbedder(256))
+
+    async def run():
+        await search.sync()
+        # compaction archived these without telling the index
+        for memory_id in (1, 2, 3, 4):
+            del db.rows[memory_id]
+        found = await search.search("thé", k=2)
+        await search.forget([5])
+        return found, await search.search("thé", k=2)
+
+    found, after = asyncio.run(run())
+
+    assert len(found) == 2 and {memory["id"] for memory in found} <= {5, 6}
+    assert [memory["id"] for memory in after] == [6]
+    assert search.stats()["forgotten"] == 5
@@ -0,0 +1,66 @@
+import asyncio
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+BACK_PACKAGE_ROOT = PROJECT_ROOT / "src" / "back"
+if str(BACK_PACKAGE_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACK_PACKAGE_ROOT))
+
+from warm_pool.pool import WarmPool  # noqa: E402
+
+GB = 1024 ** 3
+
+
+class FakeOllama:
+    def __init__(self, sizes):
+        self.sizes = sizes
+        self.loaded = {}
+        self.calls = []
+
+    async def load_model(self, model_name, keep_alive="10m"):
+        self.calls.append(("load", model_name))
+        self.loaded[model_name] = self.sizes[model_name]
+
+    async def unload_model(self, model_name):
+        self.calls.append(("unload", model_name))
+        self.loaded.pop(model_name, None)
+
+    async def running_models(self):
+        return [{"name": n, "size": s, "size_vram": s, "expires_at": None} for n, s in self.loaded.items()]
+
+
+def test_refresh_pings_pinned_and_predicted_models():
+    fake = FakeOllama({"qwen3:1.7b": GB, "qwen3:0.6b": GB, "llama3.1:8b": 5 * GB})
+    pool = WarmPool(fake, pinned=["qwen3:1.7b"], predict_top=1)
+    for _ in range(3):
+        pool.touch("llama3.1:8b")
+    pool.touch("qwen3:0.6b")
+
+    asyncio.run(pool.refresh())
+
+    assert ("load", "qwen3:1.7b") in fake.calls
+    assert ("load", "llama3.1:8b") in fake.calls
+    assert ("load", "qwen3:0.6b") not in fake.calls
+    assert pool.state()["memory_used"] == 6 * GB
+
+
+def test_budget_evicts_least_recently_used_unpinned_model():
+    fake = FakeOllama({"qwen3:1.7b": 2 * GB, "old": 2 * GB, "recent": 2 * GB})
+    fake.loaded = {"old": 2 * GB, "recent": 2 * GB}
+    pool = WarmPool(fake, pinned=["qwen3:1.7b"], memory_budget=5 * GB, predict_top=0)
+    pool.touch("old")
+    pool.touch("recent")
+
+    asyncio.run(pool.refresh())
+
+    assert ("unload", "old") in fake.calls
+    assert set(fake.loaded) == {"qwen3:1.7b", "recent"}
+    assert pool.state()["evictions"] == 1
+
+
+def test_scores_decay_over_time():
+    pool = WarmPool(FakeOllama({}), half_life=10.0)
+    pool.touch("m")
+    value, updated_at = pool._scores["m"]
+    assert abs(pool.score("m", updated_at + 10.0) - 0.5) < 1e-9